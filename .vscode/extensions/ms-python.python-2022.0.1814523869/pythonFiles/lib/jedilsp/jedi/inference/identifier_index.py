@@ -0,0 +1,271 @@
+"""
+An on-disk inverted index from identifiers to the files using them.
+
+Searching references in a project used to read every file (up to
+``_OPENED_FILE_LIMIT``) and search the name with a regex to find the few files
+that actually use it. With this index, the identifiers of a file (its name
+tokens, so names in comments and strings don't count) are only collected
+again when its mtime or size changes, and the files that don't use the
+searched name are skipped without being read.
+
+The index of a project is a sqlite database in the cache directory. Files
+are indexed lazily, while searching: to limit the time spent in the first
+searches of a big project, at most ``_INDEX_TIME_LIMIT`` seconds are spent
+indexing per search and the files that couldn't be indexed in time are
+yielded as before (i.e. the caller checks them with a regex).
+"""
+import hashlib
+import os
+import time
+from keyword import iskeyword
+
+from parso import python_bytes_to_unicode
+from parso.python.token import PythonTokenTypes
+from parso.python.tokenize import tokenize
+
+from jedi import debug
+from jedi import settings
+
+try:
+    import sqlite3
+except ImportError:
+    # Python may be built without sqlite3, in which case there's no index.
+    sqlite3 = None
+
+_INDEX_VERSION = 1
+
+_INDEX_TIME_LIMIT = 1.0
+"""
+Maximum time (in seconds) spent indexing files in a search. For comparison,
+tokenizing a file of 10kb takes about 6ms.
+"""
+
+_COMMIT_INTERVAL = 200
+"""
+Number of files indexed between commits.
+"""
+
+_NAME = PythonTokenTypes.NAME
+
+_indexes = {}
+
+
+def _get_identifiers(code, version_info):
+    return {
+        token.string
+        for token in tokenize(code, version_info=version_info)
+        if token.type == _NAME and not iskeyword(token.string)
+    }
+
+
+class IdentifierIndex:
+    def __init__(self, db_path):
+        self._db_path = db_path
+        self._connection = None
+        # path -> (file_id, mtime, size)
+        self._files = None
+
+    def _get_connection(self):
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
+            connection = sqlite3.connect(
+                self._db_path, timeout=1, check_same_thread=False)
+            try:
+                version, = connection.execute('PRAGMA user_version').fetchone()
+                if version != _INDEX_VERSION:
+                    connection.executescript('''
+                        DROP TABLE IF EXISTS occurrences;
+                        DROP TABLE IF EXISTS names;
+                        DROP TABLE IF EXISTS files;
+                        CREATE TABLE files (
+                            id INTEGER PRIMARY KEY,
+                            path TEXT NOT NULL UNIQUE,
+                            mtime REAL NOT NULL,
+                            size INTEGER NOT NULL
+                        );
+                        CREATE TABLE names (
+                            id INTEGER PRIMARY KEY,
+                            name TEXT NOT NULL UNIQUE
+                        );
+                        CREATE TABLE occurrences (
+                            name_id INTEGER NOT NULL,
+                            file_id INTEGER NOT NULL,
+                            PRIMARY KEY (name_id, file_id)
+                        ) WITHOUT ROWID;
+                        CREATE INDEX occurrences_file_id ON occurrences (file_id);
+                        PRAGMA user_version = %s;
+                    ''' % _INDEX_VERSION)
+            except sqlite3.Error:
+                connection.close()
+                raise
+            self._connection = connection
+
+        if self._files is None:
+            self._files = {
+                path: (file_id, mtime, size)
+                for file_id, path, mtime, size
+                in self._connection.execute('SELECT id, path, mtime, size FROM files')
+            }
+        return self._connection
+
+    def _get_file_ids(self, name):
+        return {
+            file_id for file_id, in self._connection.execute(
+                'SELECT file_id FROM occurrences '
+                'JOIN names ON names.id = occurrences.name_id '
+                'WHERE names.name = ?',
+                (name,)
+            )
+        }
+
+    def _index_file(self, path, stat, version_info):
+        try:
+            with open(path, 'rb') as f:
+                code = f.read()
+        except OSError:
+            return None
+        code = python_bytes_to_unicode(code, errors='replace')
+        identifiers = _get_identifiers(code, version_info)
+
+        connection = self._connection
+        indexed = self._files.get(path)
+        if indexed is None:
+            file_id = connection.execute(
+                'INSERT INTO files (path, mtime, size) VALUES (?, ?, ?)',
+                (path, stat.st_mtime, stat.st_size)
+            ).lastrowid
+        else:
+            file_id = indexed[0]
+            connection.execute('DELETE FROM occurrences WHERE file_id = ?', (file_id,))
+            connection.execute(
+                'UPDATE files SET mtime = ?, size = ? WHERE id = ?',
+                (stat.st_mtime, stat.st_size, file_id)
+            )
+        connection.executemany(
+            'INSERT OR IGNORE INTO names (name) VALUES (?)',
+            ((identifier,) for identifier in identifiers)
+        )
+        connection.executemany(
+            'INSERT INTO occurrences (name_id, file_id) '
+            'SELECT id, ? FROM names WHERE name = ?',
+            ((file_id, identifier) for identifier in identifiers)
+        )
+        self._files[path] = (file_id, stat.st_mtime, stat.st_size)
+        return identifiers
+
+    def _remove_files(self, paths):
+        for path in paths:
+            file_id = self._files.pop(path)[0]
+            self._connection.execute('DELETE FROM occurrences WHERE file_id = ?', (file_id,))
+            self._connection.execute('DELETE FROM files WHERE id = ?', (file_id,))
+
+    def filter_file_ios(self, file_io_iterator, name, version_info):
+        """
+        Yields the file ios which use ``name`` (and the ones that couldn't be
+        indexed).
+        """
+        try:
+            self._get_connection()
+            file_ids = self._get_file_ids(name)
+        except (OSError, sqlite3.Error) as e:
+            debug.warning('Identifier index not available: %s', e)
+            self._files = None
+            yield from file_io_iterator
+            return
+
+        deadline = time.time() + _INDEX_TIME_LIMIT
+        seen_paths = set()
+        indexed_count = 0
+        skipped_count = 0
+        use_index = True
+        try:
+            for file_io in file_io_iterator:
+                path = str(file_io.path)
+                seen_paths.add(path)
+                if not use_index:
+                    yield file_io
+                    continue
+
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+
+                indexed = self._files.get(path)
+                if indexed is not None \
+                        and indexed[1] == stat.st_mtime and indexed[2] == stat.st_size:
+                    if indexed[0] in file_ids:
+                        yield file_io
+                    else:
+                        skipped_count += 1
+                    continue
+
+                if time.time() > deadline:
+                    # Not indexed yet (it'll be in a later search).
+                    yield file_io
+                    continue
+
+                try:
+                    identifiers = self._index_file(path, stat, version_info)
+                    indexed_count += 1
+                    if indexed_count % _COMMIT_INTERVAL == 0:
+                        self._connection.commit()
+                except sqlite3.Error as e:
+                    debug.warning('Error updating the identifier index: %s', e)
+                    use_index = False
+                    yield file_io
+                    continue
+
+                if identifiers is None or name in identifiers:
+                    yield file_io
+                else:
+                    skipped_count += 1
+            else:
+                # All files were seen: forget the ones which were removed.
+                if use_index:
+                    try:
+                        self._remove_files([
+                            path for path in self._files
+                            if path not in seen_paths and not os.path.exists(path)
+                        ])
+                    except sqlite3.Error as e:
+                        debug.warning('Error updating the identifier index: %s', e)
+                        use_index = False
+        finally:
+            debug.dbg(
+                'Identifier index: %s files indexed, %s files without %r skipped',
+                indexed_count, skipped_count, name
+            )
+            try:
+                if use_index:
+                    self._connection.commit()
+                else:
+                    self._connection.rollback()
+            except sqlite3.Error as e:
+                debug.warning('Error updating the identifier index: %s', e)
+                use_index = False
+            if not use_index:
+                # The files in memory may not match the database anymore.
+                self._files = None
+
+
+def _get_index(project_path):
+    db_name = hashlib.sha256(str(project_path).encode('utf-8')).hexdigest()
+    db_path = os.path.join(settings.cache_directory, 'identifier_index', db_name + '.db')
+    try:
+        return _indexes[db_path]
+    except KeyError:
+        index = _indexes[db_path] = IdentifierIndex(db_path)
+        return index
+
+
+def filter_file_ios_using_name(inference_state, file_io_iterator, name):
+    """
+    Filters the file ios to the ones using ``name`` through the identifier
+    index of the project (if available).
+    """
+    if sqlite3 is None or not settings.identifier_index:
+        return file_io_iterator
+    index = _get_index(inference_state.project.path)
+    return index.filter_file_ios(
+        file_io_iterator, name, inference_state.grammar.version_info)
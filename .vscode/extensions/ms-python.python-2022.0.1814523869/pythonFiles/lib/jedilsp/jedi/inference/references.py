@@ -9,6 +9,7 @@ from jedi.inference.names import SubModuleName
 from jedi.inference.imports import load_module_from_path
 from jedi.inference.filters import ParserTreeFilter
 from jedi.inference.gradual.conversion import convert_names
+from jedi.inference.identifier_index import filter_file_ios_using_name
 
 _IGNORE_FOLDERS = ('.tox', '.venv', '.mypy_cache', 'venv', '__pycache__')
 
@@ -278,6 +279,7 @@ def get_module_contexts_containing_name(inference_state, module_contexts, name,
     # At the moment there is no such thing as `scope=sys.path`.
     # file_io_iterator = _find_python_files_in_sys_path(inference_state, module_contexts)
     file_io_iterator = _find_project_modules(inference_state, module_contexts)
+    file_io_iterator = filter_file_ios_using_name(inference_state, file_io_iterator, name)
     yield from search_in_file_ios(inference_state, file_io_iterator, name,
                                   limit_reduction=limit_reduction)
 
@@ -23,6 +23,7 @@ Filesystem cache
 ~~~~~~~~~~~~~~~~
 
 .. autodata:: cache_directory
+.. autodata:: identifier_index
 
 
 Parser
@@ -89,6 +90,13 @@ On Linux, if the environment variable ``$XDG_CACHE_HOME`` is set,
 ``$XDG_CACHE_HOME/jedi`` is used instead of the default one.
 """
 
+identifier_index = True
+"""
+Keeps an index of the identifiers used in the files of a project (stored in
+the cache directory), so that searching references only reads the files that
+use the name searched.
+"""
+
 # ----------------
 # Parser
 # ----------------
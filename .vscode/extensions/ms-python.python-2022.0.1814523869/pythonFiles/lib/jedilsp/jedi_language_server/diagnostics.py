@@ -0,0 +1,223 @@
+"""Diagnostics scheduler.
+
+Syntax errors are computed off the event loop, in a single worker thread:
+
+- didChange notifications are debounced per uri, so a burst of keystrokes
+  results in a single parse;
+- work scheduled for an older version of a document is dropped (before
+  parsing and before publishing) as soon as a newer version is scheduled;
+- the parso module of the previous run of a document is kept and updated
+  with parso's DiffParser, so only the changed regions are reparsed.
+
+Note: jedi's own parser cache (used by `jedi.Script`) is not thread safe, so
+the modules parsed here are kept separately and only used by the worker.
+"""
+
+import asyncio
+import itertools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import jedi.settings
+import parso
+from jedi.api.errors import parso_to_jedi_errors
+from jedi.api.project import get_default_project
+from parso.grammar import Grammar
+from parso.python.tree import Module
+from pygls.lsp.types import Diagnostic
+
+from . import jedi_utils
+
+if TYPE_CHECKING:
+    from .server import JediLanguageServer
+
+log = logging.getLogger(__name__)
+
+
+class _ParsedDocument:
+    """The last module parsed for a document (only used by the worker)."""
+
+    def __init__(
+        self,
+        grammar: Grammar,
+        module: Module,
+        lines: List[str],
+        diagnostics: List[Diagnostic],
+    ) -> None:
+        self.grammar = grammar
+        self.module = module
+        self.lines = lines
+        self.diagnostics = diagnostics
+
+
+class DiagnosticsScheduler:
+    """Schedules the computation and publishing of diagnostics per uri."""
+
+    def __init__(self, server: "JediLanguageServer") -> None:
+        self._server = server
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="jedi-diagnostics"
+        )
+        self._generation_counter = itertools.count()
+
+        # uri -> generation of the most recently scheduled work (anything
+        # computed for a different generation is stale).
+        self._generations: Dict[str, int] = {}
+
+        # uri -> debounce timer of the scheduled work.
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+
+        # uri -> last module parsed (only accessed from the worker thread).
+        self._parsed: Dict[str, _ParsedDocument] = {}
+
+    def schedule(self, uri: str, delay: float = 0.0) -> None:
+        """Schedule diagnostics for uri (replacing pending work for it).
+
+        Must be called from the event loop.
+        """
+        generation = next(self._generation_counter)
+        self._generations[uri] = generation
+        timer = self._timers.pop(uri, None)
+        if timer is not None:
+            timer.cancel()
+
+        if delay > 0:
+            self._timers[uri] = self._server.loop.call_later(
+                delay, self._submit, uri, generation
+            )
+        else:
+            self._submit(uri, generation)
+
+    def clear(self, uri: str) -> None:
+        """Cancel pending work for uri and publish empty diagnostics.
+
+        Must be called from the event loop.
+        """
+        self._generations.pop(uri, None)
+        timer = self._timers.pop(uri, None)
+        if timer is not None:
+            timer.cancel()
+        self._executor.submit(self._parsed.pop, uri, None)
+        self._server.publish_diagnostics(uri, [])
+
+    def shutdown(self) -> None:
+        """Stop the worker thread (pending work is discarded)."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self._generations.clear()
+        self._executor.shutdown(wait=False)
+
+    def _submit(self, uri: str, generation: int) -> None:
+        self._timers.pop(uri, None)
+        if self._generations.get(uri) != generation:
+            return
+
+        # The document is only accessed here (in the event loop); the worker
+        # gets a snapshot of its contents.
+        document = self._server.workspace.get_document(uri)
+        path = Path(document.path) if document.path else None
+        grammar, errors_grammar = _get_grammars(self._server.project, path)
+        self._executor.submit(
+            self._run,
+            uri,
+            generation,
+            document.source,
+            grammar,
+            errors_grammar,
+        )
+
+    def _run(
+        self,
+        uri: str,
+        generation: int,
+        code: str,
+        grammar: Grammar,
+        errors_grammar: Grammar,
+    ) -> None:
+        if self._generations.get(uri) != generation:
+            return  # A newer version was scheduled while this one waited.
+
+        try:
+            diagnostics = self._get_diagnostics(
+                uri, code, grammar, errors_grammar
+            )
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Error computing diagnostics for: %s", uri)
+            return
+
+        self._server.loop.call_soon_threadsafe(
+            self._publish, uri, generation, diagnostics
+        )
+
+    def _publish(
+        self, uri: str, generation: int, diagnostics: List[Diagnostic]
+    ) -> None:
+        if self._generations.get(uri) != generation:
+            return  # Changed (or closed) while computing.
+        self._server.publish_diagnostics(uri, diagnostics)
+
+    def _get_diagnostics(
+        self,
+        uri: str,
+        code: str,
+        grammar: Grammar,
+        errors_grammar: Grammar,
+    ) -> List[Diagnostic]:
+        # Same as `jedi.Script` does with the code.
+        if len(code) > jedi.settings._cropped_file_size:
+            code = code[: jedi.settings._cropped_file_size]
+        lines = parso.split_lines(code, keepends=True)
+
+        parsed = self._parsed.get(uri)
+        if parsed is not None and parsed.grammar is grammar:
+            if parsed.lines == lines:
+                return parsed.diagnostics
+            module = _diff_parse(grammar, parsed.module, parsed.lines, lines)
+        else:
+            module = grammar.parse(code)
+
+        diagnostics = [
+            jedi_utils.lsp_diagnostic(error)
+            for error in parso_to_jedi_errors(errors_grammar, module)
+        ]
+        self._parsed[uri] = _ParsedDocument(
+            grammar, module, lines, diagnostics
+        )
+        return diagnostics
+
+
+def _get_grammars(
+    project: Optional[jedi.Project], path: Optional[Path]
+) -> Tuple[Grammar, Grammar]:
+    """Get the grammars to parse the code and to check it for errors.
+
+    Same as the ones used by `jedi.Script` (stubs are parsed with the latest
+    grammar).
+    """
+    if project is None:
+        project = get_default_project(None if path is None else path.parent)
+    errors_grammar = project.get_environment().get_grammar()
+    if path is not None and path.suffix == ".pyi":
+        return parso.load_grammar(version="3.7"), errors_grammar
+    return errors_grammar, errors_grammar
+
+
+def _diff_parse(
+    grammar: Grammar, module: Module, old_lines: List[str], lines: List[str]
+) -> Module:
+    """Update module (in place) to match lines, reparsing only what changed.
+
+    Same as `Grammar.parse(diff_cache=True)`, without parso's global cache.
+    """
+    try:
+        # pylint: disable=protected-access
+        return grammar._diff_parser(
+            grammar._pgen_grammar, grammar._tokenizer, module
+        ).update(old_lines=old_lines, new_lines=lines)
+    except Exception:  # pylint: disable=broad-except
+        # The module may have been partially updated: start from scratch.
+        log.exception("Error in incremental parse, doing a full parse.")
+        return grammar.parse("".join(lines))
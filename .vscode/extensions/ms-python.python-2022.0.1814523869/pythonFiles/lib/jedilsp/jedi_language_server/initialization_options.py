@@ -42,6 +42,7 @@ class Diagnostics(Model):
     did_open: bool = True
     did_save: bool = True
     did_change: bool = True
+    debounce_seconds: float = 0.25
 
 
 class HoverDisableOptions(Model):
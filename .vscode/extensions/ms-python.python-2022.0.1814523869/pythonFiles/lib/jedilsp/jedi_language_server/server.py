@@ -6,7 +6,6 @@ Official language server spec:
     https://microsoft.github.io/language-server-protocol/specification
 """
 
-import itertools
 from typing import Any, List, Optional, Union
 
 from jedi import Project
@@ -21,6 +20,7 @@ from pygls.lsp.methods import (
     DOCUMENT_SYMBOL,
     HOVER,
     INITIALIZE,
+    INITIALIZED,
     REFERENCES,
     RENAME,
     SIGNATURE_HELP,
@@ -29,6 +29,7 @@ from pygls.lsp.methods import (
     TEXT_DOCUMENT_DID_OPEN,
     TEXT_DOCUMENT_DID_SAVE,
     WORKSPACE_DID_CHANGE_CONFIGURATION,
+    WORKSPACE_DID_CHANGE_WATCHED_FILES,
     WORKSPACE_SYMBOL,
 )
 from pygls.lsp.types import (
@@ -42,12 +43,16 @@ from pygls.lsp.types import (
     CompletionParams,
     DidChangeConfigurationParams,
     DidChangeTextDocumentParams,
+    DidChangeWatchedFilesParams,
+    DidChangeWatchedFilesRegistrationOptions,
     DidCloseTextDocumentParams,
     DidOpenTextDocumentParams,
     DidSaveTextDocumentParams,
     DocumentHighlight,
     DocumentSymbol,
     DocumentSymbolParams,
+    FileChangeType,
+    FileSystemWatcher,
     Hover,
     InitializeParams,
     InitializeResult,
@@ -56,6 +61,8 @@ from pygls.lsp.types import (
     MarkupKind,
     MessageType,
     ParameterInformation,
+    Registration,
+    RegistrationParams,
     RenameParams,
     SignatureHelp,
     SignatureHelpOptions,
@@ -67,9 +74,12 @@ from pygls.lsp.types import (
 )
 from pygls.protocol import LanguageServerProtocol, lsp_method
 from pygls.server import LanguageServer
+from pygls.uris import to_fs_path
 
 from . import jedi_utils, pygls_utils, text_edit_utils
+from .diagnostics import DiagnosticsScheduler
 from .initialization_options import InitializationOptions
+from .symbol_index import WorkspaceSymbolIndex
 
 
 class JediLanguageServerProtocol(LanguageServerProtocol):
@@ -138,8 +148,48 @@ class JediLanguageServerProtocol(LanguageServerProtocol):
             if server.workspace.root_path
             else None
         )
+        if server.project:
+            server.symbol_index = WorkspaceSymbolIndex(
+                server.project,
+                server.workspace.root_path,
+                initialization_options.workspace.symbols.ignore_folders,
+            )
+            server.symbol_index.start()
         return initialize_result
 
+    @lsp_method(INITIALIZED)
+    def lsp_initialized(self, *args: Any) -> None:
+        """Override built-in initialized notification.
+
+        Asks the client to send the changes to Python files (used to keep the
+        workspace symbol index up to date).
+        """
+        super().lsp_initialized(*args)
+        server: "JediLanguageServer" = self._server
+        if server.symbol_index is None or not (
+            server.client_capabilities.get_capability(
+                "workspace.did_change_watched_files.dynamic_registration",
+                False,
+            )
+        ):
+            return
+        server.register_capability(
+            RegistrationParams(
+                registrations=[
+                    Registration(
+                        id="jedi-language-server-watched-files",
+                        method=WORKSPACE_DID_CHANGE_WATCHED_FILES,
+                        register_options=DidChangeWatchedFilesRegistrationOptions(
+                            watchers=[
+                                FileSystemWatcher(glob_pattern="**/*.py"),
+                                FileSystemWatcher(glob_pattern="**/*.pyi"),
+                            ]
+                        ),
+                    )
+                ]
+            )
+        )
+
 
 class JediLanguageServer(LanguageServer):
     """Jedi language server.
@@ -148,13 +198,26 @@ class JediLanguageServer(LanguageServer):
         protocol_cls.
     :attr project: a Jedi project. This value is created in
         `JediLanguageServerProtocol.lsp_initialize`.
+    :attr diagnostics_scheduler: computes and publishes the diagnostics of
+        documents off the event loop.
+    :attr symbol_index: the index used for workspace symbols. This value is
+        created in `JediLanguageServerProtocol.lsp_initialize` (None if
+        there's no project).
     """
 
     initialization_options: InitializationOptions
     project: Optional[Project]
+    symbol_index: Optional[WorkspaceSymbolIndex] = None
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
+        self.diagnostics_scheduler = DiagnosticsScheduler(self)
+
+    def shutdown(self) -> None:
+        self.diagnostics_scheduler.shutdown()
+        if self.symbol_index is not None:
+            self.symbol_index.close()
+        super().shutdown()
 
 
 SERVER = JediLanguageServer(protocol_cls=JediLanguageServerProtocol)
@@ -425,60 +488,50 @@ def document_symbol(
     return symbol_information if symbol_information else None
 
 
-def _ignore_folder(path_check: str, jedi_ignore_folders: List[str]) -> bool:
-    """Determines whether there's an ignore folder in the path.
-
-    Intended to be used with the `workspace_symbol` function
-    """
-    for ignore_folder in jedi_ignore_folders:
-        if f"/{ignore_folder}/" in path_check:
-            return True
-    return False
-
-
 @SERVER.feature(WORKSPACE_SYMBOL)
 def workspace_symbol(
     server: JediLanguageServer, params: WorkspaceSymbolParams
 ) -> Optional[List[SymbolInformation]]:
     """Document Python workspace symbols.
 
-    Returns up to maxSymbols, or all symbols if maxSymbols is <= 0, ignoring
-    the following symbols:
-
-    1. Those that don't have a module_path associated with them (built-ins)
-    2. Those that are not rooted in the current workspace.
-    3. Those whose folders contain a directory that is ignored (.venv, etc)
+    Returns up to maxSymbols, or all symbols if maxSymbols is <= 0, from the
+    workspace symbol index, which only has the symbols of the Python files in
+    the current workspace, ignoring those whose folders contain a directory
+    that is ignored (.venv, etc).
     """
-    if not server.project:
+    if server.symbol_index is None:
         return None
-    names = server.project.complete_search(params.query)
-    workspace_root = server.workspace.root_path
-    ignore_folders = (
-        server.initialization_options.workspace.symbols.ignore_folders
-    )
-    unignored_names = (
-        name
-        for name in names
-        if name.module_path is not None
-        and str(name.module_path).startswith(workspace_root)
-        and not _ignore_folder(str(name.module_path), ignore_folders)
-    )
-    _symbols = (
-        symbol
-        for symbol in (
-            jedi_utils.lsp_symbol_information(name) for name in unignored_names
-        )
-        if symbol is not None
-    )
     max_symbols = server.initialization_options.workspace.symbols.max_symbols
-    symbols = (
-        list(itertools.islice(_symbols, max_symbols))
-        if max_symbols > 0
-        else list(_symbols)
-    )
+    symbols = server.symbol_index.search(params.query, max_symbols)
     return symbols if symbols else None
 
 
+@SERVER.feature(WORKSPACE_DID_CHANGE_WATCHED_FILES)
+def did_change_watched_files(
+    server: JediLanguageServer, params: DidChangeWatchedFilesParams
+) -> None:
+    """Implement event for workspace/didChangeWatchedFiles.
+
+    Keeps the workspace symbol index up to date.
+    """
+    if server.symbol_index is None:
+        return
+    deleted = [
+        to_fs_path(change.uri)
+        for change in params.changes
+        if change.type == FileChangeType.Deleted
+    ]
+    changed = [
+        to_fs_path(change.uri)
+        for change in params.changes
+        if change.type != FileChangeType.Deleted
+    ]
+    if deleted:
+        server.symbol_index.remove(deleted)
+    if changed:
+        server.symbol_index.update(changed)
+
+
 @SERVER.feature(RENAME)
 def rename(
     server: JediLanguageServer, params: RenameParams
@@ -610,13 +663,22 @@ def did_change_configuration(
 # Static capability or initializeOptions functions that rely on a specific
 # client capability or user configuration. These are associated with
 # JediLanguageServer within JediLanguageServerProtocol.lsp_initialize
-def _publish_diagnostics(server: JediLanguageServer, uri: str) -> None:
+def _update_symbol_index(server: JediLanguageServer, uri: str) -> None:
+    """Helper function to reindex the symbols of a saved file."""
+    if server.symbol_index is not None:
+        server.symbol_index.update([to_fs_path(uri)])
+
+
+def _publish_diagnostics(
+    server: JediLanguageServer, uri: str, debounce: bool = False
+) -> None:
     """Helper function to publish diagnostics for a file."""
-    document = server.workspace.get_document(uri)
-    jedi_script = jedi_utils.script(server.project, document)
-    errors = jedi_script.get_syntax_errors()
-    diagnostics = [jedi_utils.lsp_diagnostic(error) for error in errors]
-    server.publish_diagnostics(uri, diagnostics)
+    delay = (
+        server.initialization_options.diagnostics.debounce_seconds
+        if debounce
+        else 0.0
+    )
+    server.diagnostics_scheduler.schedule(uri, delay)
 
 
 # TEXT_DOCUMENT_DID_SAVE
@@ -624,14 +686,15 @@ def did_save_diagnostics(
     server: JediLanguageServer, params: DidSaveTextDocumentParams
 ) -> None:
     """Actions run on textDocument/didSave: diagnostics."""
+    _update_symbol_index(server, params.text_document.uri)
     _publish_diagnostics(server, params.text_document.uri)
 
 
 def did_save_default(
-    server: JediLanguageServer,  # pylint: disable=unused-argument
-    params: DidSaveTextDocumentParams,  # pylint: disable=unused-argument
+    server: JediLanguageServer, params: DidSaveTextDocumentParams
 ) -> None:
     """Actions run on textDocument/didSave: default."""
+    _update_symbol_index(server, params.text_document.uri)
 
 
 # TEXT_DOCUMENT_DID_CHANGE
@@ -639,7 +702,7 @@ def did_change_diagnostics(
     server: JediLanguageServer, params: DidChangeTextDocumentParams
 ) -> None:
     """Actions run on textDocument/didChange: diagnostics."""
-    _publish_diagnostics(server, params.text_document.uri)
+    _publish_diagnostics(server, params.text_document.uri, debounce=True)
 
 
 def did_change_default(
@@ -669,7 +732,7 @@ def did_close_diagnostics(
     server: JediLanguageServer, params: DidCloseTextDocumentParams
 ) -> None:
     """Actions run on textDocument/didClose: diagnostics."""
-    server.publish_diagnostics(params.text_document.uri, [])
+    server.diagnostics_scheduler.clear(params.text_document.uri)
 
 
 def did_close_default(
@@ -0,0 +1,632 @@
+"""Workspace symbol index.
+
+Used by workspace/symbol instead of `jedi.Project.complete_search`, which
+walks, reads and parses the files of the workspace for every query.
+
+The index holds the definitions (classes, functions and module / class
+level assignments, nested ones included) of every Python file of the
+workspace along with their kind, position and container. It's:
+
+- built in a background thread (files are parsed in worker processes);
+- stored on disk (jedi's cache directory), so only the files whose mtime or
+  size changed are parsed again when the server restarts;
+- updated incrementally from didSave and didChangeWatchedFiles;
+- queried through the sorted names (prefix matches) and a trigram index
+  (substring and fuzzy matches).
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    TimeoutError as FuturesTimeoutError,
+    wait,
+)
+from functools import partial
+from pathlib import Path
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+import jedi.settings
+import parso
+from jedi import Project
+from jedi.api.helpers import split_search_string
+from jedi.file_io import FolderIO
+from jedi.inference.references import recurse_find_python_files
+from parso.tree import BaseNode
+from pygls.lsp.types import Location, Position, Range, SymbolInformation
+
+from .type_map import get_lsp_symbol_type
+
+log = logging.getLogger(__name__)
+
+_INDEX_VERSION = 1
+
+# Files sent to a worker process at once.
+_CHUNK_SIZE = 64
+
+# Below this number of files to parse, they're parsed in the index thread
+# (starting the worker processes isn't worth it).
+_MIN_FILES_FOR_WORKERS = 2 * _CHUNK_SIZE
+
+# Minimum number of seconds between writes of the index after incremental
+# updates (it's always written after a build and when closed).
+_SAVE_INTERVAL = 30.0
+
+# Maximum number of seconds that closing the index waits for the index
+# thread (to finish the files being parsed and save the index).
+_CLOSE_TIMEOUT = 5.0
+
+# Number of seconds between checks for the index being closed while waiting
+# for the worker processes.
+_WORKERS_POLL_INTERVAL = 0.2
+
+# Minimum ratio of the trigrams of a query found in a name for it to be
+# considered a fuzzy match.
+_MIN_FUZZY_SCORE = 0.5
+
+_COMPOUND_STATEMENTS = frozenset(
+    (
+        "async_funcdef",
+        "async_stmt",
+        "decorated",
+        "for_stmt",
+        "if_stmt",
+        "simple_stmt",
+        "suite",
+        "try_stmt",
+        "while_stmt",
+        "with_stmt",
+    )
+)
+
+
+class IndexedSymbol(NamedTuple):
+    """A definition in the index.
+
+    :attr type: the jedi type of the definition (module, class, function or
+        statement).
+    :attr line: 0-indexed line of the name of the definition.
+    :attr column: 0-indexed column of the name of the definition.
+    :attr container: full name of the module / class / function with the
+        definition (empty for top level modules).
+    """
+
+    name: str
+    type: str
+    line: int
+    column: int
+    container: str
+
+
+class _IndexedFile(NamedTuple):
+    mtime: float
+    size: int
+    symbols: List[IndexedSymbol]
+
+
+def _ignore_folder(path_check: str, jedi_ignore_folders: List[str]) -> bool:
+    """Determines whether there's an ignore folder in the path."""
+    for ignore_folder in jedi_ignore_folders:
+        if f"/{ignore_folder}/" in path_check:
+            return True
+    return False
+
+
+def _trigrams(string: str) -> Set[str]:
+    return {string[i : i + 3] for i in range(len(string) - 2)}
+
+
+def _package_name(directory: str, cache: Dict[str, str]) -> str:
+    """Dotted name of the package in directory ("" if it's not a package)."""
+    try:
+        return cache[directory]
+    except KeyError:
+        pass
+    if os.path.exists(
+        os.path.join(directory, "__init__.py")
+    ) or os.path.exists(os.path.join(directory, "__init__.pyi")):
+        parent, name = os.path.split(directory)
+        parent_name = _package_name(parent, cache) if parent != directory else ""
+        package_name = f"{parent_name}.{name}" if parent_name else name
+    else:
+        package_name = ""
+    cache[directory] = package_name
+    return package_name
+
+
+def _collect_symbols(
+    node: BaseNode,
+    container: str,
+    in_function: bool,
+    symbols: List[IndexedSymbol],
+) -> None:
+    for child in node.children:
+        type_ = child.type
+        if type_ in ("classdef", "funcdef"):
+            name = child.name
+            symbols.append(
+                IndexedSymbol(
+                    name.value,
+                    "class" if type_ == "classdef" else "function",
+                    name.line - 1,
+                    name.column,
+                    container,
+                )
+            )
+            _collect_symbols(
+                child.children[-1],
+                f"{container}.{name.value}",
+                in_function or type_ == "funcdef",
+                symbols,
+            )
+        elif type_ == "expr_stmt":
+            if not in_function:
+                for name in child.get_defined_names():
+                    symbols.append(
+                        IndexedSymbol(
+                            name.value,
+                            "statement",
+                            name.line - 1,
+                            name.column,
+                            container,
+                        )
+                    )
+        elif type_ in _COMPOUND_STATEMENTS:
+            _collect_symbols(child, container, in_function, symbols)
+
+
+def _get_symbols(
+    path: str,
+    code: bytes,
+    grammar: parso.Grammar,
+    package_cache: Dict[str, str],
+) -> List[IndexedSymbol]:
+    directory, file_name = os.path.split(path)
+    package_name = _package_name(directory, package_cache)
+    module_name = file_name.rsplit(".", 1)[0]
+    if module_name == "__init__" and package_name:
+        package_name, _, module_name = package_name.rpartition(".")
+    full_name = f"{package_name}.{module_name}" if package_name else module_name
+
+    symbols = [IndexedSymbol(module_name, "module", 0, 0, package_name)]
+    module = grammar.parse(
+        parso.python_bytes_to_unicode(code, errors="replace")
+    )
+    _collect_symbols(module, full_name, False, symbols)
+    return symbols
+
+
+def _index_files(
+    paths: List[str], grammar_version: str
+) -> List[Tuple[str, Optional[_IndexedFile]]]:
+    """Parse the given files (called in the worker processes).
+
+    :return: a list with (path, indexed file or None if it can't be read).
+    """
+    grammar = parso.load_grammar(version=grammar_version)
+    package_cache: Dict[str, str] = {}
+    indexed = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            with open(path, "rb") as stream:
+                code = stream.read()
+        except OSError:
+            indexed.append((path, None))
+            continue
+        try:
+            symbols = _get_symbols(path, code, grammar, package_cache)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Error indexing symbols of: %s", path)
+            symbols = []
+        indexed.append(
+            (path, _IndexedFile(stat.st_mtime, stat.st_size, symbols))
+        )
+    return indexed
+
+
+def _chunks(paths: List[str]) -> Iterator[List[str]]:
+    for i in range(0, len(paths), _CHUNK_SIZE):
+        yield paths[i : i + _CHUNK_SIZE]
+
+
+def symbol_information(path: str, symbol: IndexedSymbol) -> SymbolInformation:
+    """Get LSP SymbolInformation from an indexed symbol."""
+    end_column = symbol.column
+    if symbol.type != "module":
+        end_column += len(symbol.name)
+    return SymbolInformation(
+        name=symbol.name,
+        kind=get_lsp_symbol_type(symbol.type),
+        location=Location(
+            uri=Path(path).as_uri(),
+            range=Range(
+                start=Position(line=symbol.line, character=symbol.column),
+                end=Position(line=symbol.line, character=end_column),
+            ),
+        ),
+        container_name=(
+            f"{symbol.container}.{symbol.name}"
+            if symbol.container
+            else symbol.name
+        ),
+    )
+
+
+class WorkspaceSymbolIndex:
+    """Index of the definitions in the Python files of a workspace.
+
+    The index is built and updated in a background thread; `search` may be
+    called at any time (while building, results come from what's indexed
+    so far).
+    """
+
+    def __init__(
+        self,
+        project: Project,
+        root_path: str,
+        ignore_folders: List[str],
+    ) -> None:
+        self._project = project
+        self._root_path = root_path
+        self._ignore_folders = ignore_folders
+        self._grammar_version: Optional[str] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="jedi-symbol-index"
+        )
+        self._closed = False
+        self._dirty = False
+        self._last_save_time = 0.0
+
+        # Everything below is guarded by the lock (written in the index
+        # thread, read by `search`).
+        self._lock = threading.Lock()
+        self._files: Dict[str, _IndexedFile] = {}
+
+        # lowercase name -> path -> symbols with that name in the path.
+        self._name_to_symbols: Dict[
+            str, Dict[str, List[IndexedSymbol]]
+        ] = {}
+
+        # trigram -> lowercase names with it.
+        self._trigram_to_names: Dict[str, Set[str]] = defaultdict(set)
+
+        # Sorted lowercase names (None when it must be recomputed).
+        self._sorted_names: Optional[List[str]] = None
+
+    def start(self) -> "Future[None]":
+        """Load the index from disk and bring it up to date."""
+        return self._executor.submit(self._build)
+
+    def update(self, paths: Iterable[str]) -> None:
+        """Reindex files which were created or changed."""
+        paths = [path for path in paths if self._is_indexed_path(path)]
+        if paths:
+            self._executor.submit(self._update, paths)
+
+    def remove(self, paths: Iterable[str]) -> None:
+        """Remove the symbols of deleted files (or folders)."""
+        self._executor.submit(self._remove, list(paths))
+
+    def close(self) -> None:
+        """Stop building/updating and save what's indexed so far.
+
+        Waits at most `_CLOSE_TIMEOUT` seconds for the index thread.
+        """
+        self._closed = True
+        saved = self._executor.submit(self._save_if_dirty)
+        self._executor.shutdown(wait=False)
+        try:
+            saved.result(timeout=_CLOSE_TIMEOUT)
+        except FuturesTimeoutError:
+            log.warning("Timed out saving the symbol index.")
+
+    def search(self, query: str, limit: int = 0) -> List[SymbolInformation]:
+        """Search the symbols matching query.
+
+        The last dotted part of the query is matched (case insensitively) as
+        a prefix, then as a substring, then by shared trigrams (fuzzy); the
+        preceding parts must match the end of the container and a "class" or
+        "def" before the name filters by type (as `Project.search` does).
+
+        :param limit: maximum number of symbols (all if <= 0).
+        """
+        wanted_type, wanted_names = split_search_string(query)
+        last_name = wanted_names[-1].lower()
+        wanted_containers = wanted_names[:-1]
+
+        symbols: List[SymbolInformation] = []
+        with self._lock:
+            for name in self._iter_matching_names(last_name):
+                for path, path_symbols in self._name_to_symbols[name].items():
+                    for symbol in path_symbols:
+                        if wanted_type and symbol.type != wanted_type:
+                            continue
+                        if wanted_containers and (
+                            symbol.container.split(".")[
+                                -len(wanted_containers) :
+                            ]
+                            != wanted_containers
+                        ):
+                            continue
+                        symbols.append(symbol_information(path, symbol))
+                        if len(symbols) == limit:
+                            return symbols
+        return symbols
+
+    def _iter_matching_names(self, like_name: str) -> Iterator[str]:
+        # Note: the lock must be held.
+        if self._sorted_names is None:
+            self._sorted_names = sorted(self._name_to_symbols)
+        sorted_names = self._sorted_names
+
+        # 1. prefix matches (the exact match, if any, comes first).
+        for i in range(bisect_left(sorted_names, like_name), len(sorted_names)):
+            name = sorted_names[i]
+            if not name.startswith(like_name):
+                break
+            yield name
+
+        trigrams = _trigrams(like_name)
+        if not trigrams:
+            return
+
+        name_to_count: Dict[str, int] = defaultdict(int)
+        for trigram in trigrams:
+            for name in self._trigram_to_names.get(trigram, ()):
+                name_to_count[name] += 1
+
+        # 2. substring matches.
+        substring_names = []
+        fuzzy_names = []
+        for name, count in name_to_count.items():
+            if name.startswith(like_name):
+                continue
+            if count == len(trigrams) and like_name in name:
+                substring_names.append(name)
+            elif count >= _MIN_FUZZY_SCORE * len(trigrams):
+                fuzzy_names.append(name)
+        substring_names.sort(key=lambda name: (len(name), name))
+        yield from substring_names
+
+        # 3. fuzzy matches (the ones sharing most trigrams first).
+        fuzzy_names.sort(
+            key=lambda name: (-name_to_count[name], len(name), name)
+        )
+        yield from fuzzy_names
+
+    def _is_indexed_path(self, path: str) -> bool:
+        return (
+            path.endswith((".py", ".pyi"))
+            and path.startswith(self._root_path)
+            and not _ignore_folder(path, self._ignore_folders)
+        )
+
+    def _get_cache_path(self) -> Path:
+        key = hashlib.sha256(self._root_path.encode("utf-8")).hexdigest()
+        return (
+            Path(jedi.settings.cache_directory)
+            / "jedi_language_server"
+            / "workspace_symbols"
+            / f"{key}.json"
+        )
+
+    def _build(self) -> None:
+        try:
+            environment = self._project.get_environment()
+            self._grammar_version = "%s.%s" % environment.version_info[:2]
+            self._load()
+
+            started = time.time()
+            paths = {
+                str(file_io.path)
+                for file_io in recurse_find_python_files(
+                    FolderIO(self._root_path)
+                )
+            }
+            paths = {path for path in paths if self._is_indexed_path(path)}
+            with self._lock:
+                for path in set(self._files) - paths:
+                    self._set_file(path, None)
+            stale_paths = [path for path in paths if self._is_stale(path)]
+            log.info(
+                "Indexing symbols of %s of %s files.",
+                len(stale_paths),
+                len(paths),
+            )
+            if len(stale_paths) >= _MIN_FILES_FOR_WORKERS:
+                try:
+                    self._index_in_workers(stale_paths)
+                except Exception:  # pylint: disable=broad-except
+                    log.exception("Error indexing symbols in worker processes.")
+                stale_paths = [
+                    path for path in stale_paths if self._is_stale(path)
+                ]
+            for chunk in _chunks(stale_paths):
+                if self._closed:
+                    break
+                self._apply(_index_files(chunk, self._grammar_version))
+            log.info("Symbols indexed in %.2fs.", time.time() - started)
+            self._save_if_dirty()
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Error building the workspace symbol index.")
+
+    def _index_in_workers(self, paths: List[str]) -> None:
+        if sys.version_info < (3, 7):
+            # No `mp_context` (the files are indexed in the index thread).
+            return
+
+        index_files = partial(_index_files, grammar_version=self._grammar_version)
+        chunks = _chunks(paths)
+        # The workers are spawned: a forked worker inherits the locks held by
+        # other threads at the time of the fork (i.e.: the one of stdin, held
+        # by the thread reading the stdio transport, which deadlocks the
+        # worker when it closes its stdin).
+        pool = ProcessPoolExecutor(
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        pending: Set[Future] = set()
+        try:
+            # Only a few chunks are submitted at a time (so that closing the
+            # index doesn't need to wait for all of them).
+            max_pending = 2 * (os.cpu_count() or 1)
+            while not self._closed:
+                for chunk in chunks:
+                    pending.add(pool.submit(index_files, chunk))
+                    if len(pending) >= max_pending:
+                        break
+                if not pending:
+                    break
+                done, pending = wait(
+                    pending,
+                    timeout=_WORKERS_POLL_INTERVAL,
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    self._apply(future.result())
+        finally:
+            for future in pending:
+                future.cancel()
+            # When closed, the chunks being parsed are not waited for.
+            pool.shutdown(wait=not self._closed)
+
+    def _is_stale(self, path: str) -> bool:
+        indexed = self._files.get(path)
+        if indexed is None:
+            return True
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return True
+        return indexed.mtime != stat.st_mtime or indexed.size != stat.st_size
+
+    def _update(self, paths: List[str]) -> None:
+        if self._grammar_version is None:
+            return  # The build failed.
+        self._apply(_index_files(paths, self._grammar_version))
+        if time.time() - self._last_save_time >= _SAVE_INTERVAL:
+            self._save_if_dirty()
+
+    def _remove(self, paths: List[str]) -> None:
+        with self._lock:
+            for removed_path in paths:
+                folder_prefix = os.path.join(removed_path, "")
+                for path in list(self._files):
+                    if path == removed_path or path.startswith(folder_prefix):
+                        self._set_file(path, None)
+
+    def _apply(
+        self, indexed_files: List[Tuple[str, Optional[_IndexedFile]]]
+    ) -> None:
+        with self._lock:
+            for path, indexed in indexed_files:
+                self._set_file(path, indexed)
+
+    def _set_file(self, path: str, indexed: Optional[_IndexedFile]) -> None:
+        # Note: the lock must be held.
+        self._dirty = True
+        old_indexed = self._files.pop(path, None)
+        if old_indexed is not None:
+            for symbol in old_indexed.symbols:
+                name = symbol.name.lower()
+                path_to_symbols = self._name_to_symbols.get(name)
+                if path_to_symbols is None:
+                    continue
+                path_to_symbols.pop(path, None)
+                if not path_to_symbols:
+                    del self._name_to_symbols[name]
+                    self._sorted_names = None
+                    for trigram in _trigrams(name):
+                        names = self._trigram_to_names[trigram]
+                        names.discard(name)
+                        if not names:
+                            del self._trigram_to_names[trigram]
+
+        if indexed is None:
+            return
+        self._files[path] = indexed
+        for symbol in indexed.symbols:
+            name = symbol.name.lower()
+            path_to_symbols = self._name_to_symbols.get(name)
+            if path_to_symbols is None:
+                path_to_symbols = self._name_to_symbols[name] = {}
+                self._sorted_names = None
+                for trigram in _trigrams(name):
+                    self._trigram_to_names[trigram].add(name)
+            path_to_symbols.setdefault(path, []).append(symbol)
+
+    def _load(self) -> None:
+        cache_path = self._get_cache_path()
+        try:
+            with open(cache_path, "r", encoding="utf-8") as stream:
+                contents = json.load(stream)
+        except FileNotFoundError:
+            return
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Error loading symbol index: %s", cache_path)
+            return
+
+        if (
+            contents.get("version") != _INDEX_VERSION
+            or contents.get("root_path") != self._root_path
+            or contents.get("grammar_version") != self._grammar_version
+        ):
+            return
+        with self._lock:
+            for path, (mtime, size, symbols) in contents["files"].items():
+                self._set_file(
+                    path,
+                    _IndexedFile(
+                        mtime,
+                        size,
+                        [IndexedSymbol(*symbol) for symbol in symbols],
+                    ),
+                )
+            self._dirty = False
+
+    def _save_if_dirty(self) -> None:
+        if not self._dirty or self._grammar_version is None:
+            return
+        with self._lock:
+            self._dirty = False
+            contents = {
+                "version": _INDEX_VERSION,
+                "root_path": self._root_path,
+                "grammar_version": self._grammar_version,
+                "files": {
+                    path: [indexed.mtime, indexed.size, indexed.symbols]
+                    for path, indexed in self._files.items()
+                },
+            }
+            # Dumped with the lock held (the symbol lists are mutable).
+            data = json.dumps(contents)
+        self._last_save_time = time.time()
+
+        cache_path = self._get_cache_path()
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(data, encoding="utf-8")
+            os.replace(str(tmp_path), str(cache_path))
+        except OSError:
+            log.exception("Error saving symbol index: %s", cache_path)
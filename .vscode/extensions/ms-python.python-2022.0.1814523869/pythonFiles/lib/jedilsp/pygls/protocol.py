@@ -175,13 +175,7 @@ class JsonRPCProtocol(asyncio.Protocol):
     CHARSET = 'utf-8'
     CONTENT_TYPE = 'application/vscode-jsonrpc'
 
-    MESSAGE_PATTERN = re.compile(
-        rb'^(?:[^\r\n]+\r\n)*'
-        + rb'Content-Length: (?P<length>\d+)\r\n'
-        + rb'(?:[^\r\n]+\r\n)*\r\n'
-        + rb'(?P<body>{.*)',
-        re.DOTALL,
-    )
+    CONTENT_LENGTH_PATTERN = re.compile(rb'Content-Length: (\d+)')
 
     VERSION = '2.0'
 
@@ -194,7 +188,13 @@ class JsonRPCProtocol(asyncio.Protocol):
 
         self.fm = FeatureManager(server)
         self.transport = None
-        self._message_buf = []
+
+        # State of the incoming message being read (see `data_received`):
+        # the headers received so far or the body (preallocated once the
+        # headers are complete) and how many bytes of it were received.
+        self._header_buf = bytearray()
+        self._body_buf = None
+        self._body_received = 0
 
         self._send_only_body = False
 
@@ -427,34 +427,79 @@ class JsonRPCProtocol(asyncio.Protocol):
         self.transport = transport
 
     def data_received(self, data: bytes):
-        """Method from base class, called when server receives the data"""
-        logger.debug('Received %r', data)
-
-        while len(data):
-            # Append the incoming chunk to the message buffer
-            self._message_buf.append(data)
-
-            # Look for the body of the message
-            message = b''.join(self._message_buf)
-            found = JsonRPCProtocol.MESSAGE_PATTERN.fullmatch(message)
+        """Method from base class, called when server receives the data
 
-            body = found.group('body') if found else b''
-            length = int(found.group('length')) if found else 1
-
-            if len(body) < length:
-                # Message is incomplete; bail until more data arrives
-                return
-
-            # Message is complete;
-            # extract the body and any remaining data,
-            # and reset the buffer for the next message
-            body, data = body[:length], body[length:]
-            self._message_buf = []
+        Each byte is only looked at once: the headers are parsed as soon as
+        they're complete and then the body is copied into a buffer with the
+        size given by `Content-Length` (so, a message received in many chunks
+        doesn't need to be joined or scanned again for each chunk).
+        """
+        logger.debug('Received %r', data)
 
-            # Parse the body
-            self._procedure_handler(
-                json.loads(body.decode(self.CHARSET),
-                           object_hook=deserialize_message))
+        view = memoryview(data)
+        pos = 0
+        size = len(data)
+
+        while pos < size:
+            body_buf = self._body_buf
+            if body_buf is None:
+                # Read the headers (up to the empty line)
+                header_buf = self._header_buf
+                if not header_buf:
+                    end = data.find(b'\r\n\r\n', pos)
+                    if end == -1:
+                        header_buf += view[pos:]
+                        return
+                    headers = bytes(view[pos:end])
+                    pos = end + 4
+                else:
+                    # The end of the headers may be split among chunks
+                    old_len = len(header_buf)
+                    header_buf += view[pos:]
+                    end = header_buf.find(b'\r\n\r\n', max(old_len - 3, 0))
+                    if end == -1:
+                        return
+                    headers = bytes(header_buf[:end])
+                    pos += end + 4 - old_len
+                    del header_buf[:]
+
+                length = None
+                for header in headers.split(b'\r\n'):
+                    found = self.CONTENT_LENGTH_PATTERN.fullmatch(header)
+                    if found:
+                        length = int(found.group(1))
+
+                if length is None:
+                    logger.error('Message without Content-Length header skipped: %r', headers)
+                    continue
+
+                if size - pos >= length:
+                    # The whole body is in this chunk
+                    body = view[pos:pos + length].tobytes()
+                    pos += length
+                    self._handle_message_body(body)
+                    continue
+
+                body_buf = self._body_buf = bytearray(length)
+                self._body_received = 0
+
+            # Read the body
+            received = self._body_received
+            count = min(len(body_buf) - received, size - pos)
+            body_buf[received:received + count] = view[pos:pos + count]
+            pos += count
+            self._body_received = received + count
+
+            if self._body_received == len(body_buf):
+                # Message is complete; reset the state for the next message
+                self._body_buf = None
+                self._handle_message_body(body_buf)
+
+    def _handle_message_body(self, body):
+        """Parses the body of a message and handles it."""
+        self._procedure_handler(
+            json.loads(body.decode(self.CHARSET),
+                       object_hook=deserialize_message))
 
     def notify(self, method: str, params=None):
         """Sends a JSON RPC notification to the client."""
@@ -20,7 +20,8 @@ import io
 import logging
 import os
 import re
-from typing import List
+from itertools import islice
+from typing import List, Optional
 
 from pygls.lsp.types import (NumType, Position, Range, TextDocumentContentChangeEvent,
                              TextDocumentItem, TextDocumentSyncKind,
@@ -31,6 +32,12 @@ from pygls.uris import to_fs_path, uri_scheme
 RE_END_WORD = re.compile('^[A-Za-z_0-9]*')
 RE_START_WORD = re.compile('[A-Za-z_0-9]*$')
 
+# Characters outside of the Basic Multilingual Plane (which need two utf-16 code units)
+RE_ASTRAL_CHAR = re.compile('[\U00010000-\U0010FFFF]')
+
+# The characters considered line boundaries by `str.splitlines`
+LINE_BREAKS = '\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029'
+
 log = logging.getLogger(__name__)
 
 
@@ -40,7 +47,9 @@ def utf16_unit_offset(chars: str):
     Arguments:
         chars (str): The string to count occurrences of utf-16 code units for.
     """
-    return sum(ord(ch) > 0xFFFF for ch in chars)
+    if RE_ASTRAL_CHAR.search(chars) is None:
+        return 0
+    return len(RE_ASTRAL_CHAR.findall(chars))
 
 
 def utf16_num_units(chars: str):
@@ -158,7 +167,21 @@ def range_to_utf16(lines: List[str], range: Range) -> Range:
     )
 
 
+def _ends_with_line_break(text: str) -> bool:
+    return text[-1:] in LINE_BREAKS and text != ''
+
+
 class Document(object):
+    """A text document.
+
+    The text is kept as a list of lines (as given by `str.splitlines(True)`)
+    which is updated in place by incremental changes (only the lines touched
+    by the change are split again), so, the full source is only joined when
+    requested and the offset of each line is only recomputed from the first
+    changed line onwards.
+
+    A document created without a source is read from the disk on each access.
+    """
 
     def __init__(self, uri, source=None, version=None, local=True,
                  sync_kind=TextDocumentSyncKind.INCREMENTAL):
@@ -168,7 +191,15 @@ class Document(object):
         self.filename = os.path.basename(self.path)
 
         self._local = local
+
+        # At least one of `_source` and `_lines` is set if the text is in
+        # memory (the other one is computed from it when needed).
         self._source = source
+        self._lines: Optional[List[str]] = None
+
+        # The offset at which each line starts (only valid for the first lines
+        # after a change: it's extended as needed in `_line_offset`).
+        self._line_offsets = [0]
 
         self._is_sync_kind_full = sync_kind == TextDocumentSyncKind.FULL
         self._is_sync_kind_incremental = sync_kind == TextDocumentSyncKind.INCREMENTAL
@@ -179,44 +210,61 @@ class Document(object):
 
     def _apply_incremental_change(self, change: TextDocumentContentChangeEvent) -> None:
         """Apply an INCREMENTAL text change to the document"""
-        lines = self.lines
+        lines = self._get_lines()
+        if self._lines is None:
+            # Read from the disk: keep the changed contents in memory.
+            self._lines = lines
+            self._source = None
         text = change.text
         change_range = change.range
 
         (start_line, start_col), (end_line, end_col) = \
             range_from_utf16(lines, change_range)  # type: ignore
 
-        # Check for an edit occurring at the very end of the file
-        if start_line == len(lines):
-            self._source = self.source + text
-            return
-
-        new = io.StringIO()
-
-        # Iterate over the existing document until we hit the edit range,
-        # at which point we write the new text, then loop until we hit
-        # the end of the range and continue writing.
-        for i, line in enumerate(lines):
-            if i < start_line:
-                new.write(line)
-                continue
-
-            if i > end_line:
-                new.write(line)
-                continue
-
-            if i == start_line:
-                new.write(line[:start_col])
-                new.write(text)
-
-            if i == end_line:
-                new.write(line[end_col:])
-
-        self._source = new.getvalue()
+        num_lines = len(lines)
+        if start_line >= num_lines:
+            # An edit occurring at the very end of the file
+            start = end = num_lines
+            new_text = text
+        else:
+            start = start_line
+            new_text = lines[start_line][:start_col] + text
+            if end_line >= num_lines:
+                end = num_lines
+            else:
+                end = max(end_line, start_line) + 1
+                new_text += lines[end - 1][end_col:]
+
+        # The lines around the change must be split along with the new text
+        # when they'd be joined to it (i.e.: a line without a line break or a
+        # '\r' followed by a '\n'). Note that adding a line on one side may
+        # change the other side (i.e.: an empty new text extended with a line
+        # starting with '\n'), so, both are checked until nothing changes.
+        while True:
+            if start > 0 and (
+                not _ends_with_line_break(lines[start - 1])
+                or (lines[start - 1].endswith('\r') and new_text.startswith('\n'))
+            ):
+                start -= 1
+                new_text = lines[start] + new_text
+            elif end < num_lines and (
+                not _ends_with_line_break(new_text)
+                or (new_text.endswith('\r') and lines[end].startswith('\n'))
+            ):
+                new_text += lines[end]
+                end += 1
+            else:
+                break
+
+        lines[start:end] = new_text.splitlines(True)
+        self._source = None
+        del self._line_offsets[start + 1:]
 
     def _apply_full_change(self, change: TextDocumentContentChangeEvent) -> None:
         """Apply a FULL text change to the document."""
         self._source = change.text
+        self._lines = None
+        del self._line_offsets[1:]
 
     def _apply_none_change(self, change: TextDocumentContentChangeEvent) -> None:
         """Apply a NONE text change to the document
@@ -259,19 +307,47 @@ class Document(object):
         else:
             self._apply_full_change(change)
 
+    def _get_lines(self) -> List[str]:
+        """Return the lines of the document (not a copy when in memory)."""
+        if self._lines is not None:
+            return self._lines
+
+        if self._source is None:
+            return self.source.splitlines(True)
+
+        self._lines = self._source.splitlines(True)
+        return self._lines
+
+    def _line_offset(self, row: int) -> int:
+        """Return the offset at which the given line starts."""
+        lines = self._get_lines()
+        if self._lines is None:
+            return sum(len(line) for line in lines[:row])
+
+        line_offsets = self._line_offsets
+        if row >= len(line_offsets):
+            offset = line_offsets[-1]
+            for line in islice(lines, len(line_offsets) - 1, row):
+                offset += len(line)
+                line_offsets.append(offset)
+        return line_offsets[row]
+
     @property
     def lines(self) -> List[str]:
-        return self.source.splitlines(True)
+        return list(self._get_lines())
 
     def offset_at_position(self, position: Position) -> int:
         """Return the character offset pointed at by the given position."""
-        lines = self.lines
-        row, col = position_from_utf16(lines, position)
-        return col + sum(len(line) for line in lines[:row])
+        row, col = position_from_utf16(self._get_lines(), position)
+        return col + self._line_offset(row)
 
     @property
     def source(self) -> str:
         if self._source is None:
+            if self._lines is not None:
+                self._source = ''.join(self._lines)
+                return self._source
+
             with io.open(self.path, 'r', encoding='utf-8') as f:
                 return f.read()
         return self._source
@@ -280,7 +356,7 @@ class Document(object):
         """
         Get the word under the cursor returning the start and end positions.
         """
-        lines = self.lines
+        lines = self._get_lines()
         if position.line >= len(lines):
             return ''
 
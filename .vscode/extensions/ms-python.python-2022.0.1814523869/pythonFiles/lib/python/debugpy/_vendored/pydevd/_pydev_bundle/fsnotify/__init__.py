@@ -36,11 +36,19 @@ Sample usage to track changes in a thread.
 
 
 Note: changes are only reported for files (added/modified/deleted), not directories.
+
+Note: on Linux inotify is used to be notified of changes (after the initial scan) instead
+of polling (set `Watcher.use_inotify = False` to always poll).
 '''
+import errno
 import threading
 import sys
+import os
+import select
+from collections import OrderedDict
 from os.path import basename
 from _pydev_bundle import pydev_log
+from . import inotify_ctypes
 try:
     from os import scandir
 except:
@@ -75,7 +83,7 @@ class _SingleVisitInfo(object):
 
     def __init__(self):
         self.count = 0
-        self.visited_dirs = set()
+        self.visited_dirs = {}  # dir path -> recursion level
         self.file_to_mtime = {}
         self.last_sleep_time = time.time()
 
@@ -125,7 +133,7 @@ class _PathWatcher(object):
         # This is the actual poll loop
         if dir_path in single_visit_info.visited_dirs or level > self._max_recursion_level:
             return
-        single_visit_info.visited_dirs.add(dir_path)
+        single_visit_info.visited_dirs[dir_path] = level
         try:
             if isinstance(dir_path, bytes):
                 try:
@@ -174,6 +182,247 @@ class _PathWatcher(object):
         self._check_dir(self._root_path, single_visit_info, append_change, old_file_to_mtime, 0)
 
 
+def _add_change(pending, change_enum, path):
+    '''
+    Coalesces the changes for the same path received in a single batch.
+    '''
+    old_change_enum = pending.get(path)
+    if old_change_enum is None:
+        pending[path] = change_enum
+
+    elif change_enum == Change.deleted:
+        if old_change_enum == Change.added:
+            del pending[path]  # Added and removed: nothing to report.
+        else:
+            pending[path] = Change.deleted
+
+    elif old_change_enum == Change.deleted:
+        pending[path] = Change.modified  # Removed and added back.
+
+    # Otherwise, keep the old one (i.e.: added and modified is still added).
+
+
+class _InotifyTracker(object):
+    '''
+    Helper to be notified by inotify of the changes in the directories found in the
+    initial scan (so, the files don't need to be polled afterwards).
+    '''
+
+    def __init__(self, watcher):
+        self._watcher = watcher
+        # Note: directories reached through symlinks share the watch descriptor of their target.
+        self._wd_to_dirs = {}
+        self._dir_to_wd = {}
+        self._inotify = inotify_ctypes.Inotify()
+        self._wake_read_fd, self._wake_write_fd = os.pipe()
+
+    def track(self, single_visit_info):
+        '''
+        Directories which can't be watched are skipped (and logged).
+
+        :raise OSError:
+            If the limit of watches was reached (in which case the caller should fall back to
+            polling).
+        '''
+        self._single_visit_info = single_visit_info
+        for dir_path in list(single_visit_info.visited_dirs):
+            self._try_add_watch(dir_path, raise_on_limit=True)
+
+    def _add_watch(self, dir_path):
+        wd = self._inotify.add_watch(dir_path)
+        dir_paths = self._wd_to_dirs.setdefault(wd, [])
+        if dir_path not in dir_paths:
+            dir_paths.append(dir_path)
+        self._dir_to_wd[dir_path] = wd
+
+    def _try_add_watch(self, dir_path, raise_on_limit=False):
+        '''
+        :return bool:
+            Whether the directory is being watched.
+        '''
+        try:
+            self._add_watch(dir_path)
+        except Exception as e:
+            if raise_on_limit and getattr(e, 'errno', None) in (errno.ENOSPC, errno.ENOMEM):
+                raise
+            pydev_log.debug('Unable to track changes in %s with inotify: %s', dir_path, e)
+            return False
+        return True
+
+    def _remove_watch(self, dir_path):
+        wd = self._dir_to_wd.pop(dir_path, None)
+        if wd is None:
+            return
+        dir_paths = self._wd_to_dirs[wd]
+        dir_paths.remove(dir_path)
+        if not dir_paths:
+            # Only remove the watch when no other path points to the directory.
+            del self._wd_to_dirs[wd]
+            self._inotify.rm_watch(wd)
+
+    def _remove_dir(self, dir_path, pending):
+        # Forget the given directory (and anything inside it).
+        single_visit_info = self._single_visit_info
+        prefix = os.path.join(dir_path, '')
+        for visited_dir in list(single_visit_info.visited_dirs):
+            if visited_dir == dir_path or visited_dir.startswith(prefix):
+                del single_visit_info.visited_dirs[visited_dir]
+                self._remove_watch(visited_dir)
+
+        file_to_mtime = single_visit_info.file_to_mtime
+        for path in [path for path in file_to_mtime if path.startswith(prefix)]:
+            del file_to_mtime[path]
+            _add_change(pending, Change.deleted, path)
+
+    def _add_dir(self, dir_path, level, pending):
+        # A new directory: watch it before scanning so that nothing is lost in between.
+        watcher = self._watcher
+        single_visit_info = self._single_visit_info
+        if dir_path in single_visit_info.visited_dirs or level > watcher.max_recursion_level:
+            return
+        if not self._try_add_watch(dir_path):
+            return  # Removed in the meanwhile (or the limit of watches was reached).
+        single_visit_info.visited_dirs[dir_path] = level
+
+        try:
+            for entry in scandir(dir_path):
+                if entry.is_dir():
+                    if watcher.accept_directory(entry.path):
+                        self._add_dir(entry.path, level + 1, pending)
+                else:
+                    self._on_file_changed(entry.path, pending)
+        except OSError:
+            pass  # Directory was removed in the meanwhile.
+
+    def _on_file_changed(self, path, pending):
+        if not self._watcher.accept_file(path):
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return  # Removed in the meanwhile (we'll get an event for it).
+
+        mtime = (stat.st_mtime_ns, stat.st_size)
+        file_to_mtime = self._single_visit_info.file_to_mtime
+        old_mtime = file_to_mtime.get(path)
+        file_to_mtime[path] = mtime
+        if not old_mtime:
+            _add_change(pending, Change.added, path)
+        elif old_mtime != mtime:
+            _add_change(pending, Change.modified, path)
+
+    def _resync(self, pending):
+        # Events were lost: do a full scan as the poller would do.
+        watcher = self._watcher
+        old_visit_info = self._single_visit_info
+        old_file_to_mtime = old_visit_info.file_to_mtime
+        changes = []
+
+        single_visit_info = _SingleVisitInfo()
+        for path_watcher in watcher._path_watchers:
+            path_watcher._check(single_visit_info, changes.append, old_file_to_mtime)
+        for path in old_file_to_mtime:
+            changes.append((Change.deleted, path))
+
+        for dir_path in list(self._dir_to_wd):
+            if dir_path not in single_visit_info.visited_dirs:
+                self._remove_watch(dir_path)
+
+        for dir_path in single_visit_info.visited_dirs:
+            if dir_path not in self._dir_to_wd:
+                self._try_add_watch(dir_path)
+
+        self._single_visit_info = watcher._single_visit_info = single_visit_info
+        for change_enum, path in changes:
+            _add_change(pending, change_enum, path)
+
+    def wake(self):
+        try:
+            os.write(self._wake_write_fd, b'x')
+        except OSError:
+            pass
+
+    def wait_for_changes(self, disposed):
+        '''
+        Blocks until some change is available (or `disposed` is set).
+
+        :rtype: list(tuple(Change, str))
+        '''
+        inotify_fd = self._inotify.fileno()
+        while not disposed.is_set():
+            try:
+                readable = select.select([inotify_fd, self._wake_read_fd], [], [])[0]
+            except (OSError, select.error):
+                continue  # EINTR
+
+            if self._wake_read_fd in readable:
+                os.read(self._wake_read_fd, 1024)
+            if inotify_fd not in readable:
+                continue
+
+            # Wait a bit so that the events related to a single save are all handled together.
+            disposed.wait(self._watcher.inotify_coalesce_time)
+
+            pending = OrderedDict()
+            overflow = False
+            for wd, mask, _cookie, name in self._inotify.read_events():
+                if mask & inotify_ctypes.IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+
+                dir_paths = self._wd_to_dirs.get(wd)
+                if not dir_paths:
+                    continue
+
+                if mask & inotify_ctypes.IN_IGNORED:
+                    # The kernel removed the watch (i.e.: the directory was removed).
+                    del self._wd_to_dirs[wd]
+                    for dir_path in dir_paths:
+                        del self._dir_to_wd[dir_path]
+                    continue
+
+                for dir_path in list(dir_paths):
+                    self._on_event(dir_path, mask, name, pending)
+
+            if overflow:
+                self._resync(pending)
+
+            if pending:
+                return [(change_enum, path) for path, change_enum in pending.items()]
+
+        return []
+
+    def _on_event(self, dir_path, mask, name, pending):
+        if mask & (inotify_ctypes.IN_DELETE_SELF | inotify_ctypes.IN_MOVE_SELF):
+            self._remove_dir(dir_path, pending)
+            return
+
+        path = os.path.join(dir_path, name)
+        if mask & inotify_ctypes.IN_ISDIR:
+            if mask & (inotify_ctypes.IN_CREATE | inotify_ctypes.IN_MOVED_TO):
+                if self._watcher.accept_directory(path):
+                    level = self._single_visit_info.visited_dirs.get(dir_path, 0) + 1
+                    self._add_dir(path, level, pending)
+
+            elif mask & (inotify_ctypes.IN_DELETE | inotify_ctypes.IN_MOVED_FROM):
+                self._remove_dir(path, pending)
+
+        elif mask & (inotify_ctypes.IN_DELETE | inotify_ctypes.IN_MOVED_FROM):
+            if self._single_visit_info.file_to_mtime.pop(path, None) is not None:
+                _add_change(pending, Change.deleted, path)
+
+        else:
+            self._on_file_changed(path, pending)
+
+    def close(self):
+        self._inotify.close()
+        for fd in (self._wake_read_fd, self._wake_write_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
 class Watcher(object):
 
     # By default (if accept_directory is not specified), these will be the
@@ -202,6 +451,13 @@ class Watcher(object):
     # This is the maximum recursion level.
     max_recursion_level = 10
 
+    # Set to False to always poll (otherwise inotify is used when available -- i.e.: on Linux).
+    use_inotify = True
+
+    # When using inotify, the time to wait after an event is received to collect the
+    # other related events (so that a single save is reported as a single change).
+    inotify_coalesce_time = 0.05
+
     def __init__(self, accept_directory=None, accept_file=None):
         '''
         :param Callable[str, bool] accept_directory:
@@ -214,6 +470,7 @@ class Watcher(object):
         '''
         self._path_watchers = set()
         self._disposed = threading.Event()
+        self._inotify_tracker = None
 
         if accept_directory is None:
             accept_directory = lambda dir_path: basename(dir_path) not in self.ignored_dirs
@@ -246,6 +503,9 @@ class Watcher(object):
 
     def dispose(self):
         self._disposed.set()
+        inotify_tracker = self._inotify_tracker
+        if inotify_tracker is not None:
+            inotify_tracker.wake()
 
     @property
     def path_watchers(self):
@@ -288,6 +548,22 @@ class Watcher(object):
         pydev_log.debug('Files found: %s', len(self._single_visit_info.file_to_mtime))
         self._path_watchers = path_watchers
 
+        if self._inotify_tracker is not None:
+            self._inotify_tracker.close()
+            self._inotify_tracker = None
+
+        if self.use_inotify and inotify_ctypes.is_inotify_available():
+            inotify_tracker = None
+            try:
+                inotify_tracker = _InotifyTracker(self)
+                inotify_tracker.track(self._single_visit_info)
+            except Exception as e:
+                pydev_log.info('Unable to track changes with inotify (falling back to polling): %s', e)
+                if inotify_tracker is not None:
+                    inotify_tracker.close()
+            else:
+                self._inotify_tracker = inotify_tracker
+
     def iter_changes(self):
         '''
         Continuously provides changes (until dispose() is called).
@@ -296,6 +572,17 @@ class Watcher(object):
 
         :rtype: Iterable[Tuple[Change, str]]
         '''
+        inotify_tracker = self._inotify_tracker
+        if inotify_tracker is not None:
+            try:
+                while not self._disposed.is_set():
+                    for change in inotify_tracker.wait_for_changes(self._disposed):
+                        yield change
+            finally:
+                if self._disposed.is_set():
+                    inotify_tracker.close()
+            return
+
         while not self._disposed.is_set():
             initial_time = time.time()
 
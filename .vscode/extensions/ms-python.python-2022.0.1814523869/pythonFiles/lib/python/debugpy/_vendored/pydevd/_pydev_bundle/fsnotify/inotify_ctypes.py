@@ -0,0 +1,160 @@
+'''
+Minimal access to the Linux inotify API through ctypes.
+
+Note: only the bits needed by the fsnotify.Watcher are provided.
+'''
+import errno
+import os
+import struct
+import sys
+
+IN_ACCESS = 0x00000001
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+# The events needed to track files in a directory.
+# Note: symlinks are followed (as the initial scan also follows symlinked directories).
+WATCH_DIR_MASK = (
+    IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+    IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+
+# struct inotify_event {int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[];}
+_EVENT_HEADER = struct.Struct('iIII')
+
+_libc = None
+
+try:
+    _fsencode = os.fsencode
+except AttributeError:  # Python 2
+
+    def _fsencode(path):
+        return path.encode(sys.getfilesystemencoding())
+
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            libc = ctypes.CDLL('libc.so.6', use_errno=True)
+
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_init1.restype = ctypes.c_int
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_add_watch.restype = ctypes.c_int
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        libc.inotify_rm_watch.restype = ctypes.c_int
+        _libc = libc
+    return _libc
+
+
+def is_inotify_available():
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        _get_libc()
+    except Exception:
+        return False
+    return True
+
+
+def _raise_errno(msg):
+    import ctypes
+    err = ctypes.get_errno()
+    raise OSError(err, '%s: %s' % (msg, os.strerror(err)))
+
+
+class Inotify(object):
+    '''
+    Wraps an inotify file descriptor (non-blocking, so, callers should use select()
+    on `fileno()` to wait for events).
+    '''
+
+    def __init__(self):
+        self._libc = _get_libc()
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            _raise_errno('inotify_init1 failed')
+
+    def fileno(self):
+        return self._fd
+
+    def add_watch(self, path, mask=WATCH_DIR_MASK):
+        '''
+        :return int:
+            The watch descriptor for the path (note that the same watch descriptor is returned
+            for paths which point to the same directory -- i.e.: through symlinks).
+
+        :raise OSError:
+            If it wasn't possible to add the watch (i.e.: ENOSPC if the limit of watches
+            was reached or ENOENT if the path no longer exists).
+        '''
+        if not isinstance(path, bytes):
+            path = _fsencode(path)
+        wd = self._libc.inotify_add_watch(self._fd, path, mask)
+        if wd < 0:
+            _raise_errno('inotify_add_watch failed for %r' % (path,))
+        return wd
+
+    def rm_watch(self, wd):
+        # Errors are ignored (the watch may have been removed by the kernel already).
+        self._libc.inotify_rm_watch(self._fd, wd)
+
+    def read_events(self):
+        '''
+        :return list(tuple(wd:int, mask:int, cookie:int, name:str)):
+            The events currently available (an empty list if there are none).
+        '''
+        chunks = []
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                    break
+                raise
+            if not data:
+                break
+            chunks.append(data)
+
+        events = []
+        data = b''.join(chunks)
+        header_size = _EVENT_HEADER.size
+        i = 0
+        while i + header_size <= len(data):
+            wd, mask, cookie, name_len = _EVENT_HEADER.unpack_from(data, i)
+            i += header_size
+            name = data[i:i + name_len].rstrip(b'\0')
+            i += name_len
+            if not isinstance(name, str):
+                name = name.decode(sys.getfilesystemencoding(), 'surrogateescape')
+            events.append((wd, mask, cookie, name))
+        return events
+
+    def close(self):
+        fd = self._fd
+        if fd >= 0:
+            self._fd = -1
+            try:
+                os.close(fd)
+            except OSError:
+                pass
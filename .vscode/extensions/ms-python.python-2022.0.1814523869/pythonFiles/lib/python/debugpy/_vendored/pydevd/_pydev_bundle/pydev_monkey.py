@@ -7,7 +7,7 @@ from _pydevd_bundle.pydevd_constants import get_global_debugger, IS_WINDOWS, IS_
     sorted_dict_repr, IS_PY2
 from _pydev_bundle import pydev_log
 from contextlib import contextmanager
-from _pydevd_bundle import pydevd_constants
+from _pydevd_bundle import pydevd_constants, pydevd_deferred_attach
 from _pydevd_bundle.pydevd_defaults import PydevdCustomization
 import ast
 
@@ -181,13 +181,22 @@ def _get_python_c_args(host, port, code, args, setup):
         # imports from the code and add them to the start of our code snippet.
         future_imports, code = _separate_future_imports(code)
 
-    return ("%simport sys; sys.path.insert(0, r'%s'); import pydevd; pydevd.PydevdCustomization.DEFAULT_PROTOCOL=%r; "
-            "pydevd.settrace(host=%r, port=%s, suspend=False, trace_only_current_thread=False, patch_multiprocessing=True, access_token=%r, client_access_token=%r, __setup_holder__=%s); "
+    deferred_attach_info = pydevd_deferred_attach.get_deferred_attach_info(get_global_debugger())
+    if deferred_attach_info is not None:
+        # i.e.: pydevd is only imported when the debugger is actually attached.
+        settrace_call = "from _pydevd_bundle.pydevd_deferred_attach import settrace_deferred; settrace_deferred(%r, %r, " % (
+            deferred_attach_info, pydevd_constants.get_protocol())
+    else:
+        settrace_call = "import pydevd; pydevd.PydevdCustomization.DEFAULT_PROTOCOL=%r; pydevd.settrace(" % (
+            pydevd_constants.get_protocol(),)
+
+    return ("%simport sys; sys.path.insert(0, r'%s'); "
+            "%shost=%r, port=%s, suspend=False, trace_only_current_thread=False, patch_multiprocessing=True, access_token=%r, client_access_token=%r, __setup_holder__=%s); "
             "%s"
             ) % (
                future_imports,
                pydev_src_dir,
-               pydevd_constants.get_protocol(),
+               settrace_call,
                host,
                port,
                setup.get('access-token'),
@@ -213,9 +222,20 @@ def _on_forked_process(setup_tracing=True):
     pydevd_constants.after_fork()
     pydev_log.initialize_debug_stream(reinitialize=True)
 
+    # Note: only needed if the concurrency events are being recorded (and in Python 3.7
+    # onwards it's already done through os.register_at_fork).
+    concurrency_logger = sys.modules.get('pydevd_concurrency_analyser.pydevd_concurrency_logger')
+    if concurrency_logger is not None:
+        concurrency_logger.after_fork()
+
     if setup_tracing:
         pydev_log.debug('pydevd on forked process: %s', os.getpid())
 
+        if pydevd_deferred_attach.on_forked_process():
+            # i.e.: The parent is still waiting for a deferred attach (so, this one waits
+            # too, without even importing pydevd).
+            return
+
     import pydevd
     pydevd.threadingCurrentThread().__pydevd_main_thread = True
     pydevd.settrace_forked(setup_tracing=setup_tracing)
@@ -217,9 +217,9 @@ def update_class_to_generate_type(classes_to_generate, class_to_generate):
 
 
 def update_class_to_generate_register_dec(classes_to_generate, class_to_generate):
-    # Default
-    class_to_generate['register_request'] = ''
-    class_to_generate['register_dec'] = '@register'
+    # Default (all the classes are registered by name, messages are also registered
+    # by their command/event).
+    class_to_generate['register_key'] = None
 
     properties = class_to_generate.get('properties')
     enum_type = properties.get('type', {}).get('enum')
@@ -251,7 +251,7 @@ def update_class_to_generate_register_dec(classes_to_generate, class_to_generate
         if command:
             enum = command.get('enum')
             if enum and len(enum) == 1:
-                class_to_generate['register_request'] = '@register_%s(%r)\n' % (msg_type, enum[0])
+                class_to_generate['register_key'] = (msg_type, enum[0])
 
 
 def extract_prop_name_and_prop(class_to_generate):
@@ -541,7 +541,6 @@ def gen_debugger_protocol():
         update_class_to_generate_register_dec(classes_to_generate, class_to_generate)
 
     class_template = '''
-%(register_request)s%(register_dec)s
 class %(name)s(BaseSchema):
     """
 %(description)s
@@ -564,10 +563,44 @@ class %(name)s(BaseSchema):
     contents.append('# Automatically generated code.')
     contents.append('# Do not edit manually.')
     contents.append('# Generated by running: %s' % os.path.basename(__file__))
-    contents.append('from .pydevd_base_schema import BaseSchema, register, register_request, register_response, register_event')
+    contents.append('from .pydevd_base_schema import BaseSchema, install_lazy_schema_classes')
     contents.append('')
+
+    # Each class is created by a function which is only called when the class is first
+    # used (see: pydevd_base_schema.install_lazy_schema_classes).
+    class_name_to_dependencies = {}
+    message_class_names = {'request': {}, 'response': {}, 'event': {}}
     for class_to_generate in classes_to_generate.values():
-        contents.append(class_template % class_to_generate)
+        name = class_to_generate['name']
+        class_code = class_template % class_to_generate
+        class_name_to_dependencies[name] = _compute_class_dependencies(name, class_code, classes_to_generate)
+        if class_to_generate['register_key'] is not None:
+            msg_type, key = class_to_generate['register_key']
+            message_class_names[msg_type][key] = name
+
+        contents.append('')
+        contents.append('def _create_%s():' % (name,))
+        contents.append(_indent_lines(class_code, skip_empty_lines=True).rstrip())
+        contents.append('')
+        contents.append('    return %s' % (name,))
+        contents.append('')
+
+    contents.append('')
+    contents.append('_class_creators = {')
+    for name, dependencies in class_name_to_dependencies.items():
+        contents.append('    %r: (_create_%s, %r),' % (name, name, dependencies))
+    contents.append('}')
+    contents.append('')
+    contents.append('_message_class_names = {')
+    for msg_type, key_to_class_name in message_class_names.items():
+        contents.append('    %r: {' % (msg_type,))
+        for key, name in key_to_class_name.items():
+            contents.append('        %r: %r,' % (key, name))
+        contents.append('    },')
+    contents.append('}')
+    contents.append('')
+    contents.append('install_lazy_schema_classes(globals(), _class_creators, _message_class_names)')
+    contents.append('')
 
     parent_dir = os.path.dirname(__file__)
     schema = os.path.join(parent_dir, 'pydevd_schema.py')
@@ -575,14 +608,33 @@ class %(name)s(BaseSchema):
         stream.write('\n'.join(contents))
 
 
-def _indent_lines(lines, indent='    '):
+def _indent_lines(lines, indent='    ', skip_empty_lines=False):
     out_lines = []
     for line in lines.splitlines(keepends=True):
-        out_lines.append(indent + line)
+        if not skip_empty_lines or line.strip():
+            line = indent + line
+        out_lines.append(line)
 
     return ''.join(out_lines)
 
 
+def _compute_class_dependencies(name, class_code, classes_to_generate):
+    '''
+    :return tuple(str):
+        The names of the other generated classes referenced in the code of the given
+        class (strings, such as docstrings or descriptions, are not considered).
+    '''
+    import re
+    class_code = re.sub(r'"""[\s\S]*?"""', '', class_code)
+    class_code = re.sub(r'"(?:[^"\\\n]|\\.)*"', '', class_code)
+    class_code = re.sub(r"'(?:[^'\\\n]|\\.)*'", '', class_code)
+    dependencies = []
+    for identifier in re.findall(r'\b[A-Za-z_]\w*\b', class_code):
+        if identifier != name and identifier in classes_to_generate and identifier not in dependencies:
+            dependencies.append(identifier)
+    return tuple(dependencies)
+
+
 if __name__ == '__main__':
 
     gen_debugger_protocol()
@@ -1,6 +1,8 @@
 from _pydevd_bundle._debug_adapter.pydevd_schema_log import debug_exception
+from _pydev_imps._pydev_saved_modules import threading
 import json
 import itertools
+import sys
 from functools import partial
 
 
@@ -85,6 +87,149 @@ def register_event(event):
     return do_register
 
 
+class _LazySchemaClasses(object):
+    '''
+    The generated schema has hundreds of classes but a session usually only uses a few
+    of them, so, each class is only created (and registered) when it's first needed.
+
+    Creating a class also creates the classes it references (so that a class is only
+    visible after all the classes needed by its methods are available).
+    '''
+
+    def __init__(self, namespace, class_creators, message_class_names):
+        '''
+        :param dict namespace:
+            The globals() of the generated module.
+
+        :param dict(str:tuple(callable,tuple(str))) class_creators:
+            Maps a class name to the function which creates it and the names of the
+            classes it references.
+
+        :param dict(str:dict(str:str)) message_class_names:
+            Maps 'request', 'response' and 'event' to a dict with the command/event
+            handled by each class name.
+        '''
+        self._namespace = namespace
+        self._class_creators = class_creators
+        self._lock = threading.RLock()
+
+        self._registry_to_class_names = {}
+        self._class_name_to_registry_key = {}
+        for msg_type, registry in (
+                ('request', _requests_to_types),
+                ('response', _responses_to_types),
+                ('event', _event_to_types),
+            ):
+            key_to_class_name = message_class_names.get(msg_type, {})
+            self._registry_to_class_names[id(registry)] = key_to_class_name
+            for key, class_name in key_to_class_name.items():
+                self._class_name_to_registry_key[class_name] = (registry, key)
+
+    def get_class(self, name):
+        cls = self._namespace.get(name)
+        if cls is None:
+            if name not in self._class_creators:
+                raise AttributeError('module %r has no attribute %r' % (self._namespace.get('__name__'), name))
+            with self._lock:
+                cls = self._namespace.get(name)
+                if cls is None:
+                    self._create_classes(name)
+                    cls = self._namespace[name]
+        return cls
+
+    def get_message_class(self, registry, key):
+        '''
+        :return type|None:
+            The class registered for the given key in the given registry (i.e.:
+            `_requests_to_types`) or None if there's no class for it.
+        '''
+        cls = registry.get(key)
+        if cls is None:
+            class_name = self._registry_to_class_names[id(registry)].get(key)
+            if class_name is not None:
+                self.get_class(class_name)
+                cls = registry.get(key)
+        return cls
+
+    def get_message_keys(self, registry):
+        return set(registry.keys()).union(self._registry_to_class_names[id(registry)].keys())
+
+    def create_all(self):
+        with self._lock:
+            for name in self._class_creators:
+                if name not in self._namespace:
+                    self._create_classes(name)
+
+    def get_module_attribute_names(self):
+        return sorted(set(self._namespace.keys()).union(self._class_creators.keys()))
+
+    def _create_classes(self, name):
+        # Note: the lock must be held.
+        namespace = self._namespace
+        created = {}
+        pending = [name]
+        while pending:
+            name = pending.pop()
+            if name in created or name in namespace:
+                continue
+            create, dependencies = self._class_creators[name]
+            cls = create()
+            # The class is created in a function (fix the qualname to be the same as
+            # the one for a class defined at the module level).
+            cls.__qualname__ = name
+            created[name] = cls
+            pending.extend(dependencies)
+
+        # Only make the classes available after all the needed classes are created
+        # (and in the registries only after they're in the module).
+        namespace.update(created)
+        for name, cls in created.items():
+            register(cls)
+            registry_key = self._class_name_to_registry_key.get(name)
+            if registry_key is not None:
+                registry, key = registry_key
+                registry[key] = cls
+
+
+_lazy_schema_classes = None
+
+
+def install_lazy_schema_classes(namespace, class_creators, message_class_names):
+    '''
+    Called by the generated schema module so that its classes are only created when
+    first accessed (through the module `__getattr__`, so, in Python 3.7 onwards -- in
+    older versions all the classes are created right away).
+    '''
+    global _lazy_schema_classes
+    lazy_schema_classes = _LazySchemaClasses(namespace, class_creators, message_class_names)
+    _lazy_schema_classes = lazy_schema_classes
+
+    if sys.version_info[:2] >= (3, 7):
+        namespace['__getattr__'] = lazy_schema_classes.get_class
+        namespace['__dir__'] = lazy_schema_classes.get_module_attribute_names
+    else:
+        lazy_schema_classes.create_all()
+
+
+def _get_message_class(registry, key):
+    if _lazy_schema_classes is None:
+        return registry.get(key)
+    return _lazy_schema_classes.get_message_class(registry, key)
+
+
+def _get_message_keys(registry):
+    if _lazy_schema_classes is None:
+        return set(registry.keys())
+    return _lazy_schema_classes.get_message_keys(registry)
+
+
+def _get_response_class(command):
+    cls = _get_message_class(_responses_to_types, command)
+    if cls is None:
+        raise KeyError(command)
+    return cls
+
+
 def from_dict(dct, update_ids_from_dap=False):
     msg_type = dct.get('type')
     if msg_type is None:
@@ -102,9 +247,9 @@ def from_dict(dct, update_ids_from_dap=False):
         to_type = _event_to_types
         use = dct['event']
 
-    cls = to_type.get(use)
+    cls = _get_message_class(to_type, use)
     if cls is None:
-        raise ValueError('Unable to create message from dict: %s. %s not in %s' % (dct, use, sorted(to_type.keys())))
+        raise ValueError('Unable to create message from dict: %s. %s not in %s' % (dct, use, sorted(_get_message_keys(to_type))))
     try:
         return cls(update_ids_from_dap=update_ids_from_dap, **dct)
     except:
@@ -124,7 +269,9 @@ def from_json(json_msg, update_ids_from_dap=False, on_dict_loaded=lambda dct:Non
     except:
         if as_dict.get('type') == 'response' and not as_dict.get('success'):
             # Error messages may not have required body (return as a generic Response).
-            Response = _all_messages['Response']
+            Response = _all_messages.get('Response')
+            if Response is None:
+                Response = _lazy_schema_classes.get_class('Response')
             return Response(**as_dict)
         else:
             raise
@@ -132,8 +279,8 @@ def from_json(json_msg, update_ids_from_dap=False, on_dict_loaded=lambda dct:Non
 
 def get_response_class(request):
     if request.__class__ == dict:
-        return _responses_to_types[request['command']]
-    return _responses_to_types[request.command]
+        return _get_response_class(request['command'])
+    return _get_response_class(request.command)
 
 
 def build_response(request, kwargs=None):
@@ -142,6 +289,6 @@ def build_response(request, kwargs=None):
     else:
         if 'success' not in kwargs:
             kwargs['success'] = True
-    response_class = _responses_to_types[request.command]
+    response_class = _get_response_class(request.command)
     kwargs.setdefault('seq', -1)  # To be overwritten before sending
     return response_class(command=request.command, request_seq=request.seq, **kwargs)
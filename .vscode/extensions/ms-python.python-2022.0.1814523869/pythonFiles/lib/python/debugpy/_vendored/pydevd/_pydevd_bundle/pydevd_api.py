@@ -11,7 +11,7 @@ from _pydevd_bundle.pydevd_comm import (InternalGetThreadStack, internal_get_com
     internal_get_description, internal_get_frame, internal_evaluate_expression, InternalConsoleExec,
     internal_get_variable_json, internal_change_variable, internal_change_variable_json,
     internal_evaluate_expression_json, internal_set_expression_json, internal_get_exception_details_json,
-    internal_step_in_thread, internal_smart_step_into)
+    internal_step_in_thread, internal_smart_step_into, InternalEvaluateWatchesJson)
 from _pydevd_bundle.pydevd_comm_constants import (CMD_THREAD_SUSPEND, file_system_encoding,
     CMD_STEP_INTO_MY_CODE, CMD_STOP_ON_START, CMD_SMART_STEP_INTO)
 from _pydevd_bundle.pydevd_constants import (get_current_thread_id, set_protocol, get_protocol,
@@ -676,6 +676,16 @@ class PyDevdAPI(object):
         py_db.post_method_as_internal_command(
             thread_id, internal_evaluate_expression_json, request, thread_id)
 
+    def request_evaluate_watches_json(self, py_db, request, thread_id):
+        '''
+        :return InternalEvaluateWatchesJson:
+            The command posted to evaluate the request (other watch requests for the same frame
+            may be added to it until it's executed -- see: InternalEvaluateWatchesJson.add_request).
+        '''
+        internal_cmd = InternalEvaluateWatchesJson(thread_id, request)
+        py_db.post_internal_command(internal_cmd, thread_id)
+        return internal_cmd
+
     def request_set_expression_json(self, py_db, request, thread_id):
         py_db.post_method_as_internal_command(
             thread_id, internal_set_expression_json, request, thread_id)
@@ -4,8 +4,108 @@ from _pydevd_bundle import pydevd_import_class
 from _pydevd_bundle.pydevd_frame_utils import add_exception_to_frame
 from _pydev_imps._pydev_saved_modules import threading
 
+# Name used in place of `@HIT@` so that the hit condition can be compiled only once.
+_HIT_COUNT_VAR_NAME = '__pydevd_hit_count__'
+
+
+def _compile_eval(source):
+    '''
+    :return code|None:
+        The code object to evaluate the given source or None if it's empty or can't be compiled
+        (in which case the source itself is evaluated when the breakpoint is hit so that the
+        error is reported to the user just as before).
+    '''
+    if not source:
+        return None
+    try:
+        # Note: use the same filename `eval(source)` would use.
+        return compile(source, '<string>', 'eval')
+    except Exception:
+        return None
+
+
+class _HitCountLocals(object):
+    '''
+    Mapping used as the locals to evaluate a compiled hit condition (the frame locals are still
+    available to it).
+    '''
+
+    __slots__ = ['f_locals', 'hit_count']
+
+    def __init__(self, f_locals, hit_count):
+        self.f_locals = f_locals
+        self.hit_count = hit_count
+
+    def __getitem__(self, name):
+        if name == _HIT_COUNT_VAR_NAME:
+            return self.hit_count
+        return self.f_locals[name]
+
 
-class ExceptionBreakpoint(object):
+class _BaseBreakpoint(object):
+    '''
+    Keeps the `condition`, `expression` and `hit_condition` of a breakpoint compiled (the compiled
+    code is computed when the attribute is set, so, it's invalidated whenever the breakpoint
+    changes).
+    '''
+
+    _condition = None
+    _expression = None
+    _hit_condition = None
+
+    compiled_condition = None
+    compiled_expression = None
+    compiled_hit_condition = None
+
+    @property
+    def condition(self):
+        return self._condition
+
+    @condition.setter
+    def condition(self, condition):
+        self._condition = condition
+        self.compiled_condition = _compile_eval(condition)
+
+    @property
+    def expression(self):
+        return self._expression
+
+    @expression.setter
+    def expression(self, expression):
+        self._expression = expression
+        self.compiled_expression = _compile_eval(expression)
+
+    @property
+    def hit_condition(self):
+        return self._hit_condition
+
+    @hit_condition.setter
+    def hit_condition(self, hit_condition):
+        self._hit_condition = hit_condition
+        if hit_condition:
+            self.compiled_hit_condition = _compile_eval(hit_condition.replace('@HIT@', _HIT_COUNT_VAR_NAME))
+        else:
+            self.compiled_hit_condition = None
+
+    def handle_hit_condition(self, frame):
+        if not self.hit_condition:
+            return False
+        ret = False
+        with self._hit_condition_lock:
+            self._hit_count += 1
+            try:
+                compiled_hit_condition = self.compiled_hit_condition
+                if compiled_hit_condition is not None:
+                    ret = bool(eval(compiled_hit_condition, frame.f_globals, _HitCountLocals(frame.f_locals, self._hit_count)))
+                else:
+                    expr = self.hit_condition.replace('@HIT@', str(self._hit_count))
+                    ret = bool(eval(expr, frame.f_globals, frame.f_locals))
+            except Exception:
+                ret = False
+        return ret
+
+
+class ExceptionBreakpoint(_BaseBreakpoint):
 
     def __init__(
         self,
@@ -46,7 +146,7 @@ class ExceptionBreakpoint(object):
         return False
 
 
-class LineBreakpoint(object):
+class LineBreakpoint(_BaseBreakpoint):
 
     def __init__(self, line, condition, func_name, expression, suspend_policy="NONE", hit_condition=None, is_logpoint=False):
         self.line = line
@@ -63,21 +163,8 @@ class LineBreakpoint(object):
     def has_condition(self):
         return bool(self.condition) or bool(self.hit_condition)
 
-    def handle_hit_condition(self, frame):
-        if not self.hit_condition:
-            return False
-        ret = False
-        with self._hit_condition_lock:
-            self._hit_count += 1
-            expr = self.hit_condition.replace('@HIT@', str(self._hit_count))
-            try:
-                ret = bool(eval(expr, frame.f_globals, frame.f_locals))
-            except Exception:
-                ret = False
-        return ret
-
 
-class FunctionBreakpoint(object):
+class FunctionBreakpoint(_BaseBreakpoint):
 
     def __init__(self, func_name, condition, expression, suspend_policy="NONE", hit_condition=None, is_logpoint=False):
         self.condition = condition
@@ -93,19 +180,6 @@ class FunctionBreakpoint(object):
     def has_condition(self):
         return bool(self.condition) or bool(self.hit_condition)
 
-    def handle_hit_condition(self, frame):
-        if not self.hit_condition:
-            return False
-        ret = False
-        with self._hit_condition_lock:
-            self._hit_count += 1
-            expr = self.hit_condition.replace('@HIT@', str(self._hit_count))
-            try:
-                ret = bool(eval(expr, frame.f_globals, frame.f_locals))
-            except Exception:
-                ret = False
-        return ret
-
 
 def get_exception_breakpoint(exctype, exceptions):
     if not exctype:
@@ -0,0 +1,321 @@
+'''
+Process-wide cache for the results of analysing code objects (try..except ranges, return
+lines and smart step into targets).
+
+The debugger also keeps those in `global_cache_frame_skips`, but that cache is cleared
+whenever breakpoints or exception breakpoints change, whereas the analysis only depends
+on the code object itself, so, it's kept here (with weak references to the code objects,
+so, the entries go away along with the code).
+
+Optionally (when PYDEVD_BYTECODE_ANALYSIS_CACHE_DIR is set) the try..except and return
+info is also persisted to that directory (a json file per source file, invalidated when
+the mtime/size of the file or the Python version changes), so, a new debug session
+doesn't need to redo the analysis for the same code. A file is written at most once per
+_MIN_WRITE_INTERVAL seconds (pending entries are written at exit).
+'''
+import atexit
+import hashlib
+import json
+import os
+import sys
+import time
+import weakref
+
+from _pydev_bundle import pydev_log
+from _pydev_imps._pydev_saved_modules import threading
+from _pydevd_bundle.pydevd_constants import PYDEVD_BYTECODE_ANALYSIS_CACHE_DIR
+from _pydevd_bundle.pydevd_collect_bytecode_info import TryExceptInfo, ReturnInfo
+
+TRY_EXCEPT_INFO = 'try_except_info'
+RETURN_INFO = 'return_info'
+SMART_STEP_INTO_TARGETS = 'smart_step_into_targets'
+
+_CACHE_VERSION = 1
+
+_MIN_WRITE_INTERVAL = 1.
+
+
+def _dump_try_except_infos(try_except_infos):
+    return [
+        [
+            info.try_line,
+            info.except_line,
+            info.except_end_line,
+            info.raise_lines_in_except,
+            info.except_bytecode_offset,
+            info.except_end_bytecode_offset,
+            info.ignore,
+        ] for info in try_except_infos]
+
+
+def _load_try_except_infos(data):
+    ret = []
+    for (try_line, except_line, except_end_line, raise_lines_in_except,
+            except_bytecode_offset, except_end_bytecode_offset, ignore) in data:
+        info = TryExceptInfo(try_line, ignore)
+        info.except_line = except_line
+        info.except_end_line = except_end_line
+        info.raise_lines_in_except = raise_lines_in_except
+        info.except_bytecode_offset = except_bytecode_offset
+        info.except_end_bytecode_offset = except_end_bytecode_offset
+        ret.append(info)
+    return ret
+
+
+def _dump_return_infos(return_infos):
+    return [info.return_line for info in return_infos]
+
+
+def _load_return_infos(data):
+    return [ReturnInfo(return_line) for return_line in data]
+
+
+# kind -> (dump, load) for the kinds which may be persisted (the smart step into targets
+# are only kept in memory).
+_KIND_TO_SERIALIZATION = {
+    TRY_EXCEPT_INFO: (_dump_try_except_infos, _load_try_except_infos),
+    RETURN_INFO: (_dump_return_infos, _load_return_infos),
+}
+
+
+def _get_stat_key(filename):
+    try:
+        stat = os.stat(filename)
+    except (OSError, ValueError, TypeError):
+        return None
+    return [stat.st_mtime, stat.st_size]
+
+
+def _get_code_key(code):
+    # The same file may have many functions with the same name (and the first line is not
+    # enough if the file changes in the same mtime), so, the bytecode/line table is also
+    # considered.
+    line_table = getattr(code, 'co_linetable', None)
+    if line_table is None:
+        line_table = code.co_lnotab
+
+    h = hashlib.sha1(code.co_code)
+    h.update(line_table)
+    return '%s:%s:%s' % (code.co_name, code.co_firstlineno, h.hexdigest())
+
+
+def _create_remove_callback(code_id_to_results, code_id):
+
+    def remove(ref):
+        # Note: may be called by the garbage collector in any thread (so, the lock isn't
+        # acquired) and the id may have been reused by a new code object in the meanwhile.
+        entry = code_id_to_results.get(code_id)
+        if entry is not None and entry[0] is ref:
+            code_id_to_results.pop(code_id, None)
+
+    return remove
+
+
+class _PersistedFileEntries(object):
+
+    def __init__(self, stat_key, entries):
+        self.stat_key = stat_key
+        self.entries = entries
+        self.dirty = False
+        self.last_write_time = 0
+
+
+class BytecodeAnalysisCache(object):
+
+    def __init__(self, cache_dir=None):
+        '''
+        :param str|None cache_dir:
+            The directory where the analysis is persisted (None or an empty string
+            means it's only kept in memory).
+        '''
+        self._lock = threading.Lock()
+        self._cache_dir = cache_dir or None
+        self._version = '%s-%s' % (_CACHE_VERSION, sys.version)
+
+        # id(code) -> (weak reference to code, {kind: result})
+        # Note: keyed by identity and not by equality because code objects from different
+        # files (or with a different line table) may compare equal in some Python versions.
+        self._code_id_to_results = {}
+
+        # filename -> (stat_key, try_except_infos) (see: get_source_try_except_infos).
+        self._filename_to_source_try_except_infos = {}
+
+        # co_filename -> _PersistedFileEntries
+        self._filename_to_persisted = {}
+
+    def get(self, kind, code, compute):
+        '''
+        :param str kind:
+            One of TRY_EXCEPT_INFO, RETURN_INFO, SMART_STEP_INTO_TARGETS.
+
+        :param code:
+            The code object analysed.
+
+        :param callable(code)->list compute:
+            Used to compute the result if it's not cached yet.
+
+        :note: the result is shared, so, it must not be mutated by the caller.
+        '''
+        with self._lock:
+            entry = self._code_id_to_results.get(id(code))
+            if entry is not None and entry[0]() is code:
+                try:
+                    return entry[1][kind]
+                except KeyError:
+                    pass
+
+        # Note: computed without holding the lock (so, the same result may be computed
+        # concurrently by different threads, in which case the last one wins).
+        result = None
+        serialization = _KIND_TO_SERIALIZATION.get(kind) if self._cache_dir else None
+        if serialization is not None:
+            result = self._load_persisted(kind, code, serialization[1])
+
+        if result is None:
+            result = compute(code)
+            if serialization is not None:
+                self._persist(kind, code, serialization[0](result))
+
+        with self._lock:
+            code_id = id(code)
+            entry = self._code_id_to_results.get(code_id)
+            if entry is None or entry[0]() is not code:
+                try:
+                    entry = (weakref.ref(code, _create_remove_callback(self._code_id_to_results, code_id)), {})
+                except TypeError:
+                    return result  # The code can't be weakly referenced (not cached).
+                self._code_id_to_results[code_id] = entry
+            entry[1][kind] = result
+        return result
+
+    def get_source_try_except_infos(self, filename, compute):
+        '''
+        :param str filename:
+            The source file (which is parsed as a whole).
+
+        :param callable(filename)->list(TryExceptInfo) compute:
+            Used to compute the result if it's not cached yet (or if the file changed).
+        '''
+        stat_key = _get_stat_key(filename)
+        with self._lock:
+            cached = self._filename_to_source_try_except_infos.get(filename)
+            if cached is not None and stat_key is not None and cached[0] == stat_key:
+                return cached[1]
+
+        try_except_infos = compute(filename)
+        if stat_key is not None:
+            with self._lock:
+                self._filename_to_source_try_except_infos[filename] = (stat_key, try_except_infos)
+        return try_except_infos
+
+    def flush(self):
+        '''
+        Writes the persisted entries which are still pending.
+        '''
+        with self._lock:
+            for co_filename, persisted in list(self._filename_to_persisted.items()):
+                if persisted.dirty:
+                    self._write_persisted(co_filename, persisted)
+
+    def clear(self):
+        with self._lock:
+            self._code_id_to_results.clear()
+            self._filename_to_source_try_except_infos.clear()
+            self._filename_to_persisted.clear()
+
+    def _get_persisted_path(self, co_filename):
+        key = '%s\0%s' % (self._version, co_filename)
+        if not isinstance(key, bytes):
+            key = key.encode('utf-8', 'replace')
+        h = hashlib.sha1(key)
+        return os.path.join(self._cache_dir, h.hexdigest() + '.json')
+
+    def _get_persisted_file_entries(self, co_filename):
+        # Note: the lock must be held.
+        stat_key = _get_stat_key(co_filename)
+        if stat_key is None:
+            return None  # i.e.: <string>, <stdin>, etc.
+
+        persisted = self._filename_to_persisted.get(co_filename)
+        if persisted is not None and persisted.stat_key == stat_key:
+            return persisted
+
+        entries = {}
+        try:
+            with open(self._get_persisted_path(co_filename), 'r') as stream:
+                contents = json.load(stream)
+            if (
+                    contents.get('version') == self._version and
+                    contents.get('filename') == co_filename and
+                    contents.get('stat') == stat_key
+                ):
+                entries = contents['entries']
+        except (IOError, OSError):
+            pass  # Not persisted yet.
+        except Exception:
+            pydev_log.debug('Error loading bytecode analysis cache for: %s', co_filename)
+
+        persisted = self._filename_to_persisted[co_filename] = _PersistedFileEntries(stat_key, entries)
+        return persisted
+
+    def _load_persisted(self, kind, code, load):
+        with self._lock:
+            persisted = self._get_persisted_file_entries(code.co_filename)
+            if persisted is None:
+                return None
+            data = persisted.entries.get(_get_code_key(code), {}).get(kind)
+
+        if data is None:
+            return None
+        try:
+            return load(data)
+        except Exception:
+            pydev_log.debug('Error loading bytecode analysis cache for: %s', code.co_filename)
+            return None
+
+    def _persist(self, kind, code, data):
+        co_filename = code.co_filename
+        with self._lock:
+            persisted = self._get_persisted_file_entries(co_filename)
+            if persisted is None:
+                return
+            persisted.entries.setdefault(_get_code_key(code), {})[kind] = data
+            persisted.dirty = True
+            if time.time() - persisted.last_write_time >= _MIN_WRITE_INTERVAL:
+                self._write_persisted(co_filename, persisted)
+
+    def _write_persisted(self, co_filename, persisted):
+        # Note: the lock must be held.
+        persisted.dirty = False
+        persisted.last_write_time = time.time()
+        contents = {
+            'version': self._version,
+            'filename': co_filename,
+            'stat': persisted.stat_key,
+            'entries': persisted.entries,
+        }
+
+        path = self._get_persisted_path(co_filename)
+        tmp_path = '%s.%s.tmp' % (path, os.getpid())
+        try:
+            if not os.path.isdir(self._cache_dir):
+                os.makedirs(self._cache_dir)
+            with open(tmp_path, 'w') as stream:
+                json.dump(contents, stream)
+            try:
+                os.replace(tmp_path, path)
+            except AttributeError:  # Python 2 (no os.replace).
+                if os.path.exists(path):
+                    os.remove(path)
+                os.rename(tmp_path, path)
+        except Exception:
+            pydev_log.debug('Error persisting bytecode analysis cache for: %s', co_filename)
+            try:
+                os.remove(tmp_path)
+            except Exception:
+                pass
+
+
+bytecode_analysis_cache = BytecodeAnalysisCache(PYDEVD_BYTECODE_ANALYSIS_CACHE_DIR)
+if PYDEVD_BYTECODE_ANALYSIS_CACHE_DIR:
+    atexit.register(bytecode_analysis_cache.flush)
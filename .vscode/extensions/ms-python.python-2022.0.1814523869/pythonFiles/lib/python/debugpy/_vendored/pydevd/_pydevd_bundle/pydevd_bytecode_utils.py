@@ -17,6 +17,7 @@ import dis
 import opcode as _opcode
 
 from _pydevd_bundle.pydevd_constants import KeyifyList, DebugInfoHolder
+from _pydevd_bundle.pydevd_bytecode_analysis_cache import bytecode_analysis_cache, SMART_STEP_INTO_TARGETS
 from bisect import bisect
 from collections import deque
 
@@ -208,7 +209,7 @@ class _StackInterpreter(object):
         elif call_name in ('<listcomp>', '<genexpr>', '<setcomp>', '<dictcomp>'):
             code_obj = self.func_name_id_to_code_object[_TargetIdHashable(func_name_instr)]
             if code_obj is not None:
-                children_targets = _get_smart_step_into_targets(code_obj)
+                children_targets = _get_cached_smart_step_into_targets(code_obj)
                 if children_targets:
                     # i.e.: we have targets inside of a <listcomp> or <genexpr>.
                     # Note that to actually match this in the debugger we need to do matches on 2 frames,
@@ -701,6 +702,10 @@ def _get_smart_step_into_targets(code):
     return ret
 
 
+def _get_cached_smart_step_into_targets(code):
+    return bytecode_analysis_cache.get(SMART_STEP_INTO_TARGETS, code, _get_smart_step_into_targets)
+
+
 # Note that the offset is unique within the frame (so, we can use it as the target id).
 # Also, as the offset is the instruction offset within the frame, it's possible to
 # to inspect the parent frame for frame.f_lasti to know where we actually are (as the
@@ -790,7 +795,7 @@ def calculate_smart_step_into_variants(frame, start_line, end_line, base=0):
     if DEBUG:
         dis.dis(code)
 
-    for target in _get_smart_step_into_targets(code):
+    for target in _get_cached_smart_step_into_targets(code):
         variant = _convert_target_to_variant(target, start_line, end_line, call_order_cache, lasti, base)
         if variant is None:
             continue
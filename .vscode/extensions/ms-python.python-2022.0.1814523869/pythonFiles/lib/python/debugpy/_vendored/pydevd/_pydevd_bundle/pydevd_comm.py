@@ -79,9 +79,11 @@ from _pydev_bundle._pydev_completer import extract_token_and_qualifier
 from _pydevd_bundle._debug_adapter.pydevd_schema import VariablesResponseBody, \
     SetVariableResponseBody, StepInTarget, StepInTargetsResponseBody
 from _pydevd_bundle._debug_adapter import pydevd_base_schema, pydevd_schema
-from _pydevd_bundle.pydevd_net_command import NetCommand
+from _pydevd_bundle.pydevd_net_command import NetCommand, send_bytes_chunks
 from _pydevd_bundle.pydevd_xml import ExceptionOnEvaluate
-from _pydevd_bundle.pydevd_constants import ForkSafeLock, NULL
+from _pydevd_bundle.pydevd_constants import ForkSafeLock, NULL, PYDEVD_VARIABLES_REPR_TIME_BUDGET, \
+    PYDEVD_VARIABLES_REPR_SIZE_BUDGET
+from _pydevd_bundle.pydevd_safe_repr import SafeReprBudget
 from _pydevd_bundle.pydevd_daemon_thread import PyDBDaemonThread
 from _pydevd_bundle.pydevd_thread_lifecycle import pydevd_find_thread_by_id, resume_threads
 from _pydevd_bundle.pydevd_dont_trace_files import PYDEV_FILE
@@ -355,6 +357,9 @@ class FSNotifyThread(PyDBDaemonThread):
 class WriterThread(PyDBDaemonThread):
     ''' writer thread writes out the commands in an infinite loop '''
 
+    # Stop draining the queue into the current batch once it has at least this many bytes.
+    MAX_BATCH_BYTES = 256 * 1024
+
     def __init__(self, sock, py_db, terminate_on_socket_close=True):
         PyDBDaemonThread.__init__(self, py_db)
         self.sock = sock
@@ -371,10 +376,18 @@ class WriterThread(PyDBDaemonThread):
         if not self._kill_received:  # we don't take new data after everybody die
             self._cmd_queue.put(cmd, False)
 
+    def _add_cmd_bytes(self, cmd, chunks):
+        size = 0
+        for chunk in cmd.get_bytes_to_send():
+            chunks.append(chunk)
+            size += len(chunk)
+        return size
+
     @overrides(PyDBDaemonThread._on_run)
     def _on_run(self):
         ''' just loop and write responses '''
 
+        chunks = []
         try:
             while True:
                 try:
@@ -406,19 +419,37 @@ class WriterThread(PyDBDaemonThread):
                     # but the thread was still not liberated
                     return
 
-                if cmd.as_dict is not None:
-                    for listener in self.py_db.dap_messages_listeners:
-                        listener.before_send(cmd.as_dict)
+                # Drain whatever is already pending so that a burst of commands (i.e.: many
+                # threads being suspended at once or lots of output) is written with a
+                # single sendall.
+                cmds = [cmd]
+                batch_size = self._add_cmd_bytes(cmd, chunks)
+                while cmd.id != CMD_EXIT and batch_size < self.MAX_BATCH_BYTES:
+                    try:
+                        cmd = self._cmd_queue.get_nowait()
+                    except _queue.Empty:
+                        break
+                    cmds.append(cmd)
+                    batch_size += self._add_cmd_bytes(cmd, chunks)
+
+                listeners = self.py_db.dap_messages_listeners
+                if listeners:
+                    for cmd in cmds:
+                        if cmd.as_dict is not None:
+                            for listener in listeners:
+                                listener.before_send(cmd.as_dict)
 
                 notify_about_gevent_if_needed()
-                cmd.send(self.sock)
+                send_bytes_chunks(self.sock, chunks)
+                del chunks[:]
 
                 if cmd.id == CMD_EXIT:
                     pydev_log.debug('WriterThread: CMD_EXIT received')
                     break
                 if time is None:
                     break  # interpreter shutdown
-                time.sleep(self.timeout)
+                if self.timeout:
+                    time.sleep(self.timeout)
         except Exception:
             if self.__terminate_on_socket_close:
                 self.py_db.dispose_and_kill_all_pydevd_threads()
@@ -772,8 +803,11 @@ def internal_get_variable_json(py_db, request):
         except KeyError:
             pass
         else:
-            for child_var in variable.get_children_variables(fmt=fmt, scope=scope):
-                variables.append(child_var.get_var_data(fmt=fmt))
+            children_variables = variable.get_children_variables(
+                fmt=fmt, scope=scope, filter=arguments.filter, start=arguments.start, count=arguments.count)
+            budget = SafeReprBudget(PYDEVD_VARIABLES_REPR_TIME_BUDGET, PYDEVD_VARIABLES_REPR_SIZE_BUDGET)
+            for child_var in children_variables:
+                variables.append(child_var.get_var_data(fmt=fmt, budget=budget))
     except:
         try:
             exc, exc_type, tb = sys.exc_info()
@@ -901,6 +935,7 @@ def internal_change_variable_json(py_db, request):
     if hasattr(fmt, 'to_dict'):
         fmt = fmt.to_dict()
 
+    py_db.suspended_frames_manager.clear_repr_memo()
     try:
         variable = py_db.suspended_frames_manager.get_variable(variables_reference)
     except KeyError:
@@ -1126,6 +1161,9 @@ def internal_get_next_statement_targets(dbg, seq, thread_id, frame_id):
 
 
 def _evaluate_response(py_db, request, result, error_message=''):
+    # The output of the evaluation (which may still be pending in the coalescer) must be
+    # sent before the response.
+    pydevd_io.flush_output()
     is_error = isinstance(result, ExceptionOnEvaluate)
     if is_error:
         result = result.result
@@ -1164,6 +1202,10 @@ def internal_evaluate_expression_json(py_db, request, thread_id):
     else:
         ctx = NULL
 
+    if context not in ('hover', 'watch'):
+        # Anything could be changed by the evaluation.
+        py_db.suspended_frames_manager.clear_repr_memo()
+
     with ctx:
         if IS_PY2 and isinstance(expression, unicode):
             try:
@@ -1232,6 +1274,11 @@ def internal_evaluate_expression_json(py_db, request, thread_id):
             _evaluate_response(py_db, request, result='', error_message='Thread id: %s is not current thread id.' % (thread_id,))
             return
 
+    _evaluate_variable_response(py_db, request, frame_tracker, frame, expression, eval_result, context, fmt)
+
+
+def _evaluate_variable_response(py_db, request, frame_tracker, frame, expression, eval_result, context, fmt):
+    pydevd_io.flush_output()  # The output of the evaluation is sent before the response.
     variable = frame_tracker.obtain_as_variable(expression, eval_result, frame=frame)
 
     safe_repr_custom_attrs = {}
@@ -1256,7 +1303,106 @@ def internal_evaluate_expression_json(py_db, request, thread_id):
     variables_response = pydevd_base_schema.build_response(request, kwargs={'body':body})
     py_db.writer.add_command(NetCommand(CMD_RETURN, 0, variables_response, is_json=True))
 
+
+class InternalEvaluateWatchesJson(InternalThreadCommand):
+    '''
+    Evaluates the `watch` expressions of a frame in a single pass.
+
+    The client sends one `evaluate` request for each watch (all of them at once on each stop),
+    so, the requests for the same frame which arrive before this command is executed are added
+    to it (see: `add_request`) and are all evaluated together (each request still gets its own
+    response).
+    '''
+
+    def __init__(self, thread_id, request):
+        InternalThreadCommand.__init__(self, thread_id)
+        self.frame_id = request.arguments.frameId
+        self._requests = [request]
+        self._lock = ForkSafeLock()
+
+    def add_request(self, request):
+        '''
+        :return bool:
+            True if the request was added or False if it's for a different frame or the command
+            already started executing (in which case a new command must be posted for it).
+        '''
+        if request.arguments.frameId != self.frame_id:
+            return False
+
+        with self._lock:
+            if self._requests is None:
+                return False
+            self._requests.append(request)
+            return True
+
+    def has_started(self):
+        '''
+        :return bool:
+            True if the command already started executing (so, no requests may be added to it).
+        '''
+        with self._lock:
+            return self._requests is None
+
+    def do_it(self, dbg):
+        with self._lock:
+            requests = self._requests
+            self._requests = None
+        internal_evaluate_watches_json(dbg, requests, self.thread_id, self.frame_id)
+
+    def __str__(self):
+        return 'InternalEvaluateWatchesJson(%s, %s, %s)' % (self.thread_id, self.frame_id, self._requests)
+
+    __repr__ = __str__
+
+
+@silence_warnings_decorator
+def internal_evaluate_watches_json(py_db, requests, thread_id, frame_id):
+    '''
+    :param list(EvaluateRequest) requests:
+        The `evaluate` requests (all with a `watch` context) for the given frame.
+    '''
+    frame = py_db.find_frame(thread_id, frame_id)
+    frame_tracker = py_db.suspended_frames_manager.get_frame_tracker(thread_id)
+    if frame is None or frame_tracker is None:
+        # Not really expected: let the default handling report it for each request.
+        for request in requests:
+            internal_evaluate_expression_json(py_db, request, thread_id)
+        return
+
+    expressions = []
+    evaluated_requests = []
+    for request in requests:
+        expression = request.arguments.expression
+        if IS_PY2 and isinstance(expression, unicode):
+            try:
+                expression.encode('utf-8')
+            except Exception:
+                _evaluate_response(py_db, request, '', error_message='Expression is not valid utf-8.')
+                continue
+        expressions.append(expression)
+        evaluated_requests.append(request)
+
+    eval_results = pydevd_vars.evaluate_expressions(py_db, frame, expressions)
+
+    for request, expression, eval_result in zip(evaluated_requests, expressions, eval_results):
+        try:
+            if isinstance_checked(eval_result, ExceptionOnEvaluate):
+                # Show it as a string (with success=False) as in `internal_evaluate_expression_json`.
+                msg = '%s: %s' % (
+                    eval_result.result.__class__.__name__, eval_result.result,)
+                _evaluate_response(py_db, request, result=msg, error_message=msg)
+            else:
+                fmt = request.arguments.format
+                if hasattr(fmt, 'to_dict'):
+                    fmt = fmt.to_dict()
+                _evaluate_variable_response(py_db, request, frame_tracker, frame, expression, eval_result, 'watch', fmt)
+        except:
+            pydev_log.exception('Error evaluating watch: %s', expression)
+            _evaluate_response(py_db, request, result='', error_message='Error evaluating: %s' % (expression,))
+
+
 def _evaluate_response_return_exception(py_db, request, exc_type, exc, initial_tb):
+    pydevd_io.flush_output()  # The output of the evaluation is sent before the response.
     try:
         tb = initial_tb
 
@@ -1341,6 +1487,7 @@ def internal_set_expression_json(py_db, request, thread_id):
             _evaluate_response(py_db, request, '', error_message='Value is not valid utf-8.')
             raise
 
+    py_db.suspended_frames_manager.clear_repr_memo()
     frame = py_db.find_frame(thread_id, frame_id)
     exec_code = '%s = (%s)' % (expression, value)
     result = pydevd_vars.evaluate_expression(py_db, frame, exec_code, is_exec=True)
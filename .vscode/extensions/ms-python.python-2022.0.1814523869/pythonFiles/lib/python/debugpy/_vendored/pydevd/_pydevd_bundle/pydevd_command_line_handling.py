@@ -67,6 +67,8 @@ ACCEPTED_ARG_HANDLERS = [
     ArgHandlerWithParam('client'),
     ArgHandlerWithParam('access-token'),
     ArgHandlerWithParam('client-access-token'),
+    ArgHandlerWithParam('concurrency-trace-file'),  # Record --save-threading/--save-asyncio events to a Chrome trace.
+    ArgHandlerWithParam('signatures-profile-file'),  # Sample --save-signatures and save the aggregated types.
 
     ArgHandlerBool('server'),
     ArgHandlerBool('DEBUG_RECORD_SOCKET_READS'),
@@ -185,6 +185,8 @@ IS_PY37_OR_GREATER = False
 IS_PY38_OR_GREATER = False
 IS_PY39_OR_GREATER = False
 IS_PY310_OR_GREATER = False
+IS_PY311_OR_GREATER = False
+IS_PY312_OR_GREATER = False
 IS_PY2 = True
 IS_PY27 = False
 IS_PY24 = False
@@ -199,6 +201,8 @@ try:
         IS_PY38_OR_GREATER = sys.version_info >= (3, 8)
         IS_PY39_OR_GREATER = sys.version_info >= (3, 9)
         IS_PY310_OR_GREATER = sys.version_info >= (3, 10)
+        IS_PY311_OR_GREATER = sys.version_info >= (3, 11)
+        IS_PY312_OR_GREATER = sys.version_info >= (3, 12)
     elif sys.version_info[0] == 2 and sys.version_info[1] == 7:
         IS_PY27 = True
     elif sys.version_info[0] == 2 and sys.version_info[1] == 4:
@@ -317,6 +321,29 @@ PYDEVD_UNBLOCK_THREADS_TIMEOUT = as_float_in_env('PYDEVD_UNBLOCK_THREADS_TIMEOUT
 # on how the thread interruption works (there are some caveats related to it).
 PYDEVD_INTERRUPT_THREAD_TIMEOUT = as_float_in_env('PYDEVD_INTERRUPT_THREAD_TIMEOUT', -1)
 
+# Budget (in seconds and in number of chars) to compute the values of the variables sent in
+# a single `variables` request (after the budget is exceeded the remaining values are not
+# computed and a placeholder is shown instead).
+# A value <= 0 means the related budget is disabled.
+PYDEVD_VARIABLES_REPR_TIME_BUDGET = as_float_in_env('PYDEVD_VARIABLES_REPR_TIME_BUDGET', 1.)
+PYDEVD_VARIABLES_REPR_SIZE_BUDGET = int(as_float_in_env('PYDEVD_VARIABLES_REPR_SIZE_BUDGET', 2 * 1024 * 1024))
+
+# If True in env, the referrers are computed from a heap snapshot (a reverse-reference index
+# built with a single pass over the heap and kept while the process is suspended) instead of
+# scanning the whole heap for each queried object.
+PYDEVD_REFERRERS_HEAP_SNAPSHOT = is_true_in_env('PYDEVD_REFERRERS_HEAP_SNAPSHOT')
+
+# If True in env, subprocesses (forked or started with `python -c`) don't connect to the client
+# right away: they only install a minimal hook and attach when a function with a line
+# breakpoint is about to run or when an exception is unhandled.
+# See: _pydevd_bundle.pydevd_deferred_attach for details.
+PYDEVD_DEFERRED_SUBPROCESS_ATTACH = is_true_in_env('PYDEVD_DEFERRED_SUBPROCESS_ATTACH')
+
+# If set in env, the try..except and return info collected from code objects is persisted to
+# the given directory (so, new debug sessions don't have to analyse the same code again).
+# See: _pydevd_bundle.pydevd_bytecode_analysis_cache for details.
+PYDEVD_BYTECODE_ANALYSIS_CACHE_DIR = os.getenv('PYDEVD_BYTECODE_ANALYSIS_CACHE_DIR', '')
+
 EXCEPTION_TYPE_UNHANDLED = 'UNHANDLED'
 EXCEPTION_TYPE_USER_UNHANDLED = 'USER_UNHANDLED'
 EXCEPTION_TYPE_HANDLED = 'HANDLED'
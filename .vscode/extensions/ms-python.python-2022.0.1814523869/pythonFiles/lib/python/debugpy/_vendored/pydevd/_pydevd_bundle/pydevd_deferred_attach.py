@@ -0,0 +1,299 @@
+'''
+Deferred attach for subprocesses (enabled with PYDEVD_DEFERRED_SUBPROCESS_ATTACH=1).
+
+By default each subprocess (i.e.: each worker of a multiprocessing.Pool) connects to the
+client as soon as it starts (and waits until the client finishes its configuration) even
+if it never stops at a breakpoint. In the deferred mode, the subprocess only installs a
+minimal hook:
+
+- a tracing function which just checks whether the code of a function being called
+  has a line with a breakpoint;
+- a `sys.excepthook` (and `threading.excepthook`) if the client asked to break on
+  unhandled exceptions.
+
+and the debugger is only attached (through the regular `settrace`) when one of those is
+triggered.
+
+Note: the breakpoints considered are the ones in the parent process when the subprocess
+is created (so, breakpoints added later are only applied to subprocesses which already
+attached). When the client asked for something which the hook can't check (i.e.: break
+on caught exceptions or function breakpoints) the subprocess attaches right away as
+usual.
+'''
+import dis
+import os
+import sys
+from functools import partial
+
+from _pydev_bundle import pydev_log
+from _pydev_imps._pydev_saved_modules import threading
+from _pydevd_bundle.pydevd_constants import PYDEVD_DEFERRED_SUBPROCESS_ATTACH, dict_iter_items, \
+    get_global_debugger, set_protocol
+from _pydevd_bundle.pydevd_defaults import PydevdCustomization
+import pydevd_file_utils
+
+# The _DeferredAttach waiting for a trigger in this process (if any).
+_pending_attach = None
+
+
+def get_deferred_attach_info(py_db):
+    '''
+    :param PyDB|None py_db:
+        The debugger in the process creating the subprocess (None if this process is
+        itself waiting for a deferred attach).
+
+    :return dict|None:
+        A dict with the 'breakpoints' (canonical filename -> sorted lines) and whether
+        the subprocess should attach on 'unhandled_exceptions' or None if the subprocess
+        should attach right away.
+    '''
+    if not PYDEVD_DEFERRED_SUBPROCESS_ATTACH:
+        return None
+
+    if py_db is None:
+        pending_attach = _pending_attach
+        if pending_attach is None or pending_attach.attached:
+            return None
+        return pending_attach.deferred_attach_info
+
+    if (
+            py_db.break_on_caught_exceptions or
+            py_db.break_on_user_uncaught_exceptions or
+            py_db.function_breakpoint_name_to_breakpoint or
+            py_db.has_plugin_line_breaks or
+            py_db.has_plugin_exception_breaks
+        ):
+        return None
+
+    breakpoints = {}
+    for canonical_normalized_filename, line_to_breakpoint in dict_iter_items(py_db.breakpoints):
+        if line_to_breakpoint:
+            breakpoints[canonical_normalized_filename] = sorted(line_to_breakpoint)
+
+    return {
+        'breakpoints': breakpoints,
+        'unhandled_exceptions': bool(py_db.break_on_uncaught_exceptions),
+    }
+
+
+def get_pending_setup():
+    '''
+    :return dict|None:
+        The setup (see: pydevd.SetupHolder) for the debugger if this process is waiting
+        for a deferred attach.
+    '''
+    pending_attach = _pending_attach
+    if pending_attach is None:
+        return None
+    return pending_attach.setup
+
+
+def settrace_deferred(deferred_attach_info, protocol, **kwargs):
+    '''
+    Used in subprocesses started with `python -c` instead of `pydevd.settrace(**kwargs)`
+    when the attach is deferred (note that pydevd itself is only imported when attaching).
+    '''
+    PydevdCustomization.DEFAULT_PROTOCOL = protocol
+    set_protocol(protocol)
+    install_deferred_attach(partial(_settrace, kwargs), deferred_attach_info, kwargs.get('__setup_holder__'))
+
+    if kwargs.get('patch_multiprocessing'):
+        # Subprocesses created before attaching should still be handled.
+        from _pydev_bundle import pydev_monkey
+        pydev_monkey.patch_new_process_functions()
+
+
+def _settrace(kwargs):
+    import pydevd
+    pydevd.settrace(**kwargs)
+
+
+def on_forked_process():
+    '''
+    Called in a forked process.
+
+    :return bool:
+        True if the parent process was waiting for a deferred attach (in which case the
+        forked process also waits for it) and False otherwise.
+    '''
+    pending_attach = _pending_attach
+    if pending_attach is None or pending_attach.attached:
+        return False
+
+    install_deferred_attach(_settrace_forked, pending_attach.deferred_attach_info, pending_attach.setup)
+    return True
+
+
+def _settrace_forked():
+    import pydevd
+    pydevd.threadingCurrentThread().__pydevd_main_thread = True
+    pydevd.settrace_forked()
+
+
+def install_deferred_attach(attach, deferred_attach_info, setup):
+    '''
+    :param callable() attach:
+        Called to actually attach the debugger (i.e.: connect to the client and start
+        tracing) when a breakpoint or unhandled exception is hit.
+
+    :param dict deferred_attach_info:
+        See: get_deferred_attach_info
+
+    :param dict|None setup:
+        The setup to be used by the debugger (see: pydevd.SetupHolder).
+    '''
+    global _pending_attach
+    if _pending_attach is not None:
+        # i.e.: A fork of a process which was also waiting (note that the lock from the
+        # parent must not be reused).
+        _pending_attach.uninstall()
+
+    _pending_attach = _DeferredAttach(attach, deferred_attach_info, setup)
+    _pending_attach.install()
+    pydev_log.debug('Deferred attach installed (pid: %s, breakpoints in %s files).',
+        os.getpid(), len(deferred_attach_info['breakpoints']))
+
+
+class _DeferredAttach(object):
+
+    def __init__(self, attach, deferred_attach_info, setup):
+        self.deferred_attach_info = deferred_attach_info
+        self.setup = setup
+        self._attach = attach
+        self._breakpoints = deferred_attach_info['breakpoints']
+        self._lock = threading.RLock()
+        self.attached = False
+
+        # co_filename -> frozenset(lines) or None (if there are no breakpoints in it).
+        self._filename_to_lines = {}
+
+        # code -> whether it has a line with a breakpoint (only for files with breakpoints).
+        self._code_to_has_breakpoint = {}
+
+        self._original_excepthook = None
+        self._original_threading_excepthook = None
+
+    def install(self):
+        if self._breakpoints:
+            threading.settrace(self.trace_dispatch)
+            sys.settrace(self.trace_dispatch)
+
+        if self.deferred_attach_info['unhandled_exceptions']:
+            self._original_excepthook = sys.excepthook
+            sys.excepthook = self._excepthook
+
+            if hasattr(threading, 'excepthook'):  # Python 3.8 onwards.
+                self._original_threading_excepthook = threading.excepthook
+                threading.excepthook = self._threading_excepthook
+
+    def uninstall(self):
+        if self._breakpoints:
+            threading.settrace(None)
+            if sys.gettrace() == self.trace_dispatch:
+                sys.settrace(None)
+
+        if self._original_excepthook is not None:
+            if sys.excepthook == self._excepthook:
+                sys.excepthook = self._original_excepthook
+            self._original_excepthook = None
+
+        if self._original_threading_excepthook is not None:
+            if threading.excepthook == self._threading_excepthook:
+                threading.excepthook = self._original_threading_excepthook
+            self._original_threading_excepthook = None
+
+    def trace_dispatch(self, frame, event, arg):
+        if not self.attached:
+            code = frame.f_code
+            try:
+                lines = self._filename_to_lines[code.co_filename]
+            except KeyError:
+                lines = self._get_breakpoint_lines(code.co_filename)
+
+            if lines is None:
+                return None
+
+            try:
+                has_breakpoint = self._code_to_has_breakpoint[code]
+            except KeyError:
+                has_breakpoint = self._code_to_has_breakpoint[code] = self._code_has_breakpoint(code, lines)
+
+            if not has_breakpoint:
+                return None
+
+            # The code about to run has a breakpoint: attach and let the debugger trace it.
+            self.attach()
+
+        trace_func = sys.gettrace()
+        if trace_func is None or trace_func == self.trace_dispatch:
+            # i.e.: sys.monitoring is used (the debugger already enabled the events for
+            # this frame when attaching).
+            return None
+        return trace_func(frame, event, arg)
+
+    def _code_has_breakpoint(self, code, lines):
+        if dis is None:  # Interpreter shutdown.
+            return False
+        for _offset, line in dis.findlinestarts(code):
+            if line in lines:
+                return True
+        return False
+
+    def _get_breakpoint_lines(self, co_filename):
+        if pydevd_file_utils is None:  # Interpreter shutdown.
+            return None
+        canonical_normalized_filename = pydevd_file_utils.get_abs_path_real_path_and_base_from_file(co_filename)[1]
+        lines = self._breakpoints.get(canonical_normalized_filename)
+        if lines:
+            lines = frozenset(lines)
+        else:
+            lines = None
+        self._filename_to_lines[co_filename] = lines
+        return lines
+
+    def attach(self):
+        with self._lock:
+            if self.attached:
+                return
+            self.attached = True
+            self.uninstall()
+            pydev_log.debug('Deferred attach triggered (pid: %s).', os.getpid())
+            self._attach()
+
+    def _stop_on_unhandled_exception(self, thread, arg):
+        if arg[0] in (KeyboardInterrupt, SystemExit):
+            return
+
+        self.attach()
+        py_db = get_global_debugger()
+        if py_db is None:
+            return
+
+        from _pydevd_bundle.pydevd_additional_thread_info import set_additional_thread_info
+        additional_info = set_additional_thread_info(thread)
+        if not additional_info.suspended_at_unhandled:
+            additional_info.suspended_at_unhandled = True
+            py_db.stop_on_unhandled_exception(py_db, thread, additional_info, arg)
+
+    def _excepthook(self, exctype, value, tb):
+        original_excepthook = self._original_excepthook
+        try:
+            self._stop_on_unhandled_exception(threading.current_thread(), (exctype, value, tb))
+        except:
+            pydev_log.exception('Error handling unhandled exception in deferred attach.')
+
+        if original_excepthook is not None:
+            original_excepthook(exctype, value, tb)
+        else:
+            sys.__excepthook__(exctype, value, tb)
+
+    def _threading_excepthook(self, args):
+        original_threading_excepthook = self._original_threading_excepthook
+        try:
+            thread = args.thread if args.thread is not None else threading.current_thread()
+            self._stop_on_unhandled_exception(thread, (args.exc_type, args.exc_value, args.exc_traceback))
+        except:
+            pydev_log.exception('Error handling unhandled exception in deferred attach.')
+
+        if original_threading_excepthook is not None:
+            original_threading_excepthook(args)
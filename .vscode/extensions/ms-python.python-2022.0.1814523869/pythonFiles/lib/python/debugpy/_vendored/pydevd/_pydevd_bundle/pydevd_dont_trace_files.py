@@ -14,6 +14,7 @@ DONT_TRACE_DIRS = {
     '_pydev_runfiles': PYDEV_FILE,
     '_pydevd_bundle': PYDEV_FILE,
     '_pydevd_frame_eval': PYDEV_FILE,
+    '_pydevd_sys_monitoring': PYDEV_FILE,
     'pydev_ipython': PYDEV_FILE,
     'pydev_sitecustomize': PYDEV_FILE,
     'pydevd_attach_to_process': PYDEV_FILE,
@@ -54,6 +55,7 @@ DONT_TRACE = {
     '_pydev_tipper_common.py': PYDEV_FILE,
     '_pydev_xmlrpclib.py': PYDEV_FILE,
     'django_debug.py': PYDEV_FILE,
+    'inotify_ctypes.py': PYDEV_FILE,
     'jinja2_debug.py': PYDEV_FILE,
     'pycompletionserver.py': PYDEV_FILE,
     'pydev_app_engine_debug_startup.py': PYDEV_FILE,
@@ -87,6 +89,7 @@ DONT_TRACE = {
     'pydevd_api.py': PYDEV_FILE,
     'pydevd_base_schema.py': PYDEV_FILE,
     'pydevd_breakpoints.py': PYDEV_FILE,
+    'pydevd_bytecode_analysis_cache.py': PYDEV_FILE,
     'pydevd_bytecode_utils.py': PYDEV_FILE,
     'pydevd_code_to_source.py': PYDEV_FILE,
     'pydevd_collect_bytecode_info.py': PYDEV_FILE,
@@ -100,6 +103,7 @@ DONT_TRACE = {
     'pydevd_cython_wrapper.py': PYDEV_FILE,
     'pydevd_daemon_thread.py': PYDEV_FILE,
     'pydevd_defaults.py': PYDEV_FILE,
+    'pydevd_deferred_attach.py': PYDEV_FILE,
     'pydevd_dont_trace.py': PYDEV_FILE,
     'pydevd_dont_trace_files.py': PYDEV_FILE,
     'pydevd_exec.py': PYDEV_FILE,
@@ -121,6 +125,7 @@ DONT_TRACE = {
     'pydevd_net_command.py': PYDEV_FILE,
     'pydevd_net_command_factory_json.py': PYDEV_FILE,
     'pydevd_net_command_factory_xml.py': PYDEV_FILE,
+    'pydevd_output_coalescer.py': PYDEV_FILE,
     'pydevd_plugin_numpy_types.py': PYDEV_FILE,
     'pydevd_plugin_utils.py': PYDEV_FILE,
     'pydevd_plugins_django_form_str.py': PYDEV_FILE,
@@ -137,6 +142,7 @@ DONT_TRACE = {
     'pydevd_source_mapping.py': PYDEV_FILE,
     'pydevd_stackless.py': PYDEV_FILE,
     'pydevd_suspended_frames.py': PYDEV_FILE,
+    'pydevd_sys_monitoring.py': PYDEV_FILE,
     'pydevd_thread_lifecycle.py': PYDEV_FILE,
     'pydevd_thread_wrappers.py': PYDEV_FILE,
     'pydevd_timeout.py': PYDEV_FILE,
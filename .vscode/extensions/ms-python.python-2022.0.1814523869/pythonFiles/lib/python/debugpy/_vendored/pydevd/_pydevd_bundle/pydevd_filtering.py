@@ -1,6 +1,6 @@
-import fnmatch
 import glob
 import os.path
+import re
 import sys
 
 from _pydev_bundle import pydev_log
@@ -20,6 +20,11 @@ except NameError:
 
 ExcludeFilter = namedtuple('ExcludeFilter', 'name, exclude, is_path')
 
+# Caches are cleared when they get bigger than this.
+_MAX_CACHE_SIZE = 10000
+
+_MAX_GLOBS_IN_REGEXP = 90
+
 
 def _convert_to_str_and_clear_empty(roots):
     if sys.version_info[0] <= 2:
@@ -37,77 +42,167 @@ def _convert_to_str_and_clear_empty(roots):
     return new_roots
 
 
-def _check_matches(patterns, paths):
-    if not patterns and not paths:
-        # Matched to the end.
-        return True
+def _translate_glob_segment(segment, escaped_sep):
+    '''
+    Translates a single path segment with glob magic chars to a regexp (the same as
+    fnmatch.translate, but without ever matching the separator).
+    '''
+    i, n = 0, len(segment)
+    res = []
+    while i < n:
+        c = segment[i]
+        i += 1
+        if c == '*':
+            res.append('[^%s]*' % (escaped_sep,))
+        elif c == '?':
+            res.append('[^%s]' % (escaped_sep,))
+        elif c == '[':
+            j = i
+            if j < n and segment[j] == '!':
+                j += 1
+            if j < n and segment[j] == ']':
+                j += 1
+            while j < n and segment[j] != ']':
+                j += 1
+            if j >= n:
+                res.append('\\[')
+            else:
+                stuff = segment[i:j].replace('\\', '\\\\')
+                # A ']' right after the '[' (or '[!') is a member of the set (and, as in
+                # fnmatch.translate, chars which could be set operations are escaped).
+                stuff = re.sub(r'([\[\]&~|])', r'\\\1', stuff)
+                i = j + 1
+                if stuff[0] == '!':
+                    res.append('[^%s%s]' % (escaped_sep, stuff[1:]))
+                else:
+                    if stuff[0] == '^':
+                        stuff = '\\' + stuff
+                    res.append('(?!%s)[%s]' % (escaped_sep, stuff))
+        else:
+            res.append(re.escape(c))
+    return ''.join(res)
 
-    if (not patterns and paths) or (patterns and not paths):
-        return False
 
-    pattern = normcase(patterns[0])
-    path = normcase(paths[0])
+def _glob_to_regexp(pattern, sep=os.sep, altsep=os.altsep):
+    '''
+    :return str:
+        A regexp (not anchored) which matches the paths returned by `_get_path_for_glob_matching`
+        which match the given glob pattern.
+    '''
+    if altsep:
+        pattern = pattern.replace(altsep, sep)
 
-    if not glob.has_magic(pattern):
+    escaped_sep = re.escape(sep)
+    any_segment = '[^%s]*' % (escaped_sep,)
 
-        if pattern != path:
-            return False
+    # Patterns without a drive match paths in any drive.
+    parts = ['(?:[^%s]:)?' % (escaped_sep,)]
+    if len(pattern) > 1 and pattern[1] == ':':
+        parts = [re.escape(pattern[0].lower() + ':')]
+        pattern = pattern[2:]
 
-    elif pattern == '**':
-        if len(patterns) == 1:
-            return True  # if ** is the last one it matches anything to the right.
+    patterns = pattern.split(sep)
+    if patterns:
+        if patterns[0] == '':
+            patterns = patterns[1:]
 
-        for i in xrange(len(paths)):
-            # Recursively check the remaining patterns as the
-            # current pattern could match any number of paths.
-            if _check_matches(patterns[1:], paths[i:]):
-                return True
+    # Note: each path segment is matched along with the separator before it.
+    last = len(patterns) - 1
+    for i, pattern in enumerate(patterns):
+        pattern = normcase(pattern)
+        if pattern == '**':
+            if i == last:
+                # If ** is the last one it matches anything to the right.
+                parts.append('(?:%s%s)+' % (escaped_sep, any_segment))
+            else:
+                # Matches any number of paths.
+                parts.append('(?:%s%s)*' % (escaped_sep, any_segment))
 
-    elif not fnmatch.fnmatch(path, pattern):
-        # Current part doesn't match.
-        return False
+        elif glob.has_magic(pattern):
+            parts.append(escaped_sep + _translate_glob_segment(pattern, escaped_sep))
 
-    return _check_matches(patterns[1:], paths[1:])
+        else:
+            parts.append(escaped_sep + re.escape(pattern))
 
+    return ''.join(parts)
 
-def glob_matches_path(path, pattern, sep=os.sep, altsep=os.altsep):
+
+def _get_path_for_glob_matching(path, sep=os.sep, altsep=os.altsep):
     if altsep:
-        pattern = pattern.replace(altsep, sep)
         path = path.replace(altsep, sep)
 
     drive = ''
     if len(path) > 1 and path[1] == ':':
-        drive, path = path[0], path[2:]
+        drive, path = path[0].lower() + ':', path[2:]
 
-    if drive and len(pattern) > 1:
-        if pattern[1] == ':':
-            if drive.lower() != pattern[0].lower():
-                return False
-            pattern = pattern[2:]
+    # Each segment is preceded by the separator (and no segments means an empty path).
+    if path and not path.startswith(sep):
+        path = sep + path
 
-    patterns = pattern.split(sep)
-    paths = path.split(sep)
-    if paths:
-        if paths[0] == '':
-            paths = paths[1:]
-    if patterns:
-        if patterns[0] == '':
-            patterns = patterns[1:]
+    return drive + normcase(path)
+
+
+_compiled_globs = {}
 
-    return _check_matches(patterns, paths)
+
+def glob_matches_path(path, pattern, sep=os.sep, altsep=os.altsep):
+    cache_key = (pattern, sep, altsep)
+    try:
+        compiled = _compiled_globs[cache_key]
+    except KeyError:
+        if len(_compiled_globs) > _MAX_CACHE_SIZE:
+            _compiled_globs.clear()
+        compiled = _compiled_globs[cache_key] = re.compile(
+            '\\A(?:%s)\\Z' % (_glob_to_regexp(pattern, sep, altsep),))
+
+    return compiled.match(_get_path_for_glob_matching(path, sep, altsep)) is not None
+
+
+def _compile_globs(patterns):
+    '''
+    :return list(regexp):
+        Regexps which match all the given glob patterns at once (the group for the pattern is
+        the one set in `lastindex`). More than one is returned because old versions of Python
+        only accept up to 100 groups in a single regexp.
+    '''
+    compiled = []
+    for i in xrange(0, len(patterns), _MAX_GLOBS_IN_REGEXP):
+        alternatives = ['(%s)' % (_glob_to_regexp(pattern),) for pattern in patterns[i:i + _MAX_GLOBS_IN_REGEXP]]
+        compiled.append(re.compile('\\A(?:%s)\\Z' % ('|'.join(alternatives),)))
+    return compiled
+
+
+def _compile_roots(roots):
+    '''
+    :return regexp:
+        A regexp which matches the longest of the given roots at the start of a path (or None
+        if there are no roots).
+    '''
+    roots = sorted(set(root for root in roots if root), key=len, reverse=True)
+    if not roots:
+        return None
+    return re.compile('|'.join(re.escape(root) for root in roots))
 
 
 class FilesFiltering(object):
     '''
-    Note: calls at FilesFiltering are uncached.
+    Note: calls at FilesFiltering are only cached by filename (the glob patterns and roots
+    are compiled into regexps when set).
 
     The actual API used should be through PyDB.
     '''
 
     def __init__(self):
         self._exclude_filters = []
+        self._exclude_filters_regexps = []
+        self._exclude_filters_path_indexes = []
+        self._exclude_by_filter_cache = {}
+
         self._project_roots = []
+        self._project_roots_regexp = None
         self._library_roots = []
+        self._library_roots_regexp = None
+        self._in_project_roots_cache = {}
 
         # Filter out libraries?
         self._use_libraries_filter = False
@@ -139,7 +234,7 @@ class FilesFiltering(object):
                 exclude_filters = []
                 for key, val in json.loads(pydevd_filters).items():
                     exclude_filters.append(ExcludeFilter(key, val, True))
-                self._exclude_filters = exclude_filters
+                self.set_exclude_filters(exclude_filters)
             else:
                 # A ';' separated list of strings with globs for the
                 # list of excludes.
@@ -148,7 +243,7 @@ class FilesFiltering(object):
                 for new_filter in filters:
                     if new_filter.strip():
                         new_filters.append(ExcludeFilter(new_filter.strip(), True, True))
-                self._exclude_filters = new_filters
+                self.set_exclude_filters(new_filters)
 
     @classmethod
     def _get_default_library_roots(cls):
@@ -225,6 +320,8 @@ class FilesFiltering(object):
 
     def set_project_roots(self, project_roots):
         self._project_roots = self._fix_roots(project_roots)
+        self._project_roots_regexp = _compile_roots(self._project_roots)
+        self._in_project_roots_cache.clear()
         pydev_log.debug("IDE_PROJECT_ROOTS %s\n" % project_roots)
 
     def _get_project_roots(self):
@@ -232,6 +329,8 @@ class FilesFiltering(object):
 
     def set_library_roots(self, roots):
         self._library_roots = self._fix_roots(roots)
+        self._library_roots_regexp = _compile_roots(self._library_roots)
+        self._in_project_roots_cache.clear()
         pydev_log.debug("LIBRARY_ROOTS %s\n" % roots)
 
     def _get_library_roots(self):
@@ -239,9 +338,12 @@ class FilesFiltering(object):
 
     def in_project_roots(self, received_filename):
         '''
-        Note: don't call directly. Use PyDb.in_project_scope (there's no caching here and it doesn't
-        handle all possibilities for knowing whether a project is actually in the scope, it
-        just handles the heuristics based on the absolute_normalized_filename without the actual frame).
+        Note: don't call directly. Use PyDb.in_project_scope (it doesn't handle all possibilities for
+        knowing whether a project is actually in the scope, it just handles the heuristics based on
+        the absolute_normalized_filename without the actual frame).
+
+        The result is cached per filename (the cache is cleared when the project or library roots
+        change).
         '''
         DEBUG = False
 
@@ -255,29 +357,29 @@ class FilesFiltering(object):
                 pydev_log.debug('Not in in_project_roots - library basenames - starts with %s (%s)', received_filename, LIBRARY_CODE_BASENAMES_STARTING_WITH)
             return False
 
-        project_roots = self._get_project_roots()  # roots are absolute/normalized.
+        try:
+            return self._in_project_roots_cache[received_filename]
+        except KeyError:
+            pass
 
         absolute_normalized_filename = self._absolute_normalized_path(received_filename)
         absolute_normalized_filename_as_dir = absolute_normalized_filename + ('\\' if IS_WINDOWS else '/')
 
-        found_in_project = []
-        for root in project_roots:
-            if root and (absolute_normalized_filename.startswith(root) or root == absolute_normalized_filename_as_dir):
-                if DEBUG:
-                    pydev_log.debug('In project: %s (%s)', absolute_normalized_filename, root)
-                found_in_project.append(root)
-
-        found_in_library = []
-        library_roots = self._get_library_roots()
-        for root in library_roots:
-            if root and (absolute_normalized_filename.startswith(root) or root == absolute_normalized_filename_as_dir):
-                found_in_library.append(root)
-                if DEBUG:
-                    pydev_log.debug('In library: %s (%s)', absolute_normalized_filename, root)
-            else:
-                if DEBUG:
-                    pydev_log.debug('Not in library: %s (%s)', absolute_normalized_filename, root)
-
+        # Note: roots always end with a separator, so, matching against the filename as a dir also
+        # matches the root itself. Only the longest root matched is relevant.
+        found_in_project = None
+        if self._project_roots_regexp is not None:
+            found_in_project = self._project_roots_regexp.match(absolute_normalized_filename_as_dir)
+            if DEBUG and found_in_project is not None:
+                pydev_log.debug('In project: %s (%s)', absolute_normalized_filename, found_in_project.group())
+
+        found_in_library = None
+        if self._library_roots_regexp is not None:
+            found_in_library = self._library_roots_regexp.match(absolute_normalized_filename_as_dir)
+            if DEBUG and found_in_library is not None:
+                pydev_log.debug('In library: %s (%s)', absolute_normalized_filename, found_in_library.group())
+
+        project_roots = self._get_project_roots()
         if not project_roots:
             # If we have no project roots configured, consider it being in the project
             # roots if it's not found in site-packages (because we have defaults for those
@@ -295,11 +397,14 @@ class FilesFiltering(object):
                     in_project = True
                 else:
                     # Found in both, let's see which one has the bigger path matched.
-                    if max(len(x) for x in found_in_project) > max(len(x) for x in found_in_library):
+                    if found_in_project.end() > found_in_library.end():
                         in_project = True
                     if DEBUG:
                         pydev_log.debug('Final in project (found in both): %s (%s)', absolute_normalized_filename, in_project)
 
+        if len(self._in_project_roots_cache) > _MAX_CACHE_SIZE:
+            self._in_project_roots_cache.clear()
+        self._in_project_roots_cache[received_filename] = in_project
         return in_project
 
     def use_libraries_filter(self):
@@ -321,21 +426,56 @@ class FilesFiltering(object):
         :return: True if it should be excluded, False if it should be included and None
             if no rule matched the given file.
         '''
-        for exclude_filter in self._exclude_filters:  # : :type exclude_filter: ExcludeFilter
-            if exclude_filter.is_path:
-                if glob_matches_path(absolute_filename, exclude_filter.name):
-                    return exclude_filter.exclude
-            else:
+        cache_key = (absolute_filename, module_name)
+        try:
+            return self._exclude_by_filter_cache[cache_key]
+        except KeyError:
+            pass
+
+        exclude_filters = self._exclude_filters
+
+        # All the path filters are checked at once (the first one matched wins).
+        path_filter_index = len(exclude_filters)
+        if self._exclude_filters_regexps:
+            path = _get_path_for_glob_matching(absolute_filename)
+            offset = 0
+            for regexp in self._exclude_filters_regexps:
+                match = regexp.match(path)
+                if match is not None:
+                    path_filter_index = self._exclude_filters_path_indexes[offset + match.lastindex - 1]
+                    break
+                offset += _MAX_GLOBS_IN_REGEXP
+
+        # Module filters only have priority if they appear before the path filter matched.
+        ret = None
+        for i in xrange(path_filter_index + 1):
+            if i == path_filter_index:
+                if i < len(exclude_filters):
+                    ret = exclude_filters[i].exclude
+                break
+
+            exclude_filter = exclude_filters[i]  # : :type exclude_filter: ExcludeFilter
+            if not exclude_filter.is_path:
                 # Module filter.
                 if exclude_filter.name == module_name or module_name.startswith(exclude_filter.name + '.'):
-                    return exclude_filter.exclude
-        return None
+                    ret = exclude_filter.exclude
+                    break
+
+        if len(self._exclude_by_filter_cache) > _MAX_CACHE_SIZE:
+            self._exclude_by_filter_cache.clear()
+        self._exclude_by_filter_cache[cache_key] = ret
+        return ret
 
     def set_exclude_filters(self, exclude_filters):
         '''
         :param list(ExcludeFilter) exclude_filters:
         '''
         self._exclude_filters = exclude_filters
+        self._exclude_filters_path_indexes = [
+            i for i, exclude_filter in enumerate(exclude_filters) if exclude_filter.is_path]
+        self._exclude_filters_regexps = _compile_globs(
+            [exclude_filters[i].name for i in self._exclude_filters_path_indexes])
+        self._exclude_by_filter_cache.clear()
         self.require_module = False
         for exclude_filter in exclude_filters:
             if not exclude_filter.is_path:
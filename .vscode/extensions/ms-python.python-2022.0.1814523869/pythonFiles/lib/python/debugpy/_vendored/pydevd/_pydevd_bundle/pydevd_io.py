@@ -1,4 +1,5 @@
 from _pydevd_bundle.pydevd_constants import ForkSafeLock, get_global_debugger, IS_PY2
+from _pydevd_bundle.pydevd_output_coalescer import OutputCoalescer
 import os
 import sys
 from contextlib import contextmanager
@@ -92,7 +93,9 @@ class RedirectToPyDBIoMessages(object):
         return get_global_debugger()
 
     def flush(self):
-        pass  # no-op here
+        # no-op here: many programs flush after each write (i.e.: logging handlers), so,
+        # the pending output is only sent by the coalescer (at most after its window).
+        pass
 
     def write(self, s):
         if self._on_write is not None:
@@ -113,13 +116,39 @@ class RedirectToPyDBIoMessages(object):
                 if isinstance(s, bytes):
                     s = s.decode(self.encoding, errors='replace')
 
-            py_db = self.get_pydb()
-            if py_db is not None:
-                # Note that the actual message contents will be a xml with utf-8, although
-                # the entry is str on py3 and bytes on py2.
-                cmd = py_db.cmd_factory.make_io_message(s, self._out_ctx)
-                if py_db.writer is not None:
-                    py_db.writer.add_command(cmd)
+            _get_output_coalescer().write(self._out_ctx, s)
+
+
+def _send_io_message(out_ctx, s):
+    py_db = get_global_debugger()
+    if py_db is not None:
+        # Note that the actual message contents will be a xml with utf-8, although
+        # the entry is str on py3 and bytes on py2.
+        cmd = py_db.cmd_factory.make_io_message(s, out_ctx)
+        if py_db.writer is not None:
+            py_db.writer.add_command(cmd)
+
+
+_output_coalescer = None
+
+
+def _get_output_coalescer():
+    global _output_coalescer
+    if _output_coalescer is None:
+        with _RedirectionsHolder._lock:
+            if _output_coalescer is None:
+                # A single instance is shared by stdout and stderr to keep the ordering.
+                _output_coalescer = OutputCoalescer(_send_io_message, lock=ForkSafeLock(rlock=True))
+    return _output_coalescer
+
+
+def flush_output():
+    '''
+    Sends any output which is still pending in the coalescer (i.e.: when a thread is
+    suspended, so, the output printed before the suspension is shown before it).
+    '''
+    if _output_coalescer is not None:
+        _output_coalescer.flush()
 
 
 class IOBuf:
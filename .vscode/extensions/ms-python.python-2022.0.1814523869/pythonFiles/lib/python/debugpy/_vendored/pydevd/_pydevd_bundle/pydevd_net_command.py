@@ -8,6 +8,26 @@ import json
 from _pydev_bundle import pydev_log
 
 
+def send_bytes_chunks(sock, chunks):
+    '''
+    Writes the given chunks of bytes to the socket with a single `sendall`.
+    '''
+    if not chunks:
+        return
+    try:
+        if len(chunks) == 1:
+            sock.sendall(chunks[0])
+        else:
+            sock.sendall(b''.join(chunks))
+    except:
+        if IS_JYTHON:
+            # Ignore errors in sock.sendall in Jython (seems to be common for Jython to
+            # give spurious exceptions at interpreter shutdown here).
+            pass
+        else:
+            raise
+
+
 class _BaseNetCommand(object):
 
     # Command id. Should be set in instance.
@@ -19,6 +39,14 @@ class _BaseNetCommand(object):
     def send(self, *args, **kwargs):
         pass
 
+    def get_bytes_to_send(self):
+        '''
+        :return tuple(bytes):
+            The chunks which should be written to the socket for this command (empty if
+            nothing should be sent).
+        '''
+        return ()
+
 
 class _NullNetCommand(_BaseNetCommand):
     pass
@@ -104,19 +132,14 @@ class NetCommand(_BaseNetCommand):
             as_bytes = msg
         self._as_bytes = as_bytes
 
-    def send(self, sock):
+    def get_bytes_to_send(self):
         as_bytes = self._as_bytes
-        try:
-            if get_protocol() in (HTTP_PROTOCOL, HTTP_JSON_PROTOCOL):
-                sock.sendall(('Content-Length: %s\r\n\r\n' % len(as_bytes)).encode('ascii'))
-            sock.sendall(as_bytes)
-        except:
-            if IS_JYTHON:
-                # Ignore errors in sock.sendall in Jython (seems to be common for Jython to
-                # give spurious exceptions at interpreter shutdown here).
-                pass
-            else:
-                raise
+        if get_protocol() in (HTTP_PROTOCOL, HTTP_JSON_PROTOCOL):
+            return (('Content-Length: %s\r\n\r\n' % len(as_bytes)).encode('ascii'), as_bytes)
+        return (as_bytes,)
+
+    def send(self, sock):
+        send_bytes_chunks(sock, self.get_bytes_to_send())
 
     @classmethod
     def _show_debug_info(cls, cmd_id, seq, text):
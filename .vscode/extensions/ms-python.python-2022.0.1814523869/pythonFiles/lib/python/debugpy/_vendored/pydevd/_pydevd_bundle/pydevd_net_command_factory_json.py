@@ -26,6 +26,7 @@ from _pydevd_bundle.pydevd_additional_thread_info import set_additional_thread_i
 from _pydevd_bundle import pydevd_frame_utils, pydevd_constants, pydevd_utils
 import linecache
 from _pydevd_bundle.pydevd_thread_lifecycle import pydevd_find_thread_by_id
+from _pydev_bundle import pydev_log
 
 try:
     from StringIO import StringIO
@@ -89,6 +90,40 @@ class ModulesManager(object):
             return dict_values(self._modules)
 
 
+class _FrameInfo(object):
+    '''
+    Information on the frames of a given code object which doesn't depend on the
+    current line of the frame.
+    '''
+
+    __slots__ = [
+        'method_name',
+        'module_name',
+        'original_filename',
+        'is_pydev_file',
+        'is_filtered',
+        'presentation_hint',
+        'source_exists',
+        'has_lnotab',
+        'linecache_source_reference',
+        'lineno_to_line_info',
+    ]
+
+    def __init__(self, method_name, module_name, original_filename):
+        self.method_name = method_name
+        self.module_name = module_name
+        self.original_filename = original_filename
+        self.is_pydev_file = False
+        self.is_filtered = False
+        self.presentation_hint = None
+        self.source_exists = True
+        self.has_lnotab = False
+        self.linecache_source_reference = None
+
+        # lineno -> tuple(filename_in_utf8, lineno, applied_mapping, source_reference, formatted_name_cache)
+        self.lineno_to_line_info = {}
+
+
 class NetCommandFactoryJson(NetCommandFactory):
     '''
     Factory for commands which will provide messages as json (they should be
@@ -101,9 +136,104 @@ class NetCommandFactoryJson(NetCommandFactory):
     no longer use NetCommandFactory as the base class.
     '''
 
+    # If more than this number of code objects is cached the cache is cleared.
+    MAX_FRAME_INFO_CACHE_SIZE = 10000
+
     def __init__(self):
         NetCommandFactory.__init__(self)
         self.modules_manager = ModulesManager()
+        self._code_to_frame_info = {}
+
+    @overrides(NetCommandFactory.clear_frame_info_cache)
+    def clear_frame_info_cache(self):
+        self._code_to_frame_info.clear()
+
+    def _get_frame_info(self, py_db, frame):
+        '''
+        :return _FrameInfo:
+            The info for the given frame or None if it can't be shown.
+        '''
+        f_code = frame.f_code
+        if f_code is None:
+            pydev_log.info('Frame without f_code: %s', frame)
+            return None  # IronPython sometimes does not have it!
+
+        # Plugin frames may be fake frames, so, they're never cached.
+        is_plugin_frame = getattr(frame, 'IS_PLUGIN_FRAME', False)
+        if not is_plugin_frame:
+            frame_info = self._code_to_frame_info.get(f_code)
+            if frame_info is not None:
+                return frame_info
+
+        method_name = f_code.co_name  # method name (if in method) or ? if global
+        if method_name is None:
+            pydev_log.info('Frame without co_name: %s', frame)
+            return None  # IronPython sometimes does not have it!
+
+        try:
+            module_name = str(frame.f_globals.get('__name__', ''))
+        except:
+            module_name = '<unknown>'
+
+        abs_path_real_path_and_base = pydevd_file_utils.get_abs_path_real_path_and_base_from_frame(frame)
+        original_filename = abs_path_real_path_and_base[0]
+        frame_info = _FrameInfo(method_name, module_name, original_filename)
+
+        if py_db.get_file_type(frame, abs_path_real_path_and_base) == py_db.PYDEV_FILE:
+            frame_info.is_pydev_file = True
+
+        elif not is_plugin_frame:  # Never filter out plugin frames!
+            if py_db.is_files_filter_enabled and py_db.apply_files_filter(frame, original_filename, False):
+                frame_info.is_filtered = True
+
+            elif not py_db.in_project_scope(frame):
+                frame_info.presentation_hint = 'subtle'
+
+        frame_info.source_exists = os.path.exists(original_filename)
+        frame_info.has_lnotab = bool(getattr(f_code, 'co_lnotab', None))
+
+        if not is_plugin_frame:
+            code_to_frame_info = self._code_to_frame_info
+            if len(code_to_frame_info) >= self.MAX_FRAME_INFO_CACHE_SIZE:
+                code_to_frame_info.clear()
+            code_to_frame_info[f_code] = frame_info
+        return frame_info
+
+    def _get_line_info(self, py_db, frame, frame_info, lineno, module_events):
+        '''
+        :return tuple(filename_in_utf8, lineno, applied_mapping, source_reference, formatted_name_cache):
+            Note that the source_reference is None if it must be computed for the frame id.
+        '''
+        line_info = frame_info.lineno_to_line_info.get(lineno)
+        if line_info is not None:
+            return line_info
+
+        original_filename = frame_info.original_filename
+        filename_in_utf8, mapped_lineno, changed = py_db.source_mapping.map_to_client(original_filename, lineno)
+        filename_in_utf8, applied_mapping = pydevd_file_utils.map_file_to_client(filename_in_utf8)
+        applied_mapping = applied_mapping or changed
+
+        module_events.extend(self.modules_manager.track_module(filename_in_utf8, frame_info.module_name, frame))
+
+        source_reference = pydevd_file_utils.get_client_filename_source_reference(filename_in_utf8)
+        if not source_reference and not applied_mapping and not frame_info.source_exists:
+            if frame_info.has_lnotab:
+                # Create a source-reference to be used where we provide the source by decompiling the code
+                # (this is done for each frame id, so, it's not cached).
+                # Note: When the time comes to retrieve the source reference in this case, we'll
+                # check the linecache first (see: get_decompiled_source_from_frame_id).
+                source_reference = None
+            else:
+                # Check if someone added a source reference to the linecache (Python attrs does this).
+                if frame_info.linecache_source_reference is None and linecache.getline(original_filename, 1):
+                    frame_info.linecache_source_reference = pydevd_file_utils.create_source_reference_for_linecache(
+                        original_filename)
+                source_reference = frame_info.linecache_source_reference or 0
+
+        line_info = (filename_in_utf8, mapped_lineno, applied_mapping, source_reference, {})
+        if not getattr(frame, 'IS_PLUGIN_FRAME', False):
+            frame_info.lineno_to_line_info[lineno] = line_info
+        return line_info
 
     @overrides(NetCommandFactory.make_version_message)
     def make_version_message(self, seq):
@@ -205,6 +335,20 @@ class NetCommandFactoryJson(NetCommandFactory):
         frames = []
         module_events = []
 
+        start_frame = start_frame or 0
+        if levels:
+            end_frame = start_frame + levels
+        else:
+            end_frame = None
+
+        if fmt is not None:
+            fmt_key = (bool(fmt.get('module', False)), bool(fmt.get('line', False)))
+        else:
+            fmt_key = None
+
+        # Only the frames in the requested window are created (the others are just
+        # checked for visibility to compute the total number of frames).
+        total_frames = 0
         try:
             # : :type suspended_frames_manager: SuspendedFramesManager
             suspended_frames_manager = py_db.suspended_frames_manager
@@ -216,66 +360,56 @@ class NetCommandFactoryJson(NetCommandFactory):
                 else:
                     frames_list = pydevd_frame_utils.create_frames_list_from_frame(topmost_frame)
 
-            for frame_id, frame, method_name, original_filename, filename_in_utf8, lineno, applied_mapping, show_as_current_frame in self._iter_visible_frames_info(
-                    py_db, frames_list
-                ):
-
-                try:
-                    module_name = str(frame.f_globals.get('__name__', ''))
-                except:
-                    module_name = '<unknown>'
-
-                module_events.extend(self.modules_manager.track_module(filename_in_utf8, module_name, frame))
-
-                presentation_hint = None
-                if not getattr(frame, 'IS_PLUGIN_FRAME', False):  # Never filter out plugin frames!
-                    if py_db.is_files_filter_enabled and py_db.apply_files_filter(frame, original_filename, False):
-                        continue
-
-                    if not py_db.in_project_scope(frame):
-                        presentation_hint = 'subtle'
-
-                formatted_name = self._format_frame_name(fmt, method_name, module_name, lineno, filename_in_utf8)
-                if show_as_current_frame:
+            frame_id_to_lineno = frames_list.frame_id_to_lineno
+            current_frame = frames_list.current_frame
+            for frame in frames_list:
+                frame_info = self._get_frame_info(py_db, frame)
+                if frame_info is None or frame_info.is_pydev_file:
+                    continue
+
+                frame_id = id(frame)
+                lineno = frame_id_to_lineno.get(frame_id, frame.f_lineno)
+                line_info = self._get_line_info(py_db, frame, frame_info, lineno, module_events)
+                if frame_info.is_filtered:
+                    continue
+
+                frame_index = total_frames
+                total_frames += 1
+                if frame_index < start_frame or (end_frame is not None and frame_index >= end_frame):
+                    continue
+
+                filename_in_utf8, lineno, _applied_mapping, source_reference, formatted_name_cache = line_info
+
+                formatted_name = formatted_name_cache.get(fmt_key)
+                if formatted_name is None:
+                    formatted_name = formatted_name_cache[fmt_key] = self._format_frame_name(
+                        fmt, frame_info.method_name, frame_info.module_name, lineno, filename_in_utf8)
+                if frame is current_frame:
                     formatted_name += ' (Current frame)'
-                source_reference = pydevd_file_utils.get_client_filename_source_reference(filename_in_utf8)
-
-                if not source_reference and not applied_mapping and not os.path.exists(original_filename):
-                    if getattr(frame.f_code, 'co_lnotab', None):
-                        # Create a source-reference to be used where we provide the source by decompiling the code.
-                        # Note: When the time comes to retrieve the source reference in this case, we'll
-                        # check the linecache first (see: get_decompiled_source_from_frame_id).
-                        source_reference = pydevd_file_utils.create_source_reference_for_frame_id(frame_id, original_filename)
-                    else:
-                        # Check if someone added a source reference to the linecache (Python attrs does this).
-                        if linecache.getline(original_filename, 1):
-                            source_reference = pydevd_file_utils.create_source_reference_for_linecache(
-                                original_filename)
+
+                if source_reference is None:
+                    source_reference = pydevd_file_utils.create_source_reference_for_frame_id(
+                        frame_id, frame_info.original_filename)
 
                 frames.append(pydevd_schema.StackFrame(
                     frame_id, formatted_name, lineno, column=1, source={
                         'path': filename_in_utf8,
                         'sourceReference': source_reference,
                     },
-                    presentationHint=presentation_hint).to_dict())
+                    presentationHint=frame_info.presentation_hint).to_dict())
         finally:
             topmost_frame = None
+            frame = None
+            current_frame = None
 
         for module_event in module_events:
             py_db.writer.add_command(module_event)
 
-        total_frames = len(frames)
-        stack_frames = frames
-        if bool(levels):
-            start = start_frame
-            end = min(start + levels, total_frames)
-            stack_frames = frames[start:end]
-
         response = pydevd_schema.StackTraceResponse(
             request_seq=seq,
             success=True,
             command='stackTrace',
-            body=pydevd_schema.StackTraceResponseBody(stackFrames=stack_frames, totalFrames=total_frames))
+            body=pydevd_schema.StackTraceResponseBody(stackFrames=frames, totalFrames=total_frames))
         return NetCommand(CMD_RETURN, 0, response, is_json=True)
 
     @overrides(NetCommandFactory.make_warning_message)
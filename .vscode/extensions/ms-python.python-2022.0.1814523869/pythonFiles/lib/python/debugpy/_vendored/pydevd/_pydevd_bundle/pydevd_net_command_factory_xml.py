@@ -45,6 +45,12 @@ if IS_IRONPYTHON:
 #=======================================================================================================================
 class NetCommandFactory(object):
 
+    def clear_frame_info_cache(self):
+        '''
+        Called when the information cached for frames (i.e.: files filtering, path and
+        source mappings) may no longer be valid.
+        '''
+
     def _thread_to_xml(self, thread):
         """ thread information as XML """
         name = pydevd_xml.make_valid_xml_value(thread.name)
@@ -0,0 +1,170 @@
+'''
+Coalesces many small writes to stdout/stderr into fewer, larger output messages.
+
+Note: this module is shared by pydevd (when redirecting the output to the client) and
+by the debugpy launcher (when capturing the output of the debuggee), so, it must only
+depend on the standard library.
+'''
+import os
+import sys
+import threading
+import time
+
+# The settings may be customized through the environment variables below (a window
+# of 0 disables the coalescing, so, each write is sent as soon as it's done).
+OUTPUT_COALESCE_WINDOW_ENV = 'PYDEVD_OUTPUT_COALESCE_WINDOW'  # seconds
+OUTPUT_COALESCE_MAX_SIZE_ENV = 'PYDEVD_OUTPUT_COALESCE_MAX_SIZE'  # chars
+OUTPUT_COALESCE_MAX_LINES_ENV = 'PYDEVD_OUTPUT_COALESCE_MAX_LINES'
+
+DEFAULT_OUTPUT_COALESCE_WINDOW = 0.05
+DEFAULT_OUTPUT_COALESCE_MAX_SIZE = 64 * 1024
+DEFAULT_OUTPUT_COALESCE_MAX_LINES = 1000
+
+
+def _get_env(env_key, default, convert):
+    value = os.getenv(env_key)
+    if value is None:
+        return default
+    try:
+        return convert(value)
+    except Exception:
+        # Note: this may be called from a write to the (redirected) sys.stdout/sys.stderr,
+        # so, an invalid value must not raise and the warning goes to the original stderr.
+        try:
+            stream = sys.__stderr__
+            if stream is not None:
+                stream.write(
+                    'Warning: expected the env variable: %s to be set to a %s value. Found: %s '
+                    '(using the default: %s).\n' % (env_key, convert.__name__, value, default))
+        except Exception:
+            pass
+        return default
+
+
+class OutputCoalescer(object):
+    '''
+    Buffers the output written for each category (i.e.: 'stdout' or 'stderr') and sends
+    it in a single chunk when:
+
+    - the pending output reaches `max_size` chars or `max_lines` lines;
+    - `window` seconds elapsed since the first pending write;
+    - `flush()` is called (i.e.: when a thread is suspended or the debugger exits);
+    - something is written to a different category (so, the ordering between stdout
+      and stderr is kept).
+
+    The time window is handled by a daemon thread which is only started on the first
+    write which isn't sent right away.
+    '''
+
+    def __init__(self, send, window=None, max_size=None, max_lines=None, lock=None):
+        '''
+        :param callable(category, str) send:
+            Called to send the coalesced output. It's called with the lock held, so,
+            it should not block for long.
+
+        :param float window:
+            Max time (in seconds) that output may be kept pending (0 means that writes
+            are not coalesced). If None, it's taken from the environment.
+
+        :param int max_size:
+            Max number of chars which may be kept pending. If None, it's taken from
+            the environment.
+
+        :param int max_lines:
+            Max number of lines which may be kept pending. If None, it's taken from
+            the environment.
+
+        :param lock:
+            The (reentrant) lock to be used (i.e.: pydevd passes a fork-safe lock).
+        '''
+        if window is None:
+            window = _get_env(OUTPUT_COALESCE_WINDOW_ENV, DEFAULT_OUTPUT_COALESCE_WINDOW, float)
+        if max_size is None:
+            max_size = _get_env(OUTPUT_COALESCE_MAX_SIZE_ENV, DEFAULT_OUTPUT_COALESCE_MAX_SIZE, int)
+        if max_lines is None:
+            max_lines = _get_env(OUTPUT_COALESCE_MAX_LINES_ENV, DEFAULT_OUTPUT_COALESCE_MAX_LINES, int)
+
+        self.window = window
+        self.max_size = max_size
+        self.max_lines = max_lines
+
+        self._send = send
+        self._lock = lock if lock is not None else threading.RLock()
+
+        self._category = None
+        self._chunks = []
+        self._size = 0
+        self._lines = 0
+        self._deadline = None
+
+        self._pending_event = threading.Event()
+        self._flusher_pid = None
+
+    def write(self, category, s):
+        if not s:
+            return
+
+        with self._lock:
+            if self._category != category:
+                self._flush()
+                self._category = category
+
+            self._chunks.append(s)
+            self._size += len(s)
+            self._lines += s.count('\n')
+
+            if self._size >= self.max_size or self._lines >= self.max_lines or self.window <= 0:
+                self._flush()
+
+            elif self._deadline is None:
+                self._deadline = time.time() + self.window
+                self._start_flusher_if_needed()
+                self._pending_event.set()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        # Note: the lock must be held.
+        chunks = self._chunks
+        if not chunks:
+            return
+
+        category = self._category
+        self._chunks = []
+        self._size = 0
+        self._lines = 0
+        self._deadline = None
+        self._pending_event.clear()
+
+        # The state is reset before sending, so, a write done while sending (i.e.: the
+        # send function itself writes some output) isn't lost.
+        self._send(category, chunks[0] if len(chunks) == 1 else chunks[0][:0].join(chunks))
+
+    def _start_flusher_if_needed(self):
+        # Note: the lock must be held. The pid is checked because the thread doesn't
+        # survive a fork.
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+        self._flusher_pid = pid
+
+        t = threading.Thread(target=self._run_flusher, name='pydevd.OutputCoalescer')
+        t.daemon = True
+        t.pydev_do_not_trace = True
+        t.is_pydev_daemon_thread = True
+        t.start()
+
+    def _run_flusher(self):
+        while True:
+            self._pending_event.wait()
+            with self._lock:
+                if self._deadline is None:
+                    self._pending_event.clear()
+                    continue
+                delay = self._deadline - time.time()
+                if delay <= 0:
+                    self._flush()
+                    continue
+            time.sleep(delay)
@@ -386,6 +386,7 @@ class _PyDevCommandProcessor(object):
 
         if bool(path_mappings) or force:
             pydevd_file_utils.setup_client_server_paths(path_mappings)
+            py_db.cmd_factory.clear_frame_info_cache()
 
         debug = as_json.get('debug', False)
         if debug or force:
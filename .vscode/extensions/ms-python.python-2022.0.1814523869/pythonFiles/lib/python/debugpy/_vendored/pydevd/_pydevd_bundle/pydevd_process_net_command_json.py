@@ -125,6 +125,20 @@ class PyDevJsonCommandProcessor(object):
         self._goto_targets_map = IDMap()
         self._launch_or_attach_request_done = False
 
+        # thread id -> InternalEvaluateWatchesJson last posted for the thread (the entry of
+        # a thread is removed when it's resumed, see: `_forget_watches_cmd`).
+        self._thread_id_to_watches_cmd = {}
+
+    def _forget_watches_cmd(self, thread_id):
+        '''
+        Called when a thread (or all threads if thread_id == '*') is resumed: the watches are
+        only batched while the thread is suspended (after that its frames are no longer valid).
+        '''
+        if thread_id == '*':
+            self._thread_id_to_watches_cmd.clear()
+        else:
+            self._thread_id_to_watches_cmd.pop(thread_id, None)
+
     def process_net_command_json(self, py_db, json_contents, send_response=True):
         '''
         Processes a debug adapter protocol json command.
@@ -387,6 +401,7 @@ class PyDevJsonCommandProcessor(object):
 
         if bool(path_mappings):
             pydevd_file_utils.setup_client_server_paths(path_mappings)
+            py_db.cmd_factory.clear_frame_info_cache()
 
         if self._options.redirect_output:
             py_db.enable_output_redirection(True, True)
@@ -529,6 +544,7 @@ class PyDevJsonCommandProcessor(object):
         # request a new pause which would be paused without sending any notification as
         # it didn't really run in the first place).
         py_db.threads_suspended_single_notification.add_on_resumed_callback(on_resumed)
+        self._forget_watches_cmd(thread_id)
         self.api.request_resume_thread(thread_id)
 
     def on_next_request(self, py_db, request):
@@ -543,6 +559,7 @@ class PyDevJsonCommandProcessor(object):
         else:
             step_cmd_id = CMD_STEP_OVER
 
+        self._forget_watches_cmd(thread_id)
         self.api.request_step(py_db, thread_id, step_cmd_id)
 
         response = pydevd_base_schema.build_response(request)
@@ -554,6 +571,7 @@ class PyDevJsonCommandProcessor(object):
         '''
         arguments = request.arguments  # : :type arguments: StepInArguments
         thread_id = arguments.threadId
+        self._forget_watches_cmd(thread_id)
 
         target_id = arguments.targetId
         if target_id is not None:
@@ -631,6 +649,7 @@ class PyDevJsonCommandProcessor(object):
         else:
             step_cmd_id = CMD_STEP_RETURN
 
+        self._forget_watches_cmd(thread_id)
         self.api.request_step(py_db, thread_id, step_cmd_id)
 
         response = pydevd_base_schema.build_response(request)
@@ -676,6 +695,7 @@ class PyDevJsonCommandProcessor(object):
 
         self._launch_or_attach_request_done = False
         py_db.enable_output_redirection(False, False)
+        self._forget_watches_cmd('*')
         self.api.request_disconnect(py_db, resume_threads=True)
 
         response = pydevd_base_schema.build_response(request)
@@ -967,8 +987,21 @@ class PyDevJsonCommandProcessor(object):
                 arguments.frameId)
 
             if thread_id is not None:
-                self.api.request_exec_or_evaluate_json(
-                    py_db, request, thread_id)
+                if arguments.context == 'watch':
+                    # The watches are all requested at once, so, evaluate them in a single pass
+                    # (requests are only added to a command which didn't start executing yet).
+                    watches_cmd = self._thread_id_to_watches_cmd.get(thread_id)
+                    if watches_cmd is None or not watches_cmd.add_request(request):
+                        # Threads may also be resumed (or exit) through other paths, so, drop the
+                        # commands which were already executed before posting a new one.
+                        for tid, cmd in list(self._thread_id_to_watches_cmd.items()):
+                            if cmd.has_started():
+                                del self._thread_id_to_watches_cmd[tid]
+                        self._thread_id_to_watches_cmd[thread_id] = self.api.request_evaluate_watches_json(
+                            py_db, request, thread_id)
+                else:
+                    self.api.request_exec_or_evaluate_json(
+                        py_db, request, thread_id)
             else:
                 body = EvaluateResponseBody('', 0)
                 response = pydevd_base_schema.build_response(
@@ -1160,6 +1193,7 @@ class PyDevJsonCommandProcessor(object):
                 })
             return NetCommand(CMD_RETURN, 0, response, is_json=True)
 
+        self._forget_watches_cmd(thread_id)
         self.api.request_set_next(py_db, request.seq, thread_id, CMD_SET_NEXT_STATEMENT, path, line, '*')
         # See 'NetCommandFactoryJson.make_set_next_stmnt_status_message' for response
         return None
@@ -1,6 +1,12 @@
 import sys
 from _pydevd_bundle import pydevd_xml
+from _pydevd_bundle.pydevd_constants import ForkSafeLock, IS_PY2, get_global_debugger, xrange, \
+    PYDEVD_REFERRERS_HEAP_SNAPSHOT
+from array import array
 from os.path import basename
+import bisect
+import gc
+import time
 import traceback
 from _pydev_bundle import pydev_log
 try:
@@ -64,8 +70,17 @@ def print_referrers(obj, stream=None):
 #===================================================================================================
 # get_referrer_info
 #===================================================================================================
-def get_referrer_info(searched_obj):
+def get_referrer_info(searched_obj, use_heap_snapshot=None):
+    '''
+    :param use_heap_snapshot:
+        If True, the referrers are taken from the heap snapshot (which is created on the first
+        query and kept until the process is resumed) instead of doing a full heap scan with
+        `gc.get_referrers` on each query. If None, `PYDEVD_REFERRERS_HEAP_SNAPSHOT` is used.
+    '''
     DEBUG = 0
+    if use_heap_snapshot is None:
+        use_heap_snapshot = PYDEVD_REFERRERS_HEAP_SNAPSHOT
+    snapshot = None
     if DEBUG:
         sys.stderr.write('Getting referrers info.\n')
     try:
@@ -88,8 +103,14 @@ def get_referrer_info(searched_obj):
             try:
                 if DEBUG:
                     sys.stderr.write('Getting referrers...\n')
-                import gc
-                referrers = gc.get_referrers(searched_obj)
+                if use_heap_snapshot:
+                    snapshot = get_heap_snapshot()
+                if snapshot is not None and searched_obj in snapshot:
+                    referrers = snapshot.get_referrers(searched_obj)
+                else:
+                    # Objects created after the snapshot was taken must still do a full scan.
+                    snapshot = None
+                    referrers = gc.get_referrers(searched_obj)
             except:
                 pydev_log.exception()
                 ret = ['<xml>\n']
@@ -124,13 +145,15 @@ def get_referrer_info(searched_obj):
             if DEBUG:
                 sys.stderr.write('Searching Referrers of obj with id="%s"\n' % (obj_id,))
 
-            ret.append(pydevd_xml.var_to_xml(
-                searched_obj,
-                'Referrers of obj with id="%s"' % (obj_id,)))
+            description = 'Referrers of obj with id="%s"' % (obj_id,)
+            if snapshot is not None:
+                description += ' (from %s)' % (snapshot.describe(),)
+            ret.append(pydevd_xml.var_to_xml(searched_obj, description))
             ret.append('</for>\n')
 
             curr_frame = sys._getframe()
             all_objects = None
+            heap_snapshot_nodes = _heap_snapshot._nodes if _heap_snapshot is not None else None
 
             for r in referrers:
                 try:
@@ -139,7 +162,7 @@ def get_referrer_info(searched_obj):
                 except:
                     pass  # Ok: unhashable type checked...
 
-                if r is referrers:
+                if r is referrers or r is heap_snapshot_nodes:
                     continue
 
                 if r is curr_frame.f_locals:
@@ -174,10 +197,15 @@ def get_referrer_info(searched_obj):
                     # Ok, there's one annoying thing: many times we find it in a dict from an instance,
                     # but with this we don't directly have the class, only the dict, so, to workaround that
                     # we iterate over all reachable objects ad check if one of those has the given dict.
-                    if all_objects is None:
-                        all_objects = gc.get_objects()
-
-                    for x in all_objects:
+                    if snapshot is not None:
+                        # With the snapshot only the referrers of the dict must be checked.
+                        candidates = snapshot.get_referrers(r)
+                    else:
+                        if all_objects is None:
+                            all_objects = gc.get_objects()
+                        candidates = all_objects
+
+                    for x in candidates:
                         try:
                             if getattr(x, '__dict__', None) is r:
                                 r = x
@@ -214,7 +242,10 @@ def get_referrer_info(searched_obj):
 
             # If we have any exceptions, don't keep dangling references from this frame to any of our objects.
             all_objects = None
+            candidates = None
+            heap_snapshot_nodes = None
             referrers = None
+            snapshot = None
             searched_obj = None
             r = None
             x = None
@@ -240,3 +271,374 @@ def get_referrer_info(searched_obj):
     ret = ''.join(ret)
     return ret
 
+
+#===================================================================================================
+# HeapSnapshot
+#===================================================================================================
+# Note: arrays are used so that the index is compact (a multi-GB process may have tens of millions
+# of objects and references).
+_NODE_TYPECODE = 'i'
+_OFFSET_TYPECODE = 'l'
+_ID_TYPECODE = 'L' if IS_PY2 else 'Q'
+
+
+def _is_pydev_frame(obj, frame_type=type(sys._getframe())):
+    return type(obj) is frame_type and basename(obj.f_code.co_filename).startswith('pydev')
+
+
+class _IdIndex(object):
+    '''
+    Maps `id(obj)` to the node index of the object in the snapshot using sorted arrays (which
+    are much more compact than a dict with the same contents).
+    '''
+
+    def __init__(self, id_to_node):
+        ids = sorted(id_to_node)
+        self._nodes = array(_NODE_TYPECODE, [id_to_node[obj_id] for obj_id in ids])
+        try:
+            self._ids = array(_ID_TYPECODE, ids)
+        except OverflowError:
+            # i.e.: Python 2 on 64-bit Windows (where a C long only has 32 bits).
+            self._ids = ids
+
+    def get(self, obj_id, default=None):
+        ids = self._ids
+        i = bisect.bisect_left(ids, obj_id)
+        if i != len(ids) and ids[i] == obj_id:
+            return self._nodes[i]
+        return default
+
+    def get_memory_size(self):
+        ids = self._ids
+        if isinstance(ids, list):
+            ids_size = sys.getsizeof(ids) + sum(sys.getsizeof(obj_id) for obj_id in ids)
+        else:
+            ids_size = len(ids) * ids.itemsize
+        return ids_size + len(self._nodes) * self._nodes.itemsize
+
+
+class HeapSnapshot(object):
+    '''
+    A reverse-reference index of the heap built with a single pass over `gc.get_objects()`.
+
+    Each object found is a node (the objects tracked by the gc come first, followed by the
+    untracked objects they refer to, such as strings and ints) and the references are kept in
+    CSR form (the references of node `i` are `targets[offsets[i]:offsets[i + 1]]`), in both
+    directions, so that referrers, path to root and retained size queries don't need to scan
+    the whole heap again.
+
+    Note: the snapshot keeps all the objects alive and doesn't see changes done after it was
+    taken, so, it should only be kept while the process is suspended (see: `get_heap_snapshot`).
+    '''
+
+    def __init__(self):
+        initial_time = time.time()
+        nodes = gc.get_objects()
+        tracked_count = len(nodes)
+
+        id_to_node = {}
+        for i, obj in enumerate(nodes):
+            id_to_node[id(obj)] = i
+
+        # Forward references (grouped by the referrer as the objects are visited in order).
+        get_referents = gc.get_referents
+        get_node = id_to_node.get
+        referents = array(_NODE_TYPECODE)
+        referents_append = referents.append
+        referents_offsets = array(_OFFSET_TYPECODE, [0])
+        for i in xrange(tracked_count):
+            obj = nodes[i]
+            # Our own frames (and this snapshot) aren't considered as referrers.
+            if obj is not self and not _is_pydev_frame(obj):
+                for referent in get_referents(obj):
+                    node = get_node(id(referent))
+                    if node is None:
+                        # Untracked objects (i.e.: str, int) are added as new nodes.
+                        node = id_to_node[id(referent)] = len(nodes)
+                        nodes.append(referent)
+                    referents_append(node)
+            referents_offsets.append(len(referents))
+        obj = referent = None
+
+        # Reverse references (a counting sort of the forward references by the referent, so,
+        # the referrers of each node are kept sorted).
+        nodes_count = len(nodes)
+        referrers_offsets = array(_OFFSET_TYPECODE, [0]) * (nodes_count + 1)
+        for node in referents:
+            referrers_offsets[node + 1] += 1
+        for i in xrange(nodes_count):
+            referrers_offsets[i + 1] += referrers_offsets[i]
+
+        positions = referrers_offsets[:-1]
+        referrers = array(_NODE_TYPECODE, [0]) * len(referents)
+        for i in xrange(tracked_count):
+            for j in xrange(referents_offsets[i], referents_offsets[i + 1]):
+                node = referents[j]
+                position = positions[node]
+                referrers[position] = i
+                positions[node] = position + 1
+        positions = None
+
+        self._nodes = nodes
+        self._tracked_count = tracked_count
+        self._id_index = _IdIndex(id_to_node)
+        id_to_node = None
+        self._referents = referents
+        self._referents_offsets = referents_offsets
+        self._referrers = referrers
+        self._referrers_offsets = referrers_offsets
+
+        self.elapsed_time = time.time() - initial_time
+        self.memory_size = self._get_memory_size()
+
+    def _get_memory_size(self):
+        size = sys.getsizeof(self._nodes) + self._id_index.get_memory_size()
+        for arr in (self._referents, self._referents_offsets, self._referrers, self._referrers_offsets):
+            size += len(arr) * arr.itemsize
+        return size
+
+    def describe(self):
+        return 'heap snapshot with %s objects and %s references, taken in %.2fs, using %.1f MB' % (
+            len(self._nodes), len(self._referents), self.elapsed_time, self.memory_size / (1024. * 1024.))
+
+    def __contains__(self, obj):
+        return self._get_node(obj) is not None
+
+    def _get_node(self, obj):
+        node = self._id_index.get(id(obj))
+        if node is not None and self._nodes[node] is not obj:
+            return None  # Some other object which got the same id after the snapshot was taken.
+        return node
+
+    def _iter_referrer_nodes(self, node):
+        # Note: a referrer which has more than one reference to the node is only reported once
+        # (the referrers of a node are sorted, so, duplicates are adjacent).
+        referrers = self._referrers
+        last = -1
+        for i in xrange(self._referrers_offsets[node], self._referrers_offsets[node + 1]):
+            referrer = referrers[i]
+            if referrer != last:
+                last = referrer
+                yield referrer
+
+    def _iter_referent_nodes(self, node):
+        if node >= self._tracked_count:
+            return iter(())
+        return iter(self._referents[self._referents_offsets[node]:self._referents_offsets[node + 1]])
+
+    def get_referrers(self, obj):
+        '''
+        :return list:
+            The objects which refer to the given object (as `gc.get_referrers` would).
+        '''
+        node = self._get_node(obj)
+        if node is None:
+            return []
+        nodes = self._nodes
+        return [nodes[referrer] for referrer in self._iter_referrer_nodes(node)]
+
+    def get_path_to_root(self, obj, roots=None):
+        '''
+        :param roots:
+            The objects to be considered as roots. If None, the loaded modules and the frames of
+            the running threads (without the debugger frames) are used.
+
+        :return list:
+            The shortest chain of references from a root to the given object (the first element is
+            the root and the last one is the object) or an empty list if no root refers to it.
+        '''
+        node = self._get_node(obj)
+        if node is None:
+            return []
+
+        if roots is None:
+            roots = [module for module in list(sys.modules.values()) if module is not None]
+            for frame in sys._current_frames().values():
+                while frame is not None:
+                    if not _is_pydev_frame(frame):
+                        roots.append(frame)
+                    frame = frame.f_back
+
+        root_nodes = set()
+        for root in roots:
+            root_node = self._get_node(root)
+            if root_node is not None:
+                root_nodes.add(root_node)
+
+        # Breadth-first search following the referrers.
+        came_from = {node: None}
+        level = [node]
+        while level:
+            next_level = []
+            for current in level:
+                if current in root_nodes:
+                    path = []
+                    while current is not None:
+                        path.append(self._nodes[current])
+                        current = came_from[current]
+                    return path
+
+                for referrer in self._iter_referrer_nodes(current):
+                    if referrer not in came_from:
+                        came_from[referrer] = current
+                        next_level.append(referrer)
+            level = next_level
+        return []
+
+    def get_retained_size(self, obj):
+        '''
+        :return tuple(int, int):
+            The size in bytes (as given by `sys.getsizeof`) and the number of the objects which are
+            only reachable through the given object (including itself).
+
+        Note: objects in a reference cycle which is only reachable through the given object are
+        not counted, so, this is a lower bound of what would be freed if the object was collected.
+        '''
+        node = self._get_node(obj)
+        if node is None:
+            return 0, 0
+
+        retained = set([node])
+        pending = set()
+        stack = [node]
+        while True:
+            while stack:
+                current = stack.pop()
+                for referent in self._iter_referent_nodes(current):
+                    if referent in retained:
+                        continue
+                    if all(referrer in retained for referrer in self._iter_referrer_nodes(referent)):
+                        retained.add(referent)
+                        pending.discard(referent)
+                        stack.append(referent)
+                    else:
+                        pending.add(referent)
+
+            # Objects checked before some of its referrers were retained must be checked again.
+            for referent in list(pending):
+                if all(referrer in retained for referrer in self._iter_referrer_nodes(referent)):
+                    retained.add(referent)
+                    pending.discard(referent)
+                    stack.append(referent)
+            if not stack:
+                break
+
+        size = 0
+        nodes = self._nodes
+        for current in retained:
+            try:
+                size += sys.getsizeof(nodes[current])
+            except:
+                pass  # Ignore errors from broken __sizeof__ implementations.
+        return size, len(retained)
+
+
+_heap_snapshot_lock = ForkSafeLock()
+_heap_snapshot = None
+
+
+def get_heap_snapshot(create=True):
+    '''
+    :return HeapSnapshot:
+        The current heap snapshot (if `create` is True and there's no snapshot, a new one is taken).
+
+    Note: the snapshot is only kept when running under the debugger (which frees it whenever a
+    thread is resumed -- see: `PyDB._do_wait_suspend`). Otherwise a new snapshot is taken
+    on each call (and `None` is returned if `create` is False).
+    '''
+    global _heap_snapshot
+    with _heap_snapshot_lock:
+        if _heap_snapshot is not None or not create:
+            return _heap_snapshot
+
+        snapshot = HeapSnapshot()
+        pydev_log.info('Created %s.', snapshot.describe())
+        if get_global_debugger() is not None:
+            _heap_snapshot = snapshot
+        return snapshot
+
+
+def clear_heap_snapshot():
+    global _heap_snapshot
+    with _heap_snapshot_lock:
+        if _heap_snapshot is not None:
+            pydev_log.info('Freeing heap snapshot.')
+            _heap_snapshot = None
+
+
+#===================================================================================================
+# get_path_to_root_info
+#===================================================================================================
+def get_path_to_root_info(searched_obj):
+    '''
+    :return str:
+        An xml with the chain of references from a root (a module or the frame of a running
+        thread) to the given object (computed with the heap snapshot).
+    '''
+    try:
+        snapshot = get_heap_snapshot()
+        path = snapshot.get_path_to_root(searched_obj)
+        if len(path) > 1:
+            path.pop()  # The searched object itself is already in the <for> node.
+
+        ret = ['<xml>\n']
+
+        ret.append('<for>\n')
+        ret.append(pydevd_xml.var_to_xml(
+            searched_obj,
+            'Path to root of obj with id="%s" (from %s)' % (id(searched_obj), snapshot.describe())))
+        ret.append('</for>\n')
+
+        for r in path:
+            ret.append(pydevd_xml.var_to_xml(
+                r,
+                str(type(r)),
+                additional_in_xml=' id="%s"' % (id(r),)))
+    except:
+        pydev_log.exception()
+        ret = ['<xml>\n']
+
+        ret.append('<for>\n')
+        ret.append(pydevd_xml.var_to_xml(
+            searched_obj,
+            'Error getting path to root for:',
+            additional_in_xml=' id="%s"' % (id(searched_obj),)))
+        ret.append('</for>\n')
+    finally:
+        path = None
+        r = None
+        snapshot = None
+
+    ret.append('</xml>')
+    return ''.join(ret)
+
+
+#===================================================================================================
+# get_retained_size_info
+#===================================================================================================
+def get_retained_size_info(searched_obj):
+    '''
+    :return str:
+        An xml with the size retained by the given object (computed with the heap snapshot).
+    '''
+    try:
+        snapshot = get_heap_snapshot()
+        size, count = snapshot.get_retained_size(searched_obj)
+        description = 'Retained size of obj with id="%s": %s bytes in %s objects (from %s)' % (
+            id(searched_obj), size, count, snapshot.describe())
+    except:
+        pydev_log.exception()
+        description = 'Error getting retained size for:'
+    finally:
+        snapshot = None
+
+    ret = ['<xml>\n']
+
+    ret.append('<for>\n')
+    ret.append(pydevd_xml.var_to_xml(
+        searched_obj,
+        description,
+        additional_in_xml=' id="%s"' % (id(searched_obj),)))
+    ret.append('</for>\n')
+    ret.append('</xml>')
+    return ''.join(ret)
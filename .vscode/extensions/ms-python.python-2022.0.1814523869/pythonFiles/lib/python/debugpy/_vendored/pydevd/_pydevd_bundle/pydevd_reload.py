@@ -14,6 +14,12 @@ things such as singletons or end up with a second representation of the same cla
 
 4. Reload hooks were changed
 
+5. When only the bodies of functions/methods changed, the module isn't re-executed: the new source is
+compiled and compared with the code of the previous version of the module (the code compiled in the
+last reload, the contents in the linecache or the bytecode cached when the module was imported) and
+just the code of the functions which changed is replaced. If some other change is found (i.e.: a
+new/removed function, a changed constant or class statement), the module is re-executed as usual.
+
 These changes make it more stable, especially in the common case (where in a debug session only the
 contents of a function are changed), besides providing flexibility for users that want to extend
 on it.
@@ -100,9 +106,13 @@ target namespace.
 
 from _pydev_bundle.pydev_imports import execfile
 from _pydevd_bundle import pydevd_dont_trace
+import linecache
+import os
+import sys
+import time
 import types
 from _pydev_bundle import pydev_log
-from _pydevd_bundle.pydevd_constants import get_global_debugger
+from _pydevd_bundle.pydevd_constants import get_global_debugger, IS_PY2
 
 NO_DEBUG = 0
 LEVEL1 = 1
@@ -155,6 +165,161 @@ def code_objects_equal(code0, code1):
     return True
 
 
+_CO_OPTIMIZED = 0x0001
+
+# filename -> code of the module compiled in the last reload.
+_filename_to_reloaded_code = {}
+
+
+def _is_class_body(code):
+    # Note: the class body is the only code which isn't optimized (it uses LOAD_NAME).
+    return not code.co_flags & _CO_OPTIMIZED
+
+
+def _code_key(code):
+    '''
+    :return tuple:
+        A key to compare code objects (which doesn't consider the line information).
+    '''
+    consts = []
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            consts.append(_code_key(const))
+        else:
+            consts.append((type(const), const))
+
+    return (
+        code.co_name,
+        code.co_code,
+        tuple(consts),
+        code.co_names,
+        code.co_varnames,
+        code.co_freevars,
+        code.co_cellvars,
+        code.co_flags,
+        code.co_argcount,
+        getattr(code, 'co_kwonlyargcount', 0),
+        getattr(code, 'co_posonlyargcount', 0),
+        getattr(code, 'co_exceptiontable', None),
+    )
+
+
+def _structure_key(code):
+    '''
+    :return tuple:
+        A key for the code of a module or class body where the code of each function defined
+        in it is replaced by its name (so, it's the same if only the body of functions changed).
+    '''
+    consts = []
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            if _is_class_body(const):
+                consts.append(('<class>', _structure_key(const)))
+            else:
+                consts.append(('<function>', const.co_name, const.co_freevars))
+        else:
+            consts.append((type(const), const))
+
+    return (
+        code.co_code,
+        tuple(consts),
+        code.co_names,
+        code.co_varnames,
+        code.co_cellvars,
+        code.co_flags,
+        getattr(code, 'co_exceptiontable', None),
+    )
+
+
+def _iter_function_codes(code):
+    '''
+    Provides the code of the functions defined in the given module or class body code (and in
+    the class bodies inside it).
+    '''
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            if _is_class_body(const):
+                for c in _iter_function_codes(const):
+                    yield c
+            else:
+                yield const
+
+
+def _iter_inner_codes(code):
+    '''
+    Provides the code of all the functions/classes defined inside the given code (recursively).
+    '''
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            yield const
+            for c in _iter_inner_codes(const):
+                yield c
+
+
+def _get_defined_names(code):
+    '''
+    :return set(str):
+        The names of the functions and classes defined directly in the given module code.
+    '''
+    return set(
+        const.co_name for const in code.co_consts
+        if isinstance(const, types.CodeType) and not const.co_name.startswith('<'))
+
+
+def _load_cached_module_code(mod, source_filename, source_contents):
+    '''
+    :return code|None:
+        The code from the bytecode cache (.pyc) for the module (which may be from a previous
+        version of the source) or None if it's not available or if it was compiled from the
+        current contents of the source (i.e.: the .pyc was updated after the source changed,
+        so, it's not the version which is loaded).
+    '''
+    import marshal
+    import struct
+    if IS_PY2:
+        import imp
+        cached_filename = source_filename + 'c'
+        magic = imp.get_magic()
+        header_size = 8
+    else:
+        import importlib.util
+        cached_filename = getattr(mod, '__cached__', None)
+        if not cached_filename:
+            cached_filename = importlib.util.cache_from_source(source_filename)
+        magic = importlib.util.MAGIC_NUMBER
+        header_size = 16 if sys.version_info[:2] >= (3, 7) else 12
+
+    try:
+        with open(cached_filename, 'rb') as stream:
+            data = stream.read()
+        source_stat = os.stat(source_filename)
+    except (IOError, OSError):
+        return None
+
+    if data[:len(magic)] != magic or len(data) < header_size:
+        return None
+
+    # The header has the mtime/size of the source it was compiled from (or its hash).
+    header = data[len(magic):header_size]
+    if header_size == 16:
+        flags = struct.unpack('<I', header[:4])[0]
+        header = header[4:]
+        if flags & 0x1:
+            if header == importlib.util.source_hash(source_contents):
+                return None
+            header = None
+    if header is not None:
+        mtime = struct.unpack('<I', header[:4])[0]
+        if mtime == int(source_stat.st_mtime) & 0xFFFFFFFF:
+            if len(header) < 8 or struct.unpack('<I', header[4:8])[0] == source_stat.st_size & 0xFFFFFFFF:
+                return None
+
+    code = marshal.loads(data[header_size:])
+    if not isinstance(code, types.CodeType):
+        return None
+    return code
+
+
 #=======================================================================================================================
 # xreload
 #=======================================================================================================================
@@ -165,8 +330,14 @@ def xreload(mod):
 
     Returns a boolean indicating whether a change was done.
     """
+    initial_time = time.time()
     r = Reload(mod)
-    r.apply()
+    if r.apply_selective():
+        notify_info0('Patched %s function(s) in %.3fs (module not re-executed).' % (
+            r.patched_functions, time.time() - initial_time))
+    else:
+        r.apply()
+        notify_info0('Module re-executed in %.3fs.' % (time.time() - initial_time,))
     found_change = r.found_change
     r = None
     pydevd_dont_trace.clear_trace_filter_cache()
@@ -204,6 +375,10 @@ class Reload:
             self.mod_filename = mod.__file__ if mod is not None else None
 
         self.found_change = False
+        self.patched_functions = 0
+
+        # The code compiled from the current contents of the file (see: apply_selective).
+        self._new_code = None
 
     def apply(self):
         mod = self.mod
@@ -255,9 +430,196 @@ class Reload:
             for c in self._on_finish_callbacks:
                 c()
             del self._on_finish_callbacks[:]
+
+            if self._new_code is not None:
+                _filename_to_reloaded_code[self._get_source_filename()] = self._new_code
         except:
             pydev_log.exception()
 
+    def _get_source_filename(self):
+        filename = self.mod_filename
+        if filename.endswith(('.pyc', '.pyo')):
+            filename = filename[:-1]
+        return filename
+
+    def _iter_previous_module_codes(self, source_filename, source_contents):
+        # The code compiled in the last reload.
+        code = _filename_to_reloaded_code.get(source_filename)
+        if code is not None:
+            yield code
+
+        # The contents of the file when it was last loaded in the linecache.
+        entry = linecache.cache.get(source_filename)
+        if entry is not None and len(entry) == 4:
+            try:
+                yield compile(''.join(entry[2]), source_filename, 'exec', 0, True)
+            except Exception:
+                pass
+
+        # The code cached when the module was imported.
+        try:
+            code = _load_cached_module_code(self.mod, source_filename, source_contents)
+        except Exception:
+            code = None
+        if code is not None:
+            yield code
+
+    def _collect_functions(self, obj, owner, namespace_file, functions, visited):
+        if isinstance(obj, (classmethod, staticmethod)):
+            obj = obj.__func__
+
+        elif isinstance(obj, property):
+            for func in (obj.fget, obj.fset, obj.fdel):
+                if func is not None:
+                    self._collect_functions(func, owner, namespace_file, functions, visited)
+            return
+
+        if id(obj) in visited:
+            return
+
+        if isinstance(obj, types.FunctionType):
+            visited.add(id(obj))
+            if obj.__globals__.get('__file__') == namespace_file:
+                functions.append((obj, owner))
+
+                # i.e.: The function wrapped by a decorator.
+                for cell in obj.__closure__ or ():
+                    try:
+                        contents = cell.cell_contents
+                    except ValueError:  # Empty cell.
+                        continue
+                    if isinstance(contents, types.FunctionType):
+                        self._collect_functions(contents, owner, namespace_file, functions, visited)
+
+        elif isinstance(obj, type) or (IS_PY2 and isinstance(obj, types.ClassType)):
+            visited.add(id(obj))
+            if obj.__dict__.get('__module__') in (self.mod_name, '__main_reloaded__'):
+                for attr in list(obj.__dict__.values()):
+                    self._collect_functions(attr, obj, namespace_file, functions, visited)
+
+    def apply_selective(self):
+        '''
+        Reloads the module by just replacing the code of the functions/methods which changed.
+
+        :return bool:
+            True if the reload was done and False if the module must be re-executed (i.e.: some
+            change other than a function body was found or the previous version of the module
+            is not available).
+        '''
+        try:
+            source_filename = self._get_source_filename()
+            with open(source_filename, 'rb') as stream:
+                contents = stream.read()
+            new_code = self._new_code = compile(contents, source_filename, 'exec', 0, True)
+
+            modns = self.mod.__dict__
+            functions = []
+            visited = set()
+            namespace_file = modns.get('__file__')
+            for obj in list(modns.values()):
+                self._collect_functions(obj, None, namespace_file, functions, visited)
+
+            # The functions and classes defined in the module (the ones bound to their own name).
+            defined_names = set()
+            for name, obj in modns.items():
+                if isinstance(obj, types.FunctionType):
+                    if obj.__globals__.get('__file__') != namespace_file:
+                        continue
+                elif isinstance(obj, type) or (IS_PY2 and isinstance(obj, types.ClassType)):
+                    if obj.__dict__.get('__module__') not in (self.mod_name, '__main_reloaded__'):
+                        continue
+                else:
+                    continue
+                if getattr(obj, '__name__', None) == name:
+                    defined_names.add(name)
+
+            for previous_code in self._iter_previous_module_codes(source_filename, contents):
+                if previous_code == new_code:
+                    # i.e.: The linecache or the .pyc were already updated with the new contents
+                    # (comparing it with the new code would find no changes).
+                    continue
+
+                previous_names = _get_defined_names(previous_code)
+                if not defined_names.issubset(previous_names) or not previous_names.issubset(modns):
+                    continue  # Not the version of the module currently loaded.
+
+                inner_keys = set(_code_key(code) for code in _iter_inner_codes(previous_code))
+                for func, _owner in functions:
+                    if _code_key(func.__code__) not in inner_keys:
+                        break  # Not the version of the module currently loaded.
+                else:
+                    break
+            else:
+                notify_info0('Previous version of %s not available (re-executing module).' % (self.mod_name,))
+                return False
+
+            if _structure_key(previous_code) != _structure_key(new_code):
+                notify_info0('Structure of %s changed (re-executing module).' % (self.mod_name,))
+                return False
+
+            previous_function_codes = list(_iter_function_codes(previous_code))
+            new_function_codes = list(_iter_function_codes(new_code))
+
+            # previous code key -> new code
+            key_to_new_code = {}
+            changed_keys = set()
+            for previous, new in zip(previous_function_codes, new_function_codes):
+                key = _code_key(previous)
+                new_key = _code_key(new)
+                if key in key_to_new_code:
+                    if _code_key(key_to_new_code[key]) != new_key:
+                        # Two equal functions were changed differently (we don't know which
+                        # is which).
+                        notify_info0('Unable to match changed functions in %s (re-executing module).' % (self.mod_name,))
+                        return False
+                    continue
+                key_to_new_code[key] = new
+                if key != new_key:
+                    changed_keys.add(key)
+
+            to_patch = []
+            patched_keys = set()
+            for func, owner in functions:
+                key = _code_key(func.__code__)
+                new = key_to_new_code.get(key)
+                if new is None:
+                    continue  # i.e.: A closure (not updated, as in a regular reload).
+                patched_keys.add(key)
+                if func.__code__ != new:
+                    # Note: also done if just the line information changed.
+                    to_patch.append((func, owner, new, key in changed_keys))
+
+            if changed_keys - patched_keys:
+                notify_info0('Changed function not found in %s (re-executing module).' % (self.mod_name,))
+                return False
+
+            self._on_finish_callbacks = []
+            owners = set()
+            for func, owner, new, changed in to_patch:
+                func.__code__ = new
+                if changed:
+                    notify_info0('Updated function code:', func)
+                    self.found_change = True
+                    self.patched_functions += 1
+                    if owner is not None and id(owner) not in owners:
+                        owners.add(id(owner))
+                        self._handle_namespace(owner, is_class_namespace=True)
+                else:
+                    notify_info2('Updated function lines:', func)
+
+            if self.found_change:
+                self._handle_namespace(modns)
+
+            for c in self._on_finish_callbacks:
+                c()
+            del self._on_finish_callbacks[:]
+
+            _filename_to_reloaded_code[source_filename] = new_code
+            return True
+        except:
+            pydev_log.exception('Error reloading only the changed functions (re-executing module).')
+            return False
+
     def _handle_namespace(self, namespace, is_class_namespace=False):
         on_finish = None
         if is_class_namespace:
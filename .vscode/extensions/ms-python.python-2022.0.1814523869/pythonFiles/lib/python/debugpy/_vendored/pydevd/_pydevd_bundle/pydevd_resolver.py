@@ -8,6 +8,7 @@ import traceback
 from os.path import basename
 
 from functools import partial
+from itertools import islice
 from _pydevd_bundle.pydevd_constants import dict_iter_items, dict_keys, xrange, IS_PY36_OR_GREATER, \
     MethodWrapperType, RETURN_VALUES_DICT, DebugInfoHolder, IS_PYPY, GENERATED_LEN_ATTR_NAME
 from _pydevd_bundle.pydevd_safe_repr import SafeRepr
@@ -288,14 +289,58 @@ class DictResolver:
 
         :return list(tuple(name:str, value:object, evaluateName:str))
         '''
-        ret = []
+        ret = self.get_indexed_contents_debug_adapter_protocol(dct, 0, MAX_ITEMS_TO_HANDLE, fmt=fmt)
+        if len(dct) > MAX_ITEMS_TO_HANDLE:
+            ret.append((TOO_LARGE_ATTR, TOO_LARGE_MSG, None))
 
-        i = 0
+        # in case the class extends built-in type and has some additional fields
+        from_default_resolver = defaultResolver.get_contents_debug_adapter_protocol(dct, fmt)
+
+        if from_default_resolver:
+            ret = from_default_resolver + ret
+
+        if self.sort_keys:
+            ret = sorted(ret, key=lambda tup: sorted_attributes_key(tup[0]))
+
+        ret.append(_get_len_entry(dct))
+        return ret
+
+    def get_indexed_len(self, dct):
+        return len(dct)
+
+    def get_named_contents_debug_adapter_protocol(self, dct, fmt=None):
+        '''
+        :return list(tuple(name:str, value:object, evaluateName:str)):
+            The entries which aren't items of the dict (i.e.: fields from subclasses and the len).
+        '''
+        ret = defaultResolver.get_contents_debug_adapter_protocol(dct, fmt)
+        ret.append(_get_len_entry(dct))
+        return ret
+
+    def get_indexed_contents_debug_adapter_protocol(self, dct, start, count, fmt=None):
+        '''
+        Provides the items in the range [start, start + count) so that a client can page through
+        large dicts.
+
+        The order is the dict iteration order (or the order of the sorted keys if `sort_keys` is
+        set, in which case all the items must be visited to get a page).
+
+        :return list(tuple(name:str, value:object, evaluateName:str))
+        '''
+        if self.sort_keys:
+            ret = self._get_items_debug_adapter_protocol(dict_iter_items(dct), fmt)
+            ret.sort(key=lambda tup: sorted_attributes_key(tup[0]))
+            return ret[start:start + count]
+
+        return self._get_items_debug_adapter_protocol(
+            islice(dict_iter_items(dct), start, start + count), fmt)
+
+    def _get_items_debug_adapter_protocol(self, items, fmt):
+        ret = []
 
         found_representations = set()
 
-        for key, val in dict_iter_items(dct):
-            i += 1
+        for key, val in items:
             key_as_str = self.key_to_str(key, fmt)
 
             if key_as_str not in found_representations:
@@ -313,20 +358,7 @@ class DictResolver:
             else:
                 eval_key_str = None
             ret.append((key_as_str, val, eval_key_str))
-            if i > MAX_ITEMS_TO_HANDLE:
-                ret.append((TOO_LARGE_ATTR, TOO_LARGE_MSG, None))
-                break
-
-        # in case the class extends built-in type and has some additional fields
-        from_default_resolver = defaultResolver.get_contents_debug_adapter_protocol(dct, fmt)
-
-        if from_default_resolver:
-            ret = from_default_resolver + ret
-
-        if self.sort_keys:
-            ret = sorted(ret, key=lambda tup: sorted_attributes_key(tup[0]))
 
-        ret.append((GENERATED_LEN_ATTR_NAME, len(dct), partial(_apply_evaluate_name, evaluate_name='len(%s)')))
         return ret
 
     def get_dictionary(self, dict):
@@ -353,6 +385,17 @@ def _apply_evaluate_name(parent_name, evaluate_name):
     return evaluate_name % (parent_name,)
 
 
+def _get_len_entry(obj):
+    return (GENERATED_LEN_ATTR_NAME, len(obj), partial(_apply_evaluate_name, evaluate_name='len(%s)'))
+
+
+def _get_index_format_str(l, fmt):
+    format_str = '%0' + str(int(len(str(l - 1)))) + 'd'
+    if fmt is not None and fmt.get('hex', False):
+        format_str = '0x%0' + str(int(len(hex(l).lstrip('0x')))) + 'x'
+    return format_str
+
+
 #=======================================================================================================================
 # TupleResolver
 #=======================================================================================================================
@@ -380,35 +423,56 @@ class TupleResolver:  # to enumerate tuples and lists
 
         :return list(tuple(name:str, value:object, evaluateName:str))
         '''
-        l = len(lst)
-        ret = []
-
-        format_str = '%0' + str(int(len(str(l - 1)))) + 'd'
-        if fmt is not None and fmt.get('hex', False):
-            format_str = '0x%0' + str(int(len(hex(l).lstrip('0x')))) + 'x'
-
-        for i, item in enumerate(lst):
-            ret.append((format_str % i, item, '[%s]' % i))
-
-            if i > MAX_ITEMS_TO_HANDLE:
-                ret.append((TOO_LARGE_ATTR, TOO_LARGE_MSG, None))
-                break
+        ret = self.get_indexed_contents_debug_adapter_protocol(lst, 0, MAX_ITEMS_TO_HANDLE, fmt=fmt)
+        if len(lst) > MAX_ITEMS_TO_HANDLE:
+            ret.append((TOO_LARGE_ATTR, TOO_LARGE_MSG, None))
 
         # Needed in case the class extends the built-in type and has some additional fields.
         from_default_resolver = defaultResolver.get_contents_debug_adapter_protocol(lst, fmt=fmt)
         if from_default_resolver:
             ret = from_default_resolver + ret
 
-        ret.append((GENERATED_LEN_ATTR_NAME, len(lst), partial(_apply_evaluate_name, evaluate_name='len(%s)')))
+        ret.append(_get_len_entry(lst))
         return ret
 
+    def get_indexed_len(self, lst):
+        return len(lst)
+
+    def get_named_contents_debug_adapter_protocol(self, lst, fmt=None):
+        '''
+        :return list(tuple(name:str, value:object, evaluateName:str)):
+            The entries which aren't items of the sequence (i.e.: fields from subclasses and the len).
+        '''
+        ret = defaultResolver.get_contents_debug_adapter_protocol(lst, fmt=fmt)
+        ret.append(_get_len_entry(lst))
+        return ret
+
+    def get_indexed_contents_debug_adapter_protocol(self, lst, start, count, fmt=None):
+        '''
+        Provides the items in the range [start, start + count) so that a client can page
+        through large sequences (lists and tuples are sliced directly, so, only the requested
+        items are visited).
+
+        :return list(tuple(name:str, value:object, evaluateName:str))
+        '''
+        format_str = _get_index_format_str(len(lst), fmt)
+
+        end = start + count
+        # Note: use the base class __getitem__ so that subclasses overriding it don't
+        # interfere with what's shown.
+        if isinstance(lst, list):
+            items = list.__getitem__(lst, slice(start, end))
+        elif isinstance(lst, tuple):
+            items = tuple.__getitem__(lst, slice(start, end))
+        else:
+            items = islice(lst, start, end)
+
+        return [(format_str % i, item, '[%s]' % i) for i, item in enumerate(items, start)]
+
     def get_dictionary(self, var, fmt={}):
-        l = len(var)
         d = {}
 
-        format_str = '%0' + str(int(len(str(l - 1)))) + 'd'
-        if fmt is not None and fmt.get('hex', False):
-            format_str = '0x%0' + str(int(len(hex(l).lstrip('0x')))) + 'x'
+        format_str = _get_index_format_str(len(var), fmt)
 
         for i, item in enumerate(var):
             d[format_str % i] = item
@@ -433,22 +497,33 @@ class SetResolver:
     '''
 
     def get_contents_debug_adapter_protocol(self, obj, fmt=None):
-        ret = []
-
-        for i, item in enumerate(obj):
-            ret.append((str(id(item)), item, None))
-
-            if i > MAX_ITEMS_TO_HANDLE:
-                ret.append((TOO_LARGE_ATTR, TOO_LARGE_MSG, None))
-                break
+        ret = self.get_indexed_contents_debug_adapter_protocol(obj, 0, MAX_ITEMS_TO_HANDLE, fmt=fmt)
+        if len(obj) > MAX_ITEMS_TO_HANDLE:
+            ret.append((TOO_LARGE_ATTR, TOO_LARGE_MSG, None))
 
         # Needed in case the class extends the built-in type and has some additional fields.
         from_default_resolver = defaultResolver.get_contents_debug_adapter_protocol(obj, fmt=fmt)
         if from_default_resolver:
             ret = from_default_resolver + ret
-        ret.append((GENERATED_LEN_ATTR_NAME, len(obj), partial(_apply_evaluate_name, evaluate_name='len(%s)')))
+        ret.append(_get_len_entry(obj))
         return ret
 
+    def get_indexed_len(self, obj):
+        return len(obj)
+
+    def get_named_contents_debug_adapter_protocol(self, obj, fmt=None):
+        ret = defaultResolver.get_contents_debug_adapter_protocol(obj, fmt=fmt)
+        ret.append(_get_len_entry(obj))
+        return ret
+
+    def get_indexed_contents_debug_adapter_protocol(self, obj, start, count, fmt=None):
+        '''
+        Provides the items in the range [start, start + count) (in the set iteration order).
+
+        :return list(tuple(name:str, value:object, evaluateName:str))
+        '''
+        return [(str(id(item)), item, None) for item in islice(obj, start, start + count)]
+
     def resolve(self, var, attribute):
         if attribute in (GENERATED_LEN_ATTR_NAME, TOO_LARGE_ATTR):
             return None
@@ -4,6 +4,7 @@
 
 # Gotten from ptvsd for supporting the format expected there.
 import sys
+import time
 from _pydevd_bundle.pydevd_constants import IS_PY2, IS_PY36_OR_GREATER
 import locale
 from _pydev_bundle import pydev_log
@@ -18,6 +19,59 @@ try:
 except NameError:
     xrange = range
 
+# Shown instead of the value when the budget to compute values was exceeded.
+BUDGET_EXCEEDED_REPR = '<Not computed: time/size budget to show variables exceeded (expand again to compute)>'
+
+
+class SafeReprBudget(object):
+    '''
+    A budget (wall-clock time and size of the output) shared by all the representations
+    computed to answer a single request.
+
+    Note: a single `__repr__` from user code can't be interrupted, so, the time budget may
+    be exceeded, but after that no other `__repr__` will be called.
+    '''
+
+    def __init__(self, time_budget=None, size_budget=None):
+        '''
+        :param float time_budget:
+            The time (in seconds) available or None/<= 0 to have no time budget.
+
+        :param int size_budget:
+            The number of chars available or None/<= 0 to have no size budget.
+        '''
+        self.deadline = time.time() + time_budget if time_budget and time_budget > 0 else None
+        self.remaining_size = size_budget if size_budget and size_budget > 0 else None
+        self.exceeded = False
+
+    def is_exceeded(self):
+        if not self.exceeded:
+            if self.deadline is not None and time.time() > self.deadline:
+                self.exceeded = True
+            elif self.remaining_size is not None and self.remaining_size <= 0:
+                self.exceeded = True
+        return self.exceeded
+
+    def consume(self, value):
+        '''
+        Accounts for the size of the given value, truncating it if it exceeds the
+        remaining size.
+
+        :return str:
+            The value (possibly truncated).
+        '''
+        remaining_size = self.remaining_size
+        if remaining_size is not None:
+            try:
+                size = len(value)
+            except Exception:
+                return value
+            if size > remaining_size:
+                self.exceeded = True
+                value = value[:max(0, remaining_size)] + '...'
+            self.remaining_size = remaining_size - size
+        return value
+
 
 class SafeRepr(object):
     # Can be used to override the encoding from locale.getpreferredencoding()
@@ -84,6 +138,15 @@ class SafeRepr(object):
     convert_to_hex = False
     raw_value = False
 
+    # If a SafeReprBudget is set, the representation of the remaining items is skipped
+    # after it's exceeded (note that the size is accounted by the SafeReprBudget.consume
+    # called by the user of the SafeRepr).
+    budget = None
+
+    # If a dict is set, the representations computed by calling `repr()` are memoized in
+    # it (key: ('repr', id(obj), inner, convert_to_hex, raw_value), value: (obj, parts)).
+    memo = None
+
     def __call__(self, obj):
         '''
         :param object obj:
@@ -106,6 +169,12 @@ class SafeRepr(object):
     def _repr(self, obj, level):
         '''Returns an iterable of the parts in the final repr string.'''
 
+        budget = self.budget
+        if budget is not None and budget.is_exceeded():
+            if level == 0:
+                return (BUDGET_EXCEEDED_REPR,)
+            return ('...',)
+
         try:
             obj_repr = type(obj).__repr__
         except Exception:
@@ -343,8 +412,20 @@ class SafeRepr(object):
                 yield part
 
     def _repr_other(self, obj, level):
-        return self._repr_obj(obj, level,
-                              self.maxother_inner, self.maxother_outer)
+        memo = self.memo
+        if memo is None:
+            return self._repr_obj(obj, level,
+                                  self.maxother_inner, self.maxother_outer)
+
+        key = ('repr', id(obj), level > 0, self.convert_to_hex, self.raw_value)
+        entry = memo.get(key)
+        if entry is not None and entry[0] is obj:
+            return entry[1]
+
+        parts = tuple(self._repr_obj(obj, level,
+                                     self.maxother_inner, self.maxother_outer))
+        memo[key] = (obj, parts)
+        return parts
 
     def _repr_obj(self, obj, level, limit_inner, limit_outer):
         try:
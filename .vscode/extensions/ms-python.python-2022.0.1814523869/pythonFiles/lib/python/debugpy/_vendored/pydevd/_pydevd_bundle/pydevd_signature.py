@@ -7,11 +7,30 @@ except ImportError:
 else:
     trace._warn = lambda *args: None  # workaround for http://bugs.python.org/issue17143 (PY-8706)
 
+import json
 import os
+import sys
+import time
+from collections import OrderedDict
+from _pydev_imps._pydev_saved_modules import threading
 from _pydevd_bundle.pydevd_comm import CMD_SIGNATURE_CALL_TRACE, NetCommand
 from _pydevd_bundle import pydevd_xml
-from _pydevd_bundle.pydevd_constants import xrange, dict_iter_items
+from _pydevd_bundle.pydevd_constants import xrange, dict_iter_items, as_float_in_env
 from _pydevd_bundle.pydevd_utils import get_clsname_for_code
+from pydevd_file_utils import get_abs_path_real_path_and_base_from_frame, NORM_PATHS_AND_BASE_CONTAINER
+
+# When profiling signatures, the first calls of each code object are always collected and
+# afterwards only 1 in SIGNATURE_SAMPLE_EVERY calls.
+SIGNATURE_SAMPLE_FIRST_CALLS = int(as_float_in_env('PYDEVD_SIGNATURE_SAMPLE_FIRST_CALLS', 10))
+SIGNATURE_SAMPLE_EVERY = max(1, int(as_float_in_env('PYDEVD_SIGNATURE_SAMPLE_EVERY', 100)))
+
+# Maximum number of signatures kept in the CallSignatureCache (least recently used are discarded).
+SIGNATURE_CACHE_MAX_SIZE = int(as_float_in_env('PYDEVD_SIGNATURE_CACHE_MAX_SIZE', 10000))
+
+# When profiling signatures, messages are sent in batches of this size (or when the
+# batch is older than SIGNATURE_BATCH_INTERVAL seconds).
+SIGNATURE_BATCH_SIZE = int(as_float_in_env('PYDEVD_SIGNATURE_BATCH_SIZE', 50))
+SIGNATURE_BATCH_INTERVAL = as_float_in_env('PYDEVD_SIGNATURE_BATCH_INTERVAL', 0.5)
 
 
 class Signature(object):
@@ -87,10 +106,165 @@ def _modname(path):
 
 class SignatureFactory(object):
 
-    def __init__(self):
+    def __init__(self, profile_file=None):
+        '''
+        :param str profile_file:
+            If given, signatures are profiled: calls are sampled, messages are batched and the
+            aggregated argument and return types for each function are saved to this file
+            (as json) when `export` is called.
+        '''
         self._caller_cache = {}
         self.cache = CallSignatureCache()
 
+        self.profile_file = profile_file
+        self._code_to_calls = {}
+        self._code_to_returns = {}
+
+        # (file, name) -> {'calls': int, 'args': OrderedDict(name -> {type: count}), 'returns': {type: count}}
+        self._function_stats = {}
+
+        self._pending_messages = []
+        self._pending_since = 0
+        self._flush_timer = None
+
+        # Signatures are collected in any thread (this lock guards the cache, the stats and
+        # the pending messages).
+        self.lock = threading.RLock()
+
+    def start(self, dbg):
+        '''
+        Starts collecting the signatures of the calls/returns in all the threads started from
+        now on (and in the current thread).
+
+        Note: a profile function is used (and not the tracing used for breakpoints/stepping) as
+        it receives the call and return events of all the frames without the line events.
+        '''
+
+        def profile_func(frame, event, arg):
+            if (event != 'call' and event != 'return') or dbg.pydb_disposed:
+                return
+            try:
+                try:
+                    filename = NORM_PATHS_AND_BASE_CONTAINER[frame.f_code.co_filename][0]
+                except:
+                    filename = get_abs_path_real_path_and_base_from_frame(frame)[0]
+
+                if event == 'call':
+                    send_signature_call_trace(dbg, frame, filename)
+                else:
+                    send_signature_return_trace(dbg, frame, filename, arg)
+            except:
+                # Errors must not get to the user code.
+                pydev_log.exception_once('Error collecting the signature of: %s', frame.f_code.co_name)
+
+        threading.setprofile(profile_func)
+        sys.setprofile(profile_func)
+
+    def _sample(self, code_to_count, code):
+        if self.profile_file is None:
+            return True
+        count = code_to_count.get(code, 0) + 1
+        code_to_count[code] = count
+        return count <= SIGNATURE_SAMPLE_FIRST_CALLS or count % SIGNATURE_SAMPLE_EVERY == 0
+
+    def sample_call(self, code):
+        '''
+        :return bool: whether the signature of the current call to the given code should be collected.
+        '''
+        return self._sample(self._code_to_calls, code)
+
+    def sample_return(self, code):
+        return self._sample(self._code_to_returns, code)
+
+    def _get_function_stats(self, signature):
+        key = (signature.file, signature.name)
+        try:
+            return self._function_stats[key]
+        except KeyError:
+            stats = self._function_stats[key] = {'calls': 0, 'args': OrderedDict(), 'returns': {}}
+            return stats
+
+    def _add_to_stats(self, signature):
+        stats = self._get_function_stats(signature)
+        if signature.return_type is not None:
+            returns = stats['returns']
+            returns[signature.return_type] = returns.get(signature.return_type, 0) + 1
+        else:
+            stats['calls'] += 1
+            args = stats['args']
+            for name, type_name in signature.args:
+                arg_types = args.setdefault(name, {})
+                arg_types[type_name] = arg_types.get(type_name, 0) + 1
+
+    def send_signature(self, dbg, signature):
+        if self.profile_file is None:
+            writer = dbg.writer
+            if writer is not None:
+                writer.add_command(create_signature_message(signature))
+            return
+
+        with self.lock:
+            self._add_to_stats(signature)
+            pending = self._pending_messages
+            if not pending:
+                self._pending_since = time.time()
+                self._start_flush_timer(dbg)
+            pending.append(signature)
+            if len(pending) >= SIGNATURE_BATCH_SIZE or time.time() - self._pending_since >= SIGNATURE_BATCH_INTERVAL:
+                self.flush(dbg)
+
+    def _start_flush_timer(self, dbg):
+        # Note: the lock must be held. The timer makes sure that the last signatures of a batch
+        # are sent even if no other signature is collected afterwards.
+        if self._flush_timer is not None:
+            return
+
+        def on_timer():
+            with self.lock:
+                self._flush_timer = None
+                self.flush(dbg)
+
+        t = self._flush_timer = threading.Timer(SIGNATURE_BATCH_INTERVAL, on_timer)
+        t.daemon = True
+        t.pydev_do_not_trace = True
+        t.is_pydev_daemon_thread = True
+        t.start()
+
+    def flush(self, dbg):
+        '''
+        Sends the pending signatures (if any).
+        '''
+        with self.lock:
+            pending = self._pending_messages
+            if pending:
+                self._pending_messages = []
+                writer = dbg.writer
+                if writer is not None:
+                    writer.add_command(create_signatures_message(pending))
+
+    def export(self, profile_file=None):
+        '''
+        Saves the aggregated argument and return types for each function seen as json.
+        '''
+        if profile_file is None:
+            profile_file = self.profile_file
+
+        functions = []
+        with self.lock:
+            function_stats = sorted(dict_iter_items(self._function_stats))
+
+        for (filename, name), stats in function_stats:
+            functions.append({
+                'file': filename,
+                'name': name,
+                'sampled_calls': stats['calls'],
+                'args': [{'name': arg_name, 'types': arg_types} for arg_name, arg_types in dict_iter_items(stats['args'])],
+                'returns': stats['returns'],
+            })
+
+        with open(profile_file, 'w') as stream:
+            json.dump({'functions': functions}, stream, indent=1, sort_keys=True)
+
     def create_signature(self, frame, filename, with_args=True):
         try:
             _, modulename, funcname = self.file_module_function_of(frame)
@@ -140,26 +314,33 @@ def get_frame_info(frame):
 
 
 class CallSignatureCache(object):
+    '''
+    Keeps the signatures already sent (up to `max_size` signatures: the least recently used
+    ones are discarded afterwards).
+    '''
 
-    def __init__(self):
-        self.cache = {}
+    def __init__(self, max_size=SIGNATURE_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self.cache = OrderedDict()
 
     def add(self, signature):
-        filename, name, args_type = get_signature_info(signature)
-        calls_from_file = self.cache.setdefault(filename, {})
-        name_calls = calls_from_file.setdefault(name, {})
-        name_calls[args_type] = None
+        cache = self.cache
+        cache[get_signature_info(signature)] = None
+        while len(cache) > self.max_size:
+            cache.popitem(last=False)
 
     def is_in_cache(self, signature):
-        filename, name, args_type = get_signature_info(signature)
-        if args_type in self.cache.get(filename, {}).get(name, {}):
+        key = get_signature_info(signature)
+        cache = self.cache
+        if key in cache:
+            # Move to the end (most recently used).
+            del cache[key]
+            cache[key] = None
             return True
         return False
 
 
-def create_signature_message(signature):
-    cmdTextList = ["<xml>"]
-
+def _append_signature_xml(cmdTextList, signature):
     cmdTextList.append('<call_signature file="%s" name="%s">' % (pydevd_xml.make_valid_xml_value(signature.file), pydevd_xml.make_valid_xml_value(signature.name)))
 
     for arg in signature.args:
@@ -168,34 +349,58 @@ def create_signature_message(signature):
     if signature.return_type is not None:
         cmdTextList.append('<return type="%s"></return>' % (pydevd_xml.make_valid_xml_value(signature.return_type)))
 
-    cmdTextList.append("</call_signature></xml>")
+    cmdTextList.append("</call_signature>")
+
+
+def create_signature_message(signature):
+    return create_signatures_message([signature])
+
+
+def create_signatures_message(signatures):
+    cmdTextList = ["<xml>"]
+    for signature in signatures:
+        _append_signature_xml(cmdTextList, signature)
+    cmdTextList.append("</xml>")
     cmdText = ''.join(cmdTextList)
     return NetCommand(CMD_SIGNATURE_CALL_TRACE, 0, cmdText)
 
 
 def send_signature_call_trace(dbg, frame, filename):
-    if dbg.signature_factory and dbg.in_project_scope(frame):
-        signature = dbg.signature_factory.create_signature(frame, filename)
+    signature_factory = dbg.signature_factory
+    if signature_factory and dbg.in_project_scope(frame):
+        if not signature_factory.sample_call(frame.f_code):
+            return False
+
+        signature = signature_factory.create_signature(frame, filename)
         if signature is not None:
-            if dbg.signature_factory.cache is not None:
-                if not dbg.signature_factory.cache.is_in_cache(signature):
-                    dbg.signature_factory.cache.add(signature)
-                    dbg.writer.add_command(create_signature_message(signature))
-                    return True
+            with signature_factory.lock:
+                if signature_factory.cache is not None:
+                    if not signature_factory.cache.is_in_cache(signature):
+                        signature_factory.cache.add(signature)
+                        signature_factory.send_signature(dbg, signature)
+                        return True
+                    else:
+                        # we don't send signature if it is cached
+                        if signature_factory.profile_file is not None:
+                            signature_factory._add_to_stats(signature)
+                        return False
                 else:
-                    # we don't send signature if it is cached
-                    return False
-            else:
-                dbg.writer.add_command(create_signature_message(signature))
-                return True
+                    signature_factory.send_signature(dbg, signature)
+                    return True
     return False
 
 
 def send_signature_return_trace(dbg, frame, filename, return_value):
-    if dbg.signature_factory and dbg.in_project_scope(frame):
-        signature = dbg.signature_factory.create_signature(frame, filename, with_args=False)
+    signature_factory = dbg.signature_factory
+    if signature_factory and dbg.in_project_scope(frame):
+        if not signature_factory.sample_return(frame.f_code):
+            return False
+
+        signature = signature_factory.create_signature(frame, filename, with_args=False)
+        if signature is None:
+            return False
         signature.return_type = get_type_of_value(return_value, recursive=True)
-        dbg.writer.add_command(create_signature_message(signature))
+        signature_factory.send_signature(dbg, signature)
         return True
 
     return False
@@ -5,8 +5,9 @@ from _pydevd_bundle.pydevd_constants import get_frame, dict_items, RETURN_VALUES
     dict_iter_items, ForkSafeLock, GENERATED_LEN_ATTR_NAME, silence_warnings_decorator
 from _pydevd_bundle.pydevd_xml import get_variable_details, get_type
 from _pydev_bundle.pydev_override import overrides
-from _pydevd_bundle.pydevd_resolver import sorted_attributes_key, TOO_LARGE_ATTR, get_var_scope
-from _pydevd_bundle.pydevd_safe_repr import SafeRepr
+from _pydevd_bundle.pydevd_resolver import sorted_attributes_key, TOO_LARGE_ATTR, get_var_scope, \
+    MAX_ITEMS_TO_HANDLE
+from _pydevd_bundle.pydevd_safe_repr import SafeRepr, BUDGET_EXCEEDED_REPR
 from _pydev_bundle import pydev_log
 from _pydevd_bundle import pydevd_vars
 from _pydev_bundle.pydev_imports import Exec
@@ -22,6 +23,10 @@ class _AbstractVariable(object):
     value = None
     evaluate_name = None
 
+    # Set when registered in the _FramesTracker: dict with the values already computed while
+    # the thread is suspended (see: SafeRepr.memo).
+    repr_memo = None
+
     def __init__(self, py_db):
         assert py_db is not None
         self.py_db = py_db
@@ -35,10 +40,14 @@ class _AbstractVariable(object):
     def get_variable_reference(self):
         return id(self.value)
 
-    def get_var_data(self, fmt=None, **safe_repr_custom_attrs):
+    def get_var_data(self, fmt=None, budget=None, **safe_repr_custom_attrs):
         '''
         :param dict fmt:
             Format expected by the DAP (keys: 'hex': bool, 'rawString': bool)
+
+        :param SafeReprBudget budget:
+            If given, the value is only computed if the budget wasn't exceeded (and its
+            size is accounted in the budget).
         '''
         safe_repr = SafeRepr()
         if fmt is not None:
@@ -46,9 +55,35 @@ class _AbstractVariable(object):
             safe_repr.raw_value = fmt.get('rawString', False)
         for key, val in safe_repr_custom_attrs.items():
             setattr(safe_repr, key, val)
+        safe_repr.budget = budget
+
+        memo_key = None
+        memo_entry = None
+        repr_memo = self.repr_memo
+        if repr_memo is not None and not safe_repr_custom_attrs:
+            safe_repr.memo = repr_memo
+            memo_key = ('var', id(self.value), safe_repr.convert_to_hex, safe_repr.raw_value)
+            memo_entry = repr_memo.get(memo_key)
+            if memo_entry is not None and memo_entry[0] is not self.value:
+                memo_entry = None
+
+        if memo_entry is not None:
+            type_name, _type_qualifier, _is_exception_on_eval, resolver, value = get_variable_details(
+                self.value, evaluate_full_value=False)
+            value = memo_entry[1]
+
+        elif budget is not None and budget.is_exceeded():
+            type_name, _type_qualifier, _is_exception_on_eval, resolver, value = get_variable_details(
+                self.value, evaluate_full_value=False)
+            value = BUDGET_EXCEEDED_REPR
 
-        type_name, _type_qualifier, _is_exception_on_eval, resolver, value = get_variable_details(
-            self.value, to_string=safe_repr)
+        else:
+            type_name, _type_qualifier, _is_exception_on_eval, resolver, value = get_variable_details(
+                self.value, to_string=safe_repr)
+            if budget is not None:
+                value = budget.consume(value)
+            if memo_key is not None and (budget is None or not budget.exceeded):
+                repr_memo[memo_key] = (self.value, value)
 
         is_raw_string = type_name in ('str', 'unicode', 'bytes', 'bytearray')
 
@@ -83,6 +118,16 @@ class _AbstractVariable(object):
 
         if resolver is not None:  # I.e.: it's a container
             var_data['variablesReference'] = self.get_variable_reference()
+
+            # Only large containers are paged (the client then asks for the indexed
+            # variables in chunks through `start` and `count`).
+            if hasattr(resolver, 'get_indexed_len'):
+                try:
+                    indexed_len = resolver.get_indexed_len(self.value)
+                except:
+                    indexed_len = 0
+                if indexed_len > MAX_ITEMS_TO_HANDLE:
+                    var_data['indexedVariables'] = indexed_len
         else:
             var_data['variablesReference'] = 0  # It's mandatory (although if == 0 it doesn't have children).
 
@@ -91,9 +136,27 @@ class _AbstractVariable(object):
 
         return var_data
 
-    def get_children_variables(self, fmt=None, scope=None):
+    def get_children_variables(self, fmt=None, scope=None, filter=None, start=None, count=None):
+        '''
+        :param str filter:
+            'indexed' or 'named' to get only those variables or None to get all (DAP VariablesArguments.filter).
+
+        :param int start:
+            The index of the first variable to return (DAP VariablesArguments.start).
+
+        :param int count:
+            The number of variables to return (if None or 0 all variables are returned).
+        '''
         raise NotImplementedError()
 
+    def _slice_children(self, children_variables, start, count):
+        if start or count:
+            start = start or 0
+            if count:
+                return children_variables[start:start + count]
+            return children_variables[start:]
+        return children_variables
+
     def get_child_variable_named(self, name, fmt=None, scope=None):
         for child_var in self.get_children_variables(fmt=fmt, scope=scope):
             if child_var.get_name() == name:
@@ -156,12 +219,27 @@ class _ObjectVariable(_AbstractVariable):
 
     @silence_warnings_decorator
     @overrides(_AbstractVariable.get_children_variables)
-    def get_children_variables(self, fmt=None, scope=None):
+    def get_children_variables(self, fmt=None, scope=None, filter=None, start=None, count=None):
         _type, _type_name, resolver = get_type(self.value)
 
         children_variables = []
         if resolver is not None:  # i.e.: it's a container.
-            if hasattr(resolver, 'get_contents_debug_adapter_protocol'):
+            paged = False
+            if filter == 'indexed':
+                if not hasattr(resolver, 'get_indexed_contents_debug_adapter_protocol'):
+                    return children_variables
+
+                # Only the requested page is visited.
+                start = start or 0
+                if not count:
+                    count = max(0, resolver.get_indexed_len(self.value) - start)
+                lst = resolver.get_indexed_contents_debug_adapter_protocol(self.value, start, count, fmt=fmt)
+                paged = True
+
+            elif filter == 'named' and hasattr(resolver, 'get_named_contents_debug_adapter_protocol'):
+                lst = resolver.get_named_contents_debug_adapter_protocol(self.value, fmt=fmt)
+
+            elif hasattr(resolver, 'get_contents_debug_adapter_protocol'):
                 # The get_contents_debug_adapter_protocol needs to return sorted.
                 lst = resolver.get_contents_debug_adapter_protocol(self.value, fmt=fmt)
             else:
@@ -192,6 +270,9 @@ class _ObjectVariable(_AbstractVariable):
                     variable = _ObjectVariable(self.py_db, key, val, self._register_variable, frame=self.frame)
                     children_variables.append(variable)
 
+            if not paged:
+                children_variables = self._slice_children(children_variables, start, count)
+
         return children_variables
 
     def change_variable(self, name, value, py_db, fmt=None):
@@ -261,8 +342,12 @@ class _FrameVariable(_AbstractVariable):
 
     @silence_warnings_decorator
     @overrides(_AbstractVariable.get_children_variables)
-    def get_children_variables(self, fmt=None, scope=None):
+    def get_children_variables(self, fmt=None, scope=None, filter=None, start=None, count=None):
         children_variables = []
+        if filter == 'indexed':
+            # Frames only have named variables.
+            return children_variables
+
         if scope is not None:
             assert isinstance(scope, ScopeRequest)
             scope = scope.scope
@@ -300,7 +385,7 @@ class _FrameVariable(_AbstractVariable):
             # Groups have priority over other variables.
             children_variables = group_variables + children_variables
 
-        return children_variables
+        return self._slice_children(children_variables, start, count)
 
 
 class _FramesTracker(object):
@@ -337,9 +422,14 @@ class _FramesTracker(object):
 
         self._variable_reference_to_variable = {}
 
+        # Values already computed for the variables while the thread is suspended (cleared
+        # when something may have changed them -- i.e.: on setVariable/evaluate in the repl).
+        self.repr_memo = {}
+
     def _register_variable(self, variable):
         variable_reference = variable.get_variable_reference()
         self._variable_reference_to_variable[variable_reference] = variable
+        variable.repr_memo = self.repr_memo
 
     def obtain_as_variable(self, name, value, evaluate_name=None, frame=None):
         if evaluate_name is None:
@@ -415,6 +505,7 @@ class _FramesTracker(object):
             self._main_thread_id = None
             self._suspended_frames_manager = None
             self._variable_reference_to_variable.clear()
+            self.repr_memo.clear()
 
     def get_frames_list(self, thread_id):
         with self._lock:
@@ -482,6 +573,14 @@ class SuspendedFramesManager(object):
     def get_frame_tracker(self, thread_id):
         return self._thread_id_to_tracker.get(thread_id)
 
+    def clear_repr_memo(self):
+        '''
+        Clears the values computed for the variables in all the suspended threads (must be
+        called when some value may have been changed).
+        '''
+        for tracker in list(self._thread_id_to_tracker.values()):
+            tracker.repr_memo.clear()
+
     def get_variable(self, variable_reference):
         '''
         :raises KeyError
@@ -3,13 +3,14 @@
 """
 import pickle
 from _pydevd_bundle.pydevd_constants import get_frame, get_current_thread_id, xrange, IS_PY2, \
-    iter_chars, silence_warnings_decorator
+    iter_chars, silence_warnings_decorator, ForkSafeLock
 
-from _pydevd_bundle.pydevd_xml import ExceptionOnEvaluate, get_type, var_to_xml
+from _pydevd_bundle.pydevd_xml import ExceptionOnEvaluate, get_type, var_to_xml, str_values_to_xml
 from _pydev_bundle import pydev_log
 import codecs
 import os
 import functools
+from collections import OrderedDict
 from _pydevd_bundle.pydevd_thread_lifecycle import resume_threads, mark_thread_suspended, suspend_all_threads
 from _pydevd_bundle.pydevd_comm_constants import CMD_SET_BREAK
 
@@ -257,7 +258,7 @@ def _expression_to_evaluate(expression):
 def eval_in_context(expression, globals, locals):
     result = None
     try:
-        result = eval(_expression_to_evaluate(expression), globals, locals)
+        result = eval(compile_as_eval(expression), globals, locals)
     except (Exception, KeyboardInterrupt):
         etype, result, tb = sys.exc_info()
         result = ExceptionOnEvaluate(result, etype, tb)
@@ -361,6 +362,13 @@ def _evaluate_with_timeouts(original_func):
     return new_func
 
 
+# The same expressions (i.e.: watches) are usually evaluated again on each stop, so, the
+# related code objects are kept (up to the max size: least recently used ones are discarded).
+_COMPILED_EXPRESSIONS_CACHE_MAX_SIZE = 500
+_compiled_expressions_cache = OrderedDict()
+_compiled_expressions_cache_lock = ForkSafeLock()
+
+
 def compile_as_eval(expression):
     '''
 
@@ -371,7 +379,22 @@ def compile_as_eval(expression):
 
     :raises Exception if the expression cannot be evaluated.
     '''
-    return compile(_expression_to_evaluate(expression), '<string>', 'eval')
+    key = (expression.__class__, expression)
+    cache = _compiled_expressions_cache
+    with _compiled_expressions_cache_lock:
+        compiled = cache.pop(key, None)
+        if compiled is not None:
+            # Move to the end (most recently used).
+            cache[key] = compiled
+            return compiled
+
+    compiled = compile(_expression_to_evaluate(expression), '<string>', 'eval')
+
+    with _compiled_expressions_cache_lock:
+        cache[key] = compiled
+        while len(cache) > _COMPILED_EXPRESSIONS_CACHE_MAX_SIZE:
+            cache.popitem(last=False)
+    return compiled
 
 
 @_evaluate_with_timeouts
@@ -450,6 +473,77 @@ def evaluate_expression(py_db, frame, expression, is_exec):
         del frame
 
 
+class _EvaluatedExpressions(object):
+    '''
+    The expressions passed to `_evaluate_expressions` (shown as the expression currently being
+    evaluated if some evaluation takes too long).
+    '''
+
+    def __init__(self, expressions):
+        self.expressions = expressions
+        self.current = ''
+
+    def __str__(self):
+        return '%s' % (self.current,)
+
+
+@_evaluate_with_timeouts
+def _evaluate_expressions(py_db, frame, expressions, is_exec):
+    assert not is_exec, 'Only evals may be done in a batch.'
+    if frame is None:
+        return [None] * len(expressions.expressions)
+
+    # Note: the globals/locals are gathered just once for all the expressions (see the comments in
+    # `evaluate_expression` for why a new dict is used for the globals).
+    updated_globals = {}
+    updated_globals.update(frame.f_globals)
+
+    try:
+        results = []
+        for expression in expressions.expressions:
+            expressions.current = expression
+
+            # The locals may have been changed by a previous expression (i.e.: walrus assignment).
+            f_locals = frame.f_locals
+            updated_globals.update(f_locals)
+
+            if IS_PY2 and isinstance(expression, unicode):
+                expression = expression.replace(u'@LINE@', u'\n')
+            else:
+                expression = expression.replace('@LINE@', '\n')
+
+            ret = eval_in_context(expression, updated_globals, f_locals)
+            try:
+                is_exception_returned = ret.__class__ == ExceptionOnEvaluate
+            except:
+                pass
+            else:
+                if not is_exception_returned:
+                    pydevd_save_locals.save_locals(frame)
+            results.append(ret)
+        return results
+    finally:
+        # Should not be kept alive if an exception happens and this frame is kept in the stack.
+        del updated_globals
+        del frame
+        f_locals = None
+
+
+def evaluate_expressions(py_db, frame, expressions):
+    '''
+    Evaluates many expressions (i.e.: all the watches) in the given frame in a single pass (the
+    timeouts are set up and the frame globals are collected only once for all the expressions).
+
+    :param list(str) expressions:
+        The expressions to be evaluated.
+
+    :return list:
+        The result of each expression (an ExceptionOnEvaluate if the evaluation failed or None
+        if the frame is None).
+    '''
+    return _evaluate_expressions(py_db, frame, _EvaluatedExpressions(expressions), False)
+
+
 def change_attr_expression(frame, attr, expression, dbg, value=SENTINEL_VALUE):
     '''Changes some attribute in a given frame.
     '''
@@ -513,8 +607,22 @@ def table_like_struct_to_xml(array, name, roffset, coffset, rows, cols, format):
     return "<xml>%s</xml>" % xml
 
 
+def _format_table_values(format, values):
+    '''
+    :param values:
+        A numpy array (or a list) with the values to be formatted.
+
+    :return list(str):
+        `format % value` for each value (the whole block is formatted at once).
+    '''
+    if values.__class__ is list:
+        return [format % value for value in values]
+
+    import numpy
+    return numpy.char.mod(format, values).tolist()
+
+
 def array_to_xml(array, roffset, coffset, rows, cols, format):
-    xml = ""
     rows = min(rows, MAXIMUM_ARRAY_SIZE)
     cols = min(cols, MAXIMUM_ARRAY_SIZE)
 
@@ -535,27 +643,31 @@ def array_to_xml(array, roffset, coffset, rows, cols, format):
             array = array[roffset:]
             rows = min(rows, len(array))
 
-    xml += "<arraydata rows=\"%s\" cols=\"%s\"/>" % (rows, cols)
+    # Take the requested window with a single slice and format it all at once.
+    if rows == 0 or cols == 0:
+        # i.e.: the offset is past the end (only the rows are written, without any value).
+        cells = [[]] * rows
+    elif rows == 1 and cols == 1:
+        cells = [[format % array[0]]]
+    elif rows == 1 or cols == 1:
+        block = array[:max(rows, cols)]
+        if block.ndim > 1:
+            block = block[:, 0]
+        if len(block) != max(rows, cols):
+            raise IndexError('Window (%s, %s) out of bounds for shape %s' % (rows, cols, array.shape))
+        values = _format_table_values(format, block)
+        cells = [values] if rows == 1 else [[value] for value in values]
+    else:
+        block = array[:rows, :cols]
+        if block.shape != (rows, cols):
+            raise IndexError('Window (%s, %s) out of bounds for shape %s' % (rows, cols, array.shape))
+        cells = _format_table_values(format, block)
+
+    xml = ["<arraydata rows=\"%s\" cols=\"%s\"/>" % (rows, cols)]
     for row in xrange(rows):
-        xml += "<row index=\"%s\"/>" % to_string(row)
-        for col in xrange(cols):
-            value = array
-            if rows == 1 or cols == 1:
-                if rows == 1 and cols == 1:
-                    value = array[0]
-                else:
-                    if rows == 1:
-                        dim = col
-                    else:
-                        dim = row
-                    value = array[dim]
-                    if "ndarray" in str(type(value)):
-                        value = value[0]
-            else:
-                value = array[row][col]
-            value = format % value
-            xml += var_to_xml(value, '')
-    return xml
+        xml.append("<row index=\"%s\"/>" % to_string(row))
+        xml.extend(str_values_to_xml(cells[row]))
+    return ''.join(xml)
 
 
 def array_to_meta_xml(array, name, format):
@@ -662,7 +774,8 @@ def dataframe_to_xml(df, name, roffset, coffset, rows, cols, format):
     df = df.iloc[roffset: roffset + rows, coffset: coffset + cols]
     rows, cols = df.shape
 
-    xml += "<headerdata rows=\"%s\" cols=\"%s\">\n" % (rows, cols)
+    xml = [xml]
+    xml.append("<headerdata rows=\"%s\" cols=\"%s\">\n" % (rows, cols))
     format = format.replace('%', '')
     col_formats = []
 
@@ -681,17 +794,26 @@ def dataframe_to_xml(df, name, roffset, coffset, rows, cols, format):
         col_formats.append('%' + fmt)
         bounds = col_bounds[col]
 
-        xml += '<colheader index=\"%s\" label=\"%s\" type=\"%s\" format=\"%s\" max=\"%s\" min=\"%s\" />\n' % \
-               (str(col), get_label(df.axes[1].values[col]), dtype, fmt, bounds[1], bounds[0])
+        xml.append('<colheader index=\"%s\" label=\"%s\" type=\"%s\" format=\"%s\" max=\"%s\" min=\"%s\" />\n' % \
+               (str(col), get_label(df.axes[1].values[col]), dtype, fmt, bounds[1], bounds[0]))
     for row, label in enumerate(iter(df.axes[0])):
-        xml += "<rowheader index=\"%s\" label = \"%s\"/>\n" % \
-               (str(row), get_label(label))
-    xml += "</headerdata>\n"
-    xml += "<arraydata rows=\"%s\" cols=\"%s\"/>\n" % (rows, cols)
+        xml.append("<rowheader index=\"%s\" label = \"%s\"/>\n" % \
+               (str(row), get_label(label)))
+    xml.append("</headerdata>\n")
+    xml.append("<arraydata rows=\"%s\" cols=\"%s\"/>\n" % (rows, cols))
+
+    # Format each column at once: numeric columns are formatted as numpy arrays and the
+    # others from the same values that `df.iat` would provide (i.e.: Timestamp).
+    col_values = []
+    for col in xrange(cols):
+        series = df.iloc[:, col]
+        if series.dtype.kind in "biufc":
+            values = series.values
+        else:
+            values = series.tolist()
+        col_values.append(_format_table_values(col_formats[col], values))
+
     for row in xrange(rows):
-        xml += "<row index=\"%s\"/>\n" % str(row)
-        for col in xrange(cols):
-            value = df.iat[row, col]
-            value = col_formats[col] % value
-            xml += var_to_xml(value, '')
-    return xml
+        xml.append("<row index=\"%s\"/>\n" % str(row))
+        xml.extend(str_values_to_xml([values[row] for values in col_values]))
+    return ''.join(xml)
@@ -1,6 +1,7 @@
 from _pydev_bundle import pydev_log
 from _pydevd_bundle import pydevd_extension_utils
 from _pydevd_bundle import pydevd_resolver
+import re
 import sys
 from _pydevd_bundle.pydevd_constants import dict_iter_items, dict_keys, IS_PY3K, \
     BUILTINS_MODULE_NAME, MAXIMUM_VARIABLE_REPRESENTATION_SIZE, RETURN_VALUES_DICT, LOAD_VALUES_ASYNC, \
@@ -407,3 +408,40 @@ def var_to_xml(val, name, trim_if_too_big=True, additional_in_xml='', evaluate_f
         return ''.join((xml, xml_qualifier, xml_value, xml_container, additional_in_xml, ' scope="', scope, '"', ' />\n'))
     else:
         return ''.join((xml, xml_qualifier, xml_value, xml_container, additional_in_xml, ' />\n'))
+
+
+def str_values_to_xml(values):
+    '''
+    Provides the same as `[var_to_xml(value, '') for value in values]` for strings (i.e.:
+    the already formatted cells of a table), but the parts which are common to all the
+    values are only computed once.
+    '''
+    type_name, type_qualifier, _, _, value_prefix = get_variable_details('')
+    xml = '<var name="" type="%s" ' % (make_valid_xml_value(type_name),)
+    if type_qualifier:
+        xml += 'qualifier="%s"' % (make_valid_xml_value(type_qualifier),)
+    xml_template = xml + ' value="%s" />\n'
+    xml_value_prefix = make_valid_xml_value(quote(value_prefix, '/>_= '))
+    max_size = MAXIMUM_VARIABLE_REPRESENTATION_SIZE - len(value_prefix)
+
+    ret = []
+    append = ret.append
+    for value in values:
+        if value.__class__ is not str:
+            append(var_to_xml(value, ''))
+
+        elif len(value) <= max_size and _is_xml_safe_unquoted(value):
+            # Common case (i.e.: numbers): neither quoting nor escaping change the value.
+            append(xml_template % (xml_value_prefix + value,))
+
+        else:
+            value = value_prefix + value
+            if len(value) > MAXIMUM_VARIABLE_REPRESENTATION_SIZE:
+                value = value[0:MAXIMUM_VARIABLE_REPRESENTATION_SIZE]
+                value += '...'
+            append(xml_template % (make_valid_xml_value(quote(value, '/>_= ')),))
+    return ret
+
+
+# Matches strings which are kept as is by `quote(s, '/>_= ')` and `make_valid_xml_value`.
+_is_xml_safe_unquoted = re.compile(r'^[A-Za-z0-9_.\-/= ]*\Z').match
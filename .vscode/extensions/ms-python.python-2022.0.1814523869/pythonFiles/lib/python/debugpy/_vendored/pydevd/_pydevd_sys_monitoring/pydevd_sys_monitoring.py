@@ -0,0 +1,543 @@
+'''
+Tracing backend based on `sys.monitoring` (PEP 669), available on Python 3.12 onwards.
+
+Instead of setting a tracing function for every frame of every thread (as is done with
+`sys.settrace`), the debugger only asks for events in the code objects which actually need
+to be inspected (i.e.: code objects with breakpoints or which are being stepped through) and
+disables the events per code object/location as soon as they're ruled out.
+
+The actual handling of the events is still done by `PyDBFrame.trace_dispatch`, so, the
+semantics for breakpoints/stepping/exceptions are the same ones used in the tracing mode.
+
+Notes:
+
+- `PY_START` is the only event which is always enabled globally: when a code object starts
+  and nothing is interesting for it, `DISABLE` is returned so that it's not reported again
+  until `sys.monitoring.restart_events()` is called (which is done whenever breakpoints
+  change or some thread starts stepping).
+
+- `RAISE` and `PY_UNWIND` can't be disabled per location: `RAISE` is only enabled globally
+  when some exception breakpoint requires it and `PY_UNWIND` (which is only reported when a
+  frame exits with an exception) is always enabled to deal with stepping and unhandled
+  exceptions.
+'''
+import dis
+import os
+import sys
+
+from _pydev_bundle import pydev_log
+from _pydev_imps._pydev_saved_modules import threading
+from _pydevd_bundle.pydevd_constants import (IS_PY312_OR_GREATER, ENV_FALSE_LOWER_VALUES,
+    ENV_TRUE_LOWER_VALUES, STATE_SUSPEND, GlobalDebuggerHolder, dict_iter_values)
+from _pydevd_bundle.pydevd_frame import PyDBFrame
+from _pydevd_bundle.pydevd_trace_dispatch import global_cache_frame_skips
+from pydevd_file_utils import get_abs_path_real_path_and_base_from_frame, NORM_PATHS_AND_BASE_CONTAINER
+
+USING_SYS_MONITORING = False
+
+# "NO" means we should not use sys.monitoring, 'YES' we should use it (and fail if not there) and
+# unspecified uses if possible.
+use_sys_monitoring = os.environ.get('PYDEVD_USE_SYS_MONITORING', '').lower()
+
+if use_sys_monitoring in ENV_FALSE_LOWER_VALUES:
+    pass
+
+elif IS_PY312_OR_GREATER and hasattr(sys, 'monitoring'):
+    USING_SYS_MONITORING = True
+
+elif use_sys_monitoring in ENV_TRUE_LOWER_VALUES:
+    raise RuntimeError('PYDEVD_USE_SYS_MONITORING=%s requires Python 3.12 onwards (current: %s).' % (
+        use_sys_monitoring, sys.version_info[:3]))
+
+if USING_SYS_MONITORING:
+    monitoring = sys.monitoring
+    DEBUGGER_ID = monitoring.DEBUGGER_ID
+    DISABLE = monitoring.DISABLE
+    _events = monitoring.events
+
+    # Events which are enabled per code object (only in the code objects we care about).
+    _LOCAL_EVENTS = _events.LINE | _events.PY_RETURN | _events.PY_YIELD | _events.PY_RESUME
+
+else:
+    monitoring = None
+    DEBUGGER_ID = None
+    DISABLE = None
+    _events = None
+    _LOCAL_EVENTS = 0
+
+_CODE_SKIP = 0  # Filtered out (debugger internals, library code with justMyCode, exclude filters).
+_CODE_NO_BREAKPOINTS = 1  # Traceable but there are currently no breakpoints in it.
+_CODE_HAS_BREAKPOINTS = 2  # There are breakpoints inside it (or it matches a function breakpoint).
+
+# code object -> (decision, abs_path_canonical_path_and_base). Cleared when breakpoints/filters change.
+_code_to_decision = {}
+
+_thread_local = threading.local()
+
+_getframe = sys._getframe
+
+_lock = threading.Lock()
+_started = False
+
+
+#=======================================================================================================================
+# Helpers
+#=======================================================================================================================
+def _get_thread_and_info(py_db):
+    '''
+    :return tuple(thread, PyDBAdditionalThreadInfo):
+        (None, None) is returned for threads which shouldn't be traced (i.e.: debugger threads
+        or threads which aren't known by the `threading` module).
+    '''
+    try:
+        thread, info = _thread_local.thread_and_info
+    except AttributeError:
+        thread = py_db.threading_active.get(py_db.threading_get_ident())
+        if thread is None:
+            return None, None
+
+        try:
+            info = thread.additional_info
+            if info is None:
+                raise AttributeError()
+        except:
+            info = py_db.set_additional_thread_info(thread)
+        _thread_local.thread_and_info = thread, info
+
+    if getattr(thread, 'is_pydev_daemon_thread', False) or getattr(thread, 'pydev_do_not_trace', False):
+        return None, None
+    return thread, info
+
+
+def _is_thread_stepping(info):
+    return info.pydev_step_cmd != -1 or info.pydev_state == STATE_SUSPEND
+
+
+def _is_any_thread_stepping(py_db):
+    # Note: events are disabled for all the threads at once, so, before disabling some location we
+    # have to make sure that no other thread is stepping (this is only called when a location is
+    # about to be disabled, so, it's not really in a hot path).
+    for thread in list(dict_iter_values(py_db.threading_active)):
+        info = getattr(thread, 'additional_info', None)
+        if info is not None and _is_thread_stepping(info):
+            return True
+    return False
+
+
+def _has_breakpoints_in_code(py_db, code, canonical_normalized_filename):
+    if py_db.has_plugin_line_breaks:
+        # We can't know in advance what plugins will want to inspect.
+        return True
+
+    if code.co_name in py_db.function_breakpoint_name_to_breakpoint:
+        return True
+
+    breakpoints_for_file = py_db.breakpoints.get(canonical_normalized_filename)
+    if not breakpoints_for_file:
+        return False
+
+    try:
+        func_lines = set()
+        for offset_and_lineno in dis.findlinestarts(code):
+            func_lines.add(offset_and_lineno[1])
+    except:
+        # Fallback to the function name (same heuristic used in PyDBFrame.trace_dispatch).
+        curr_func_name = code.co_name
+        if curr_func_name in ('?', '<module>', '<lambda>'):
+            curr_func_name = ''
+
+        for bp in dict_iter_values(breakpoints_for_file):
+            if bp.func_name in ('None', curr_func_name):
+                return True
+        return False
+
+    for bp_line in breakpoints_for_file:
+        if bp_line in func_lines:
+            return True
+    return False
+
+
+def _get_code_decision(py_db, frame):
+    code = frame.f_code
+    try:
+        return _code_to_decision[code]
+    except KeyError:
+        pass
+
+    try:
+        abs_path_canonical_path_and_base = NORM_PATHS_AND_BASE_CONTAINER[code.co_filename]
+    except:
+        abs_path_canonical_path_and_base = get_abs_path_real_path_and_base_from_frame(frame)
+
+    # Note: same filtering done in ThreadTracer.__call__.
+    decision = _CODE_NO_BREAKPOINTS
+    file_type = py_db.get_file_type(frame, abs_path_canonical_path_and_base)
+    if file_type is not None:
+        if file_type != py_db.LIB_FILE or not py_db.in_project_scope(frame, abs_path_canonical_path_and_base[0]):
+            decision = _CODE_SKIP
+
+    if decision != _CODE_SKIP and py_db.is_files_filter_enabled:
+        if py_db.apply_files_filter(frame, abs_path_canonical_path_and_base[0], False):
+            decision = _CODE_SKIP
+
+    if decision != _CODE_SKIP and _has_breakpoints_in_code(py_db, code, abs_path_canonical_path_and_base[1]):
+        decision = _CODE_HAS_BREAKPOINTS
+
+    ret = _code_to_decision[code] = (decision, abs_path_canonical_path_and_base)
+    return ret
+
+
+def _get_frames_with_pending_exc_info():
+    try:
+        return _thread_local.frame_to_pydb_frame
+    except AttributeError:
+        ret = _thread_local.frame_to_pydb_frame = {}
+        return ret
+
+
+def _dispatch(py_db, thread, info, frame, abs_path_canonical_path_and_base, event, arg):
+    frame_to_pydb_frame = _get_frames_with_pending_exc_info()
+    pydb_frame = frame_to_pydb_frame.pop(frame, None)
+    if pydb_frame is None:
+        code = frame.f_code
+        frame_cache_key = (code.co_firstlineno, code.co_name, code.co_filename)
+        pydb_frame = PyDBFrame(
+            (py_db, abs_path_canonical_path_and_base, info, thread, global_cache_frame_skips, frame_cache_key)
+        )
+
+    pydb_frame.trace_dispatch(frame, event, arg)
+
+    # The PyDBFrame only holds state when an exception was seen in the frame (to decide whether
+    # it's a user-unhandled exception when the frame exits), so, that's the only case where we
+    # need to keep it around.
+    if pydb_frame.exc_info and event != 'return':
+        frame_to_pydb_frame[frame] = pydb_frame
+
+
+def _enable_code_events(code):
+    if monitoring.get_local_events(DEBUGGER_ID, code) != _LOCAL_EVENTS:
+        monitoring.set_local_events(DEBUGGER_ID, code, _LOCAL_EVENTS)
+
+
+def _is_top_level_unwind(frame):
+    '''
+    :return bool:
+        Whether an exception leaving the given frame is going to the point the debugger considers
+        as the top-level for the thread (same heuristic from `fix_top_level_trace_and_get_trace_func`).
+    '''
+    back = frame.f_back
+    if back is None:
+        return True
+
+    name = back.f_code.co_filename
+    i = max(name.rfind('/'), name.rfind('\\'))
+    if i >= 0:
+        name = name[i + 1:]
+    i = name.rfind('.')
+    if i >= 0:
+        name = name[:i]
+
+    co_name = back.f_code.co_name
+    if name == 'threading':
+        return co_name in ('__bootstrap_inner', '_bootstrap_inner')
+
+    elif name == 'pydev_monkey':
+        return co_name == '__call__'
+
+    elif name == 'pydevd':
+        return co_name == '_exec'
+
+    return False
+
+
+#=======================================================================================================================
+# Callbacks
+#=======================================================================================================================
+def _on_py_start(code, instruction_offset):
+    py_db = GlobalDebuggerHolder.global_dbg
+    if py_db is None or py_db.pydb_disposed:
+        return DISABLE
+
+    frame = _getframe(1)
+    try:
+        decision, abs_path_canonical_path_and_base = _get_code_decision(py_db, frame)
+        if decision == _CODE_SKIP:
+            return DISABLE
+
+        thread, info = _get_thread_and_info(py_db)
+        if info is None or info.is_tracing:
+            return None
+
+        if decision == _CODE_HAS_BREAKPOINTS or _is_thread_stepping(info):
+            _enable_code_events(code)
+            _dispatch(py_db, thread, info, frame, abs_path_canonical_path_and_base, 'call', None)
+            return None
+
+        if _is_any_thread_stepping(py_db):
+            return None
+        return DISABLE
+    except:
+        if not py_db.pydb_disposed:
+            pydev_log.exception()
+        return None
+    finally:
+        frame = None
+
+
+def _on_line(code, line):
+    py_db = GlobalDebuggerHolder.global_dbg
+    if py_db is None or py_db.pydb_disposed:
+        return DISABLE
+
+    frame = _getframe(1)
+    try:
+        decision, abs_path_canonical_path_and_base = _get_code_decision(py_db, frame)
+        if decision == _CODE_SKIP:
+            return DISABLE
+
+        thread, info = _get_thread_and_info(py_db)
+        if info is None or info.is_tracing:
+            return None
+
+        if not _is_thread_stepping(info):
+            if decision != _CODE_HAS_BREAKPOINTS:
+                return None if _is_any_thread_stepping(py_db) else DISABLE
+
+            if not py_db.has_plugin_line_breaks:
+                breakpoints_for_file = py_db.breakpoints.get(abs_path_canonical_path_and_base[1])
+                if not breakpoints_for_file or line not in breakpoints_for_file:
+                    return None if _is_any_thread_stepping(py_db) else DISABLE
+
+        _dispatch(py_db, thread, info, frame, abs_path_canonical_path_and_base, 'line', None)
+        return None
+    except:
+        if not py_db.pydb_disposed:
+            pydev_log.exception()
+        return None
+    finally:
+        frame = None
+
+
+def _on_py_resume(code, instruction_offset):
+    py_db = GlobalDebuggerHolder.global_dbg
+    if py_db is None or py_db.pydb_disposed:
+        return DISABLE
+
+    frame = _getframe(1)
+    try:
+        thread, info = _get_thread_and_info(py_db)
+        if info is None or info.is_tracing:
+            return None
+
+        if not _is_thread_stepping(info):
+            return None if _is_any_thread_stepping(py_db) else DISABLE
+
+        decision, abs_path_canonical_path_and_base = _get_code_decision(py_db, frame)
+        if decision == _CODE_SKIP:
+            return DISABLE
+
+        _dispatch(py_db, thread, info, frame, abs_path_canonical_path_and_base, 'call', None)
+        return None
+    except:
+        if not py_db.pydb_disposed:
+            pydev_log.exception()
+        return None
+    finally:
+        frame = None
+
+
+def _on_py_return(code, instruction_offset, retval):
+    py_db = GlobalDebuggerHolder.global_dbg
+    if py_db is None or py_db.pydb_disposed:
+        return DISABLE
+
+    frame = _getframe(1)
+    try:
+        thread, info = _get_thread_and_info(py_db)
+        if info is None or info.is_tracing:
+            return None
+
+        if not _is_thread_stepping(info) and frame not in _get_frames_with_pending_exc_info():
+            return None if _is_any_thread_stepping(py_db) else DISABLE
+
+        decision, abs_path_canonical_path_and_base = _get_code_decision(py_db, frame)
+        if decision == _CODE_SKIP:
+            return DISABLE
+
+        _dispatch(py_db, thread, info, frame, abs_path_canonical_path_and_base, 'return', retval)
+        return None
+    except:
+        if not py_db.pydb_disposed:
+            pydev_log.exception()
+        return None
+    finally:
+        frame = None
+
+
+def _on_raise(code, instruction_offset, exception):
+    py_db = GlobalDebuggerHolder.global_dbg
+    if py_db is None or py_db.pydb_disposed:
+        return
+
+    frame = _getframe(1)
+    try:
+        decision, abs_path_canonical_path_and_base = _get_code_decision(py_db, frame)
+        if decision == _CODE_SKIP:
+            return
+
+        thread, info = _get_thread_and_info(py_db)
+        if info is None or info.is_tracing:
+            return
+
+        arg = (type(exception), exception, exception.__traceback__)
+        _dispatch(py_db, thread, info, frame, abs_path_canonical_path_and_base, 'exception', arg)
+    except:
+        if not py_db.pydb_disposed:
+            pydev_log.exception()
+    finally:
+        frame = None
+        arg = None
+
+
+def _on_py_unwind(code, instruction_offset, exception):
+    py_db = GlobalDebuggerHolder.global_dbg
+    if py_db is None or py_db.pydb_disposed:
+        return
+
+    frame = _getframe(1)
+    try:
+        thread, info = _get_thread_and_info(py_db)
+        if info is None or info.is_tracing:
+            return
+
+        if _is_thread_stepping(info) or frame in _get_frames_with_pending_exc_info():
+            # When the frame exits with an exception we don't get PY_RETURN, but stepping and the
+            # user-unhandled exception check must still be done (on `sys.settrace` this is a
+            # 'return' with a None arg).
+            decision, abs_path_canonical_path_and_base = _get_code_decision(py_db, frame)
+            if decision != _CODE_SKIP:
+                _dispatch(py_db, thread, info, frame, abs_path_canonical_path_and_base, 'return', None)
+
+        if py_db.break_on_uncaught_exceptions and not info.suspended_at_unhandled:
+            if _is_top_level_unwind(frame):
+                info.suspended_at_unhandled = True
+                arg = (type(exception), exception, exception.__traceback__)
+                py_db.stop_on_unhandled_exception(py_db, thread, info, arg)
+    except:
+        if not py_db.pydb_disposed:
+            pydev_log.exception()
+    finally:
+        frame = None
+        arg = None
+
+
+#=======================================================================================================================
+# API
+#=======================================================================================================================
+def start_monitoring(py_db):
+    global _started
+
+    with _lock:
+        if _started:
+            return
+
+        curr_tool = monitoring.get_tool(DEBUGGER_ID)
+        if curr_tool is not None and curr_tool != 'pydevd':
+            pydev_log.critical('Unable to use sys.monitoring: tool id %s already in use by: %s', DEBUGGER_ID, curr_tool)
+            return
+
+        if curr_tool is None:
+            monitoring.use_tool_id(DEBUGGER_ID, 'pydevd')
+
+        monitoring.register_callback(DEBUGGER_ID, _events.PY_START, _on_py_start)
+        monitoring.register_callback(DEBUGGER_ID, _events.PY_RESUME, _on_py_resume)
+        monitoring.register_callback(DEBUGGER_ID, _events.LINE, _on_line)
+        monitoring.register_callback(DEBUGGER_ID, _events.PY_RETURN, _on_py_return)
+        monitoring.register_callback(DEBUGGER_ID, _events.PY_YIELD, _on_py_return)
+        monitoring.register_callback(DEBUGGER_ID, _events.RAISE, _on_raise)
+        monitoring.register_callback(DEBUGGER_ID, _events.PY_UNWIND, _on_py_unwind)
+        _started = True
+
+    update_monitoring_events(py_db)
+
+
+def stop_monitoring():
+    global _started
+
+    with _lock:
+        if not _started:
+            return
+        _started = False
+
+        monitoring.set_events(DEBUGGER_ID, 0)
+        for event in (_events.PY_START, _events.PY_RESUME, _events.LINE, _events.PY_RETURN,
+                      _events.PY_YIELD, _events.RAISE, _events.PY_UNWIND):
+            monitoring.register_callback(DEBUGGER_ID, event, None)
+        monitoring.free_tool_id(DEBUGGER_ID)
+        _code_to_decision.clear()
+
+
+def update_monitoring_events(py_db):
+    '''
+    Must be called whenever breakpoints (or anything which affects the decision on which code
+    objects should be traced) change.
+    '''
+    if not _started:
+        return
+
+    # Note: PY_UNWIND is only reported when a frame exits with an exception (which should be
+    # rare enough not to matter).
+    events = _events.PY_START | _events.PY_UNWIND
+    if (py_db.break_on_caught_exceptions or py_db.break_on_user_uncaught_exceptions or
+            py_db.has_plugin_exception_breaks):
+        events |= _events.RAISE
+
+    _code_to_decision.clear()
+    monitoring.set_events(DEBUGGER_ID, events)
+    monitoring.restart_events()
+
+    # Code objects which are already running won't get a new PY_START, so, enable the events
+    # for the running frames which have breakpoints now.
+    ignore_thread_ids = set(
+        t.ident for t in threading.enumerate()
+        if getattr(t, 'is_pydev_daemon_thread', False) or getattr(t, 'pydev_do_not_trace', False)
+    )
+    for thread_id, frame in sys._current_frames().items():
+        if thread_id in ignore_thread_ids:
+            continue
+        try:
+            while frame is not None:
+                if _get_code_decision(py_db, frame)[0] == _CODE_HAS_BREAKPOINTS:
+                    _enable_code_events(frame.f_code)
+                frame = frame.f_back
+        finally:
+            frame = None
+
+
+def reset_code_decisions():
+    '''
+    Must be called when filters change (code objects previously skipped may now need to be traced).
+    '''
+    if not _started:
+        return
+    _code_to_decision.clear()
+    monitoring.restart_events()
+
+
+def enable_code_events_for_frame_and_parents(py_db, frame):
+    '''
+    Used when stepping/pausing: the frames in the stack must report events even if they don't
+    have any breakpoint (and locations which were previously disabled must be re-enabled).
+    '''
+    if not _started:
+        return
+
+    try:
+        while frame is not None:
+            if py_db.get_file_type(frame) is None:
+                _enable_code_events(frame.f_code)
+            frame = frame.f_back
+    finally:
+        frame = None
+
+    monitoring.restart_events()
@@ -42,8 +42,8 @@ from _pydev_bundle.pydev_override import overrides
 from _pydev_imps._pydev_saved_modules import threading, time, thread
 from _pydevd_bundle import pydevd_extension_utils, pydevd_frame_utils
 from _pydevd_bundle.pydevd_filtering import FilesFiltering, glob_matches_path
-from _pydevd_bundle import pydevd_io, pydevd_vm_type
-from _pydevd_bundle import pydevd_utils
+from _pydevd_bundle import pydevd_io, pydevd_vm_type, pydevd_referrers
+from _pydevd_bundle import pydevd_utils, pydevd_deferred_attach
 from _pydev_bundle.pydev_console_utils import DebugConsoleStdIn
 from _pydevd_bundle.pydevd_additional_thread_info import set_additional_thread_info
 from _pydevd_bundle.pydevd_breakpoints import ExceptionBreakpoint, get_exception_breakpoint
@@ -67,9 +67,11 @@ from _pydevd_bundle.pydevd_trace_dispatch import (
 from _pydevd_bundle.pydevd_utils import save_main_module, is_current_thread_main_thread
 from _pydevd_frame_eval.pydevd_frame_eval_main import (
     frame_eval_func, dummy_trace_dispatch)
+from _pydevd_sys_monitoring import pydevd_sys_monitoring
 import pydev_ipython  # @UnusedImport
 from _pydevd_bundle.pydevd_source_mapping import SourceMapping
-from pydevd_concurrency_analyser.pydevd_concurrency_logger import ThreadingLogger, AsyncioLogger, send_concurrency_message, cur_time
+from pydevd_concurrency_analyser.pydevd_concurrency_logger import ThreadingLogger, AsyncioLogger, send_concurrency_message, cur_time, \
+    start_recording_events
 from pydevd_concurrency_analyser.pydevd_thread_wrappers import wrap_threads
 from pydevd_file_utils import get_abs_path_real_path_and_base_from_frame, NORM_PATHS_AND_BASE_CONTAINER
 from pydevd_file_utils import get_fullname, get_package_dir
@@ -89,6 +91,7 @@ from _pydevd_bundle.pydevd_net_command import NetCommand
 
 from _pydevd_bundle.pydevd_breakpoints import stop_on_unhandled_exception
 from _pydevd_bundle.pydevd_collect_bytecode_info import collect_try_except_info, collect_return_info, collect_try_except_info_from_source
+from _pydevd_bundle.pydevd_bytecode_analysis_cache import bytecode_analysis_cache, TRY_EXCEPT_INFO, RETURN_INFO
 from _pydevd_bundle.pydevd_suspended_frames import SuspendedFramesManager
 from socket import SHUT_RDWR
 from _pydevd_bundle.pydevd_api import PyDevdAPI
@@ -643,7 +646,14 @@ class PyDB(object):
         else:
             self.trace_dispatch = partial(_trace_dispatch, self)
         self.fix_top_level_trace_and_get_trace_func = fix_top_level_trace_and_get_trace_func
-        self.frame_eval_func = frame_eval_func
+
+        # When sys.monitoring (PEP 669) is used, events are requested only for the code objects
+        # which need them (so, sys.settrace and the frame evaluation mode aren't used).
+        self.use_sys_monitoring = pydevd_sys_monitoring.USING_SYS_MONITORING
+        if self.use_sys_monitoring:
+            self.frame_eval_func = None
+        else:
+            self.frame_eval_func = frame_eval_func
         self.dummy_trace_dispatch = dummy_trace_dispatch
 
         # Note: this is different from pydevd_constants.thread_get_ident because we want Jython
@@ -661,7 +671,7 @@ class PyDB(object):
         self.threading_current_thread = threading.currentThread
         self.set_additional_thread_info = set_additional_thread_info
         self.stop_on_unhandled_exception = stop_on_unhandled_exception
-        self.collect_return_info = collect_return_info
+        self.collect_return_info = partial(bytecode_analysis_cache.get, RETURN_INFO, compute=collect_return_info)
         self.get_exception_breakpoint = get_exception_breakpoint
         self._dont_trace_get_file_type = DONT_TRACE.get
         self._dont_trace_dirs_get_file_type = DONT_TRACE_DIRS.get
@@ -684,11 +694,15 @@ class PyDB(object):
         atexit.register(stoptrace)
 
     def collect_try_except_info(self, code_obj):
+        return bytecode_analysis_cache.get(TRY_EXCEPT_INFO, code_obj, self._collect_try_except_info)
+
+    def _collect_try_except_info(self, code_obj):
         filename = code_obj.co_filename
         try:
             if os.path.exists(filename):
                 pydev_log.debug('Collecting try..except info from source for %s', filename)
-                try_except_infos = collect_try_except_info_from_source(filename)
+                try_except_infos = bytecode_analysis_cache.get_source_try_except_infos(
+                    filename, collect_try_except_info_from_source)
                 if try_except_infos:
                     # Filter for the current function
                     max_line = -1
@@ -856,7 +870,11 @@ class PyDB(object):
             if not condition:
                 return False
 
-            return eval(condition, new_frame.f_globals, new_frame.f_locals)
+            compiled_condition = pybreakpoint.compiled_condition
+            if compiled_condition is None:
+                # It couldn't be compiled: evaluate the source to report the error.
+                compiled_condition = condition
+            return eval(compiled_condition, new_frame.f_globals, new_frame.f_locals)
         except Exception as e:
             if IS_PY2:
                 # Must be bytes on py2.
@@ -892,7 +910,10 @@ class PyDB(object):
     def handle_breakpoint_expression(self, pybreakpoint, info, new_frame):
         try:
             try:
-                val = eval(pybreakpoint.expression, new_frame.f_globals, new_frame.f_locals)
+                compiled_expression = pybreakpoint.compiled_expression
+                if compiled_expression is None:
+                    compiled_expression = pybreakpoint.expression
+                val = eval(compiled_expression, new_frame.f_globals, new_frame.f_locals)
             except:
                 val = sys.exc_info()[1]
         finally:
@@ -1046,6 +1067,11 @@ class PyDB(object):
             this function is called on a multi-threaded program (either programmatically or attach
             to pid).
         '''
+        if self.use_sys_monitoring:
+            # Note: sys.monitoring applies to all threads.
+            pydevd_sys_monitoring.start_monitoring(self)
+            return
+
         if self.frame_eval_func is not None:
             self.frame_eval_func()
             pydevd_tracing.SetTrace(self.dummy_trace_dispatch)
@@ -1068,6 +1094,10 @@ class PyDB(object):
             pydevd_tracing.set_trace_to_threads(thread_trace_func)
 
     def disable_tracing(self):
+        if self.use_sys_monitoring:
+            # Events can't be disabled for a single thread (threads which shouldn't be traced
+            # are skipped in the callbacks).
+            return
         pydevd_tracing.SetTrace(None)
 
     def on_breakpoints_changed(self, removed=False):
@@ -1079,6 +1109,12 @@ class PyDB(object):
             return
 
         self.mtime += 1
+        if self.use_sys_monitoring:
+            # Breakpoints (including exception breakpoints) changed: recompute which code objects
+            # need events (even on removal, as the events can be disabled in that case).
+            pydevd_sys_monitoring.update_monitoring_events(self)
+            return
+
         if not removed:
             # When removing breakpoints we can leave tracing as was, but if a breakpoint was added
             # we have to reset the tracing for the existing functions to be re-evaluated.
@@ -1088,7 +1124,10 @@ class PyDB(object):
         # Enable the tracing for existing threads (because there may be frames being executed that
         # are currently untraced).
 
-        if IS_CPYTHON:
+        if self.use_sys_monitoring:
+            pydevd_sys_monitoring.update_monitoring_events(self)
+
+        elif IS_CPYTHON:
             # Note: use sys._current_frames instead of threading.enumerate() because this way
             # we also see C/C++ threads, not only the ones visible to the threading module.
             tid_to_frame = sys._current_frames()
@@ -1199,6 +1238,7 @@ class PyDB(object):
         self._in_project_scope_cache.clear()
         self._exclude_by_filter_cache.clear()
         self._apply_filter_cache.clear()
+        self.cmd_factory.clear_frame_info_cache()
         self._exclude_filters_enabled = self._files_filtering.use_exclude_filters()
         self._is_libraries_filter_enabled = self._files_filtering.use_libraries_filter()
         self.is_files_filter_enabled = self._exclude_filters_enabled or self._is_libraries_filter_enabled
@@ -1727,6 +1767,8 @@ class PyDB(object):
     def _clear_skip_caches(self):
         global_cache_skips.clear()
         global_cache_frame_skips.clear()
+        if self.use_sys_monitoring:
+            pydevd_sys_monitoring.reset_code_decisions()
 
     def add_break_on_exception(
         self,
@@ -1913,6 +1955,9 @@ class PyDB(object):
             constructed_tid_to_last_frame[thread.ident] = sys._getframe()
         self.process_internal_commands()
 
+        # Output printed until now must be shown before the suspension.
+        pydevd_io.flush_output()
+
         thread_id = get_current_thread_id(thread)
 
         # print('do_wait_suspend %s %s %s %s %s %s (%s)' % (frame.f_lineno, frame.f_code.co_name, frame.f_code.co_filename, event, arg, constant_to_str(thread.additional_info.pydev_step_cmd), constant_to_str(thread.additional_info.pydev_original_step_cmd)))
@@ -2010,6 +2055,9 @@ class PyDB(object):
             self.process_internal_commands()
             time.sleep(0.01)
 
+        # The heap snapshot (used in the referrers view) is only valid while suspended.
+        pydevd_referrers.clear_heap_snapshot()
+
         self.cancel_async_evaluation(get_current_thread_id(thread), str(id(frame)))
 
         # process any stepping instructions
@@ -2119,6 +2167,11 @@ class PyDB(object):
         disable = kwargs.pop('disable', False)
         assert not kwargs
 
+        if self.use_sys_monitoring:
+            if not disable:
+                pydevd_sys_monitoring.enable_code_events_for_frame_and_parents(self, frame)
+            return
+
         while frame is not None:
             # Don't change the tracing on debugger-related files
             file_type = self.get_file_type(frame)
@@ -2229,6 +2282,8 @@ class PyDB(object):
 
             pydev_log.debug("PyDB.dispose_and_kill_all_pydevd_threads (first call)")
 
+            pydevd_io.flush_output()
+
             # Wait until a time when there are no commands being processed to kill the threads.
             started_at = time.time()
             while time.time() < started_at + timeout:
@@ -2270,11 +2325,12 @@ class PyDB(object):
         self.start_auxiliary_daemon_threads()
 
     def patch_threads(self):
-        try:
-            # not available in jython!
-            threading.settrace(self.trace_dispatch)  # for all future threads
-        except:
-            pass
+        if not self.use_sys_monitoring:
+            try:
+                # not available in jython!
+                threading.settrace(self.trace_dispatch)  # for all future threads
+            except:
+                pass
 
         from _pydev_bundle.pydev_monkey import patch_thread_modules
         patch_thread_modules()
@@ -2898,6 +2954,9 @@ def stoptrace():
     except:
         pass
 
+    if pydevd_sys_monitoring.USING_SYS_MONITORING:
+        pydevd_sys_monitoring.stop_monitoring()
+
     from _pydev_bundle.pydev_monkey import undo_patch_thread_modules
     undo_patch_thread_modules()
 
@@ -3001,6 +3060,10 @@ def settrace_forked(setup_tracing=True):
     '''
     from _pydevd_bundle.pydevd_constants import GlobalDebuggerHolder
     py_db = GlobalDebuggerHolder.global_dbg
+    deferred_attach_info = None
+    if setup_tracing:
+        deferred_attach_info = pydevd_deferred_attach.get_deferred_attach_info(py_db)
+
     if py_db is not None:
         py_db.created_pydb_daemon_threads = {}  # Just making sure we won't touch those (paused) threads.
         py_db = None
@@ -3019,30 +3082,46 @@ def settrace_forked(setup_tracing=True):
     access_token = setup.get('access-token')
     client_access_token = setup.get('client-access-token')
 
-    if setup_tracing:
-        from _pydevd_frame_eval.pydevd_frame_eval_main import clear_thread_local_info
-        host, port = dispatch()
-
     import pydevd_tracing
     pydevd_tracing.restore_sys_set_trace_func()
 
     if setup_tracing:
-        if port is not None:
-            custom_frames_container_init()
-
-            if clear_thread_local_info is not None:
-                clear_thread_local_info()
-
-            settrace(
-                    host,
-                    port=port,
-                    suspend=False,
-                    trace_only_current_thread=False,
-                    overwrite_prev_trace=True,
-                    patch_multiprocessing=True,
-                    access_token=access_token,
-                    client_access_token=client_access_token,
-            )
+        if deferred_attach_info is not None:
+            # Don't keep the tracing done for the debugger of the parent process while waiting.
+            pydevd_tracing.SetTrace(None)
+            frame = get_frame()
+            while frame is not None:
+                if frame.f_trace is not None and frame.f_trace is not NO_FTRACE:
+                    frame.f_trace = NO_FTRACE
+                frame = frame.f_back
+            del frame
+
+            pydevd_deferred_attach.install_deferred_attach(
+                partial(_settrace_forked_connect, access_token, client_access_token), deferred_attach_info, setup)
+        else:
+            _settrace_forked_connect(access_token, client_access_token)
+
+
+def _settrace_forked_connect(access_token, client_access_token):
+    from _pydevd_frame_eval.pydevd_frame_eval_main import clear_thread_local_info
+    host, port = dispatch()
+
+    if port is not None:
+        custom_frames_container_init()
+
+        if clear_thread_local_info is not None:
+            clear_thread_local_info()
+
+        settrace(
+                host,
+                port=port,
+                suspend=False,
+                trace_only_current_thread=False,
+                overwrite_prev_trace=True,
+                patch_multiprocessing=True,
+                access_token=access_token,
+                client_access_token=client_access_token,
+        )
 
 
 @contextmanager
@@ -3081,7 +3160,9 @@ def add_dont_terminate_child_pid(pid):
 
 class SetupHolder:
 
-    setup = None
+    # Note: a process waiting for a deferred attach only imports pydevd when needed (so,
+    # start with the setup it received).
+    setup = pydevd_deferred_attach.get_pending_setup()
 
 
 def apply_debugger_options(setup_options):
@@ -3089,7 +3170,7 @@ def apply_debugger_options(setup_options):
 
     :type setup_options: dict[str, bool]
     """
-    default_options = {'save-signatures': False, 'qt-support': ''}
+    default_options = {'save-signatures': False, 'signatures-profile-file': None, 'qt-support': ''}
     default_options.update(setup_options)
     setup_options = default_options
 
@@ -3100,7 +3181,21 @@ def apply_debugger_options(setup_options):
         else:
             # Only import it if we're going to use it!
             from _pydevd_bundle.pydevd_signature import SignatureFactory
-            debugger.signature_factory = SignatureFactory()
+            profile_file = setup_options['signatures-profile-file']
+            if profile_file:
+                # One file for each process.
+                root, ext = os.path.splitext(profile_file)
+                profile_file = '%s.%s%s' % (root, os.getpid(), ext or '.json')
+
+            debugger.signature_factory = signature_factory = SignatureFactory(profile_file)
+            signature_factory.start(debugger)
+            if profile_file:
+
+                def on_exit():
+                    signature_factory.flush(debugger)
+                    signature_factory.export()
+
+                atexit.register(on_exit)
 
     if setup_options['qt-support']:
         enable_qt_support(setup_options['qt-support'])
@@ -3318,6 +3413,9 @@ def main():
         if setup['save-asyncio']:
             if IS_PY34_OR_GREATER:
                 debugger.asyncio_analyser = AsyncioLogger()
+        if setup['concurrency-trace-file'] and (debugger.thread_analyser is not None or debugger.asyncio_analyser is not None):
+            # Low overhead mode: events are recorded locally instead of being sent to the client.
+            start_recording_events(setup['concurrency-trace-file'])
 
         apply_debugger_options(setup)
 
@@ -1,10 +1,14 @@
+import atexit
+import json
+import os
 import time
+from array import array
 
 from _pydev_bundle._pydev_filesystem_encoding import getfilesystemencoding
 from _pydev_imps._pydev_saved_modules import threading
 from _pydevd_bundle import pydevd_xml
 from _pydevd_bundle.pydevd_constants import GlobalDebuggerHolder
-from _pydevd_bundle.pydevd_constants import get_thread_id, IS_PY3K
+from _pydevd_bundle.pydevd_constants import get_thread_id, IS_PY3K, dict_iter_items, xrange
 from _pydevd_bundle.pydevd_net_command import NetCommand
 from pydevd_concurrency_analyser.pydevd_thread_wrappers import ObjectWrapper, wrap_attr
 import pydevd_file_utils
@@ -75,7 +79,306 @@ def get_text_list_for_frame(frame):
     return cmdTextList
 
 
+#=======================================================================================================================
+# Recording mode: instead of sending each event to the client as xml, events are saved as fixed-size
+# records in a preallocated ring buffer for each thread. A background thread flushes those in batches
+# to a binary log which is exported as a Chrome trace-event json (chrome://tracing, Perfetto) at exit.
+#=======================================================================================================================
+
+# Fields in a record: time, event_class, name, thread_id, type, event, file, line, lock_id, parent
+# (strings are saved as ids in the string table and a missing parent is saved as -1).
+_RECORD_FIELDS = 10
+
+
+class _EventsRingBuffer(object):
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.records = array('d', [0.0]) * (capacity * _RECORD_FIELDS)
+
+        # Held while a record is written and while the flush thread copies the records (so,
+        # a record being overwritten when the buffer wraps around is never copied halfway).
+        self.lock = threading.Lock()
+
+        # Only changed by the thread which owns the buffer.
+        self.written = 0
+
+        # Only changed by the flush thread.
+        self.flushed = 0
+
+
+class ConcurrencyEventsRecorder(object):
+
+    def __init__(self, trace_file, capacity=8192, flush_interval=0.1):
+        '''
+        :param str trace_file:
+            The Chrome trace-event json to be written when `stop` is called.
+
+        :param int capacity:
+            The number of events in the ring buffer of each thread (if a thread records more
+            events than that between flushes the older ones are dropped).
+
+        :param float flush_interval:
+            The time between flushes of the ring buffers to the binary log.
+        '''
+        self.trace_file = trace_file
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.pid = os.getpid()
+
+        self._strings = {}
+        self._strings_lock = threading.Lock()
+        self._buffers = []
+        self._buffers_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._tls = threading.local()
+        self._stop_event = threading.Event()
+
+        self._log_file = trace_file + '.events'
+        # Note: unbuffered so that a forked process doesn't write the data buffered by the parent.
+        self._log = open(self._log_file, 'wb', 0)
+
+    def start(self):
+        # Note: not a PyDBDaemonThread because the recorder outlives the PyDB in a forked process.
+        t = threading.Thread(target=self._flush_loop, name='pydevd.ConcurrencyEventsRecorder')
+        t.daemon = True
+        t.pydev_do_not_trace = True
+        t.is_pydev_daemon_thread = True
+        t.start()
+
+    def _get_string_id(self, s):
+        try:
+            return self._strings[s]
+        except KeyError:
+            with self._strings_lock:
+                return self._strings.setdefault(s, len(self._strings))
+
+    def record(self, event_class, time, name, thread_id, type, event, file, line, lock_id, parent):
+        try:
+            buf = self._tls.buffer
+        except AttributeError:
+            buf = self._tls.buffer = _EventsRingBuffer(self.capacity)
+            with self._buffers_lock:
+                self._buffers.append(buf)
+
+        get_string_id = self._get_string_id
+        record = array('d', (
+            time,
+            get_string_id(event_class),
+            get_string_id(name),
+            get_string_id(thread_id),
+            get_string_id(type),
+            get_string_id(event),
+            get_string_id(file),
+            int(line),
+            get_string_id(str(lock_id)),
+            -1 if parent is None else get_string_id(parent),
+        ))
+        with buf.lock:
+            i = (buf.written % buf.capacity) * _RECORD_FIELDS
+            buf.records[i:i + _RECORD_FIELDS] = record
+            buf.written += 1
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            log = self._log
+            if log is None:
+                return
+
+            with self._buffers_lock:
+                buffers = self._buffers[:]
+
+            for buf in buffers:
+                with buf.lock:
+                    written = buf.written
+                    flushed = buf.flushed
+                    if written - flushed > buf.capacity:
+                        # The ring buffer wrapped around before we could flush it.
+                        self.dropped += written - flushed - buf.capacity
+                        flushed = written - buf.capacity
+
+                    if flushed == written:
+                        continue
+
+                    # Only the copy is done with the lock held (the file is written afterwards).
+                    start = (flushed % buf.capacity) * _RECORD_FIELDS
+                    end = (written % buf.capacity) * _RECORD_FIELDS
+                    if start < end:
+                        records = buf.records[start:end]
+                    else:
+                        records = buf.records[start:] + buf.records[:end]
+                    buf.flushed = written
+
+                records.tofile(log)
+
+    def stop(self):
+        '''
+        Stops the recording and writes the Chrome trace-event json.
+        '''
+        self._stop_event.set()
+        self.flush()
+        with self._flush_lock:
+            if self._log is None:
+                return
+            self._log.close()
+            self._log = None
+
+        try:
+            self._export_chrome_trace()
+        finally:
+            try:
+                os.remove(self._log_file)
+            except OSError:
+                pass
+
+    def discard_in_forked_process(self):
+        '''
+        Called in a forked process to stop using the recorder inherited from the parent (whose
+        events are exported by the parent).
+
+        Note: the locks aren't used because they may have been held by another thread when the
+        process was forked (and the flush thread doesn't exist in the forked process).
+        '''
+        log = self._log
+        self._log = None
+        if log is not None:
+            try:
+                log.close()  # Only closes the file descriptor inherited by this process.
+            except Exception:
+                pass
+
+    def _iter_records(self):
+        records = array('d')
+        with open(self._log_file, 'rb') as stream:
+            while True:
+                try:
+                    records.fromfile(stream, 4096 * _RECORD_FIELDS)
+                except EOFError:
+                    pass  # Read the last (partial) chunk.
+                for i in xrange(0, len(records), _RECORD_FIELDS):
+                    yield records[i:i + _RECORD_FIELDS]
+                if len(records) < 4096 * _RECORD_FIELDS:
+                    break
+                del records[:]
+
+    def _export_chrome_trace(self):
+        id_to_string = dict((string_id, s) for s, string_id in dict_iter_items(self._strings))
+        pid = os.getpid()
+        thread_id_to_tid = {}
+        tid_to_name = {}
+
+        with open(self.trace_file, 'w') as stream:
+            stream.write('{"traceEvents": [\n')
+            for record in self._iter_records():
+                time, event_class, name, thread_id, type, event, file, line, lock_id, parent = record
+                event = id_to_string[event]
+                tid = thread_id_to_tid.setdefault(thread_id, len(thread_id_to_tid) + 1)
+                tid_to_name[tid] = id_to_string[name]
+
+                trace_event = {
+                    'ts': time,
+                    'pid': pid,
+                    'tid': tid,
+                    'cat': id_to_string[type],
+                    'args': {
+                        'event_class': id_to_string[event_class],
+                        'file': id_to_string[file],
+                        'line': int(line),
+                    },
+                }
+                if trace_event['cat'] == 'lock':
+                    trace_event['args']['lock_id'] = id_to_string[lock_id]
+                if parent >= 0:
+                    trace_event['args']['parent'] = id_to_string[parent]
+
+                # i.e.: acquire_begin/acquire_end is shown as an "acquire" span for the lock.
+                if event.endswith('_begin'):
+                    trace_event.update(name=event[:-len('_begin')], ph='b', id=id_to_string[lock_id])
+                elif event.endswith('_end'):
+                    trace_event.update(name=event[:-len('_end')], ph='e', id=id_to_string[lock_id])
+                else:
+                    trace_event.update(name=event, ph='i', s='t')
+
+                stream.write(json.dumps(trace_event))
+                stream.write(',\n')
+
+            for tid, name in sorted(dict_iter_items(tid_to_name)):
+                stream.write(json.dumps({'ph': 'M', 'name': 'thread_name', 'pid': pid, 'tid': tid, 'args': {'name': name}}))
+                stream.write(',\n')
+
+            stream.write(json.dumps({
+                'ph': 'M', 'name': 'process_name', 'pid': pid, 'args': {'name': 'pydevd (dropped events: %s)' % (self.dropped,)}}))
+            stream.write('\n]}\n')
+
+
+_events_recorder = None
+_events_trace_file = None
+
+
+def _create_events_recorder(trace_file):
+    root, ext = os.path.splitext(trace_file)
+    recorder = ConcurrencyEventsRecorder('%s.%s%s' % (root, os.getpid(), ext or '.json'))
+    recorder.start()
+    return recorder
+
+
+def start_recording_events(trace_file):
+    '''
+    Starts recording the concurrency events to the given file (one file is written for each
+    process, so, the pid is added to its name).
+    '''
+    global _events_recorder
+    global _events_trace_file
+    if _events_recorder is not None:
+        return
+    _events_recorder = _create_events_recorder(trace_file)
+    _events_trace_file = trace_file
+    atexit.register(stop_recording_events)
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=after_fork)
+
+
+def after_fork():
+    '''
+    Must be called after a fork operation: the forked process starts its own recording (the
+    recorder of the parent, along with its buffers, log file and flush thread, is discarded).
+    '''
+    global _events_recorder
+    recorder = _events_recorder
+    if recorder is None or recorder.pid == os.getpid():
+        return  # Not recording or already called for this process.
+
+    _events_recorder = None
+    recorder.discard_in_forked_process()
+    try:
+        _events_recorder = _create_events_recorder(_events_trace_file)
+    except Exception:
+        pydev_log.exception('Error recording the concurrency events in forked process.')
+
+
+def stop_recording_events():
+    global _events_recorder
+    recorder = _events_recorder
+    if recorder is not None:
+        _events_recorder = None
+        try:
+            recorder.stop()
+        except Exception:
+            pydev_log.exception('Error exporting the concurrency events.')
+
+
 def send_concurrency_message(event_class, time, name, thread_id, type, event, file, line, frame, lock_id=0, parent=None):
+    recorder = _events_recorder
+    if recorder is not None:
+        # Recording mode: the stack isn't collected and nothing is sent to the client.
+        recorder.record(event_class, time, name, thread_id, type, event, file, line, lock_id, parent)
+        return
+
     dbg = GlobalDebuggerHolder.global_dbg
     if dbg is None:
         return
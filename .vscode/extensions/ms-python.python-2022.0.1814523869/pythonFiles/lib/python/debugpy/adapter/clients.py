@@ -132,6 +132,32 @@ class Client(components.Component):
     def request(self, request):
         return self.server.channel.delegate(request)
 
+    # Used instead of request() for requests that don't need to be looked at, such
+    # as "variables" or "stackTrace", to delegate them to the server without parsing
+    # either the request or the response. Returns False if the request must be
+    # handled by request() after all.
+    def relay_request(self, request):
+        with self.session:
+            if not self.server:
+                return False
+            try:
+                response = self.server.channel.propagate(request).wait_for_response()
+            except messaging.JsonIOError:
+                return False
+            if not isinstance(response, messaging.RawMessage):
+                # The server disconnected before responding - request() will report
+                # it in the usual manner.
+                return False
+
+            try:
+                self.channel.relay_response(request, response)
+            except messaging.NoMoreMessages:
+                log.warning(
+                    "Channel was closed before the response to {0} could be sent",
+                    request.describe(),
+                )
+        return True
+
     @message_handler
     def initialize_request(self, request):
         if self._initialize_request is not None:
@@ -308,6 +308,19 @@ class Server(components.Component):
     def event(self, event):
         self.client.propagate_after_start(event)
 
+    # Used instead of event() for events that don't need to be looked at, such as
+    # "output", to propagate them to the client without parsing them. Returns False
+    # if the event must be handled by event() after all.
+    def relay_event(self, event):
+        with self.session:
+            if not self.client:
+                return False
+            try:
+                self.client.propagate_after_start(event)
+            except messaging.JsonIOError:
+                return False
+        return True
+
     @message_handler
     def initialized_event(self, event):
         # pydevd doesn't send it, but the adapter will send its own in any case.
@@ -11,11 +11,14 @@ responses, and events.
 https://microsoft.github.io/debug-adapter-protocol/overview#base-protocol
 """
 
+import codecs
 import collections
 import contextlib
 import functools
+import io
 import itertools
 import os
+import re
 import socket
 import sys
 import threading
@@ -66,6 +69,11 @@ class JsonIOStream(object):
 
     MAX_BODY_SIZE = 0xFFFFFF
 
+    READ_BUFFER_SIZE = 64 * 1024
+    """How many bytes read_json() asks for at once, when the reader can return
+    partial reads (i.e. it is buffered, or it is a raw stream such as a socket).
+    """
+
     json_decoder_factory = json.JsonDecoder
     """Used by read_json() when decoder is None."""
 
@@ -108,10 +116,8 @@ class JsonIOStream(object):
         if name is None:
             name = repr(sock)
 
-        # TODO: investigate switching to buffered sockets; readline() on unbuffered
-        # sockets is very slow! Although the implementation of readline() itself is
-        # native code, it calls read(1) in a loop - and that then ultimately calls
-        # SocketIO.readinto(), which is implemented in Python.
+        # The socket is unbuffered - read_json() does its own buffering, reading as
+        # much as is available at once, rather than relying on readline().
         socket_io = sock.makefile("rwb", 0)
 
         # SocketIO.close() doesn't close the underlying socket.
@@ -122,7 +128,11 @@ class JsonIOStream(object):
                 pass
             sock.close()
 
-        return cls(socket_io, socket_io, name, cleanup)
+        stream = cls(socket_io, socket_io, name, cleanup)
+        if hasattr(sock, "sendmsg"):
+            # Header and body can be sent with a single sendmsg() without joining them.
+            stream._sendmsg = sock.sendmsg
+        return stream
 
     def __init__(self, reader, writer, name=None, cleanup=lambda: None):
         """Creates a new JsonIOStream.
@@ -149,6 +159,20 @@ class JsonIOStream(object):
         self._cleanup = cleanup
         self._closed = False
 
+        # Data that was read from reader, but not consumed by read_json() yet. Bytes
+        # before self._read_pos are already consumed, and are discarded as needed.
+        self._read_buffer = bytearray()
+        self._read_pos = 0
+
+        # If the reader can return whatever is available, rather than blocking until
+        # the requested number of bytes is read, read_json() reads in large chunks.
+        # Otherwise, it falls back to readline() for headers, and read() for the body.
+        self._read_some = getattr(reader, "read1", None)
+        if self._read_some is None and isinstance(reader, io.RawIOBase):
+            self._read_some = reader.read
+
+        self._sendmsg = None
+
     def close(self):
         """Closes the stream, the reader, and the writer.
         """
@@ -187,18 +211,37 @@ class JsonIOStream(object):
         )
         return logger(format_string, self.name, dir, data)
 
-    def _read_line(self, reader):
-        line = b""
-        while True:
-            try:
-                line += reader.readline()
-            except Exception as exc:
-                raise NoMoreMessages(str(exc), stream=self)
-            if not line:
-                raise NoMoreMessages(stream=self)
-            if line.endswith(b"\r\n"):
-                line = line[0:-2]
-                return line
+    def _fill_read_buffer(self, size):
+        """Reads more data from reader into the read buffer.
+
+        size is the number of bytes that are still needed; if it's None, data up to
+        the end of the next line is needed.
+        """
+
+        buffer = self._read_buffer
+        read_pos = self._read_pos
+        if read_pos and read_pos >= len(buffer) // 2:
+            # Discard consumed data before reading more, so that the buffer doesn't
+            # grow indefinitely. Data that is still needed is moved to the front.
+            del buffer[:read_pos]
+            self._read_pos = 0
+
+        try:
+            if self._read_some is not None:
+                data = self._read_some(max(size or 0, self.READ_BUFFER_SIZE))
+            elif size is None:
+                data = self._reader.readline()
+            else:
+                data = self._reader.read(size)
+        except Exception as exc:
+            raise NoMoreMessages(str(exc), stream=self)
+        if not data:
+            raise NoMoreMessages(stream=self)
+        buffer += data
+
+    def _raw_lines(self, start, end):
+        raw_lines = bytes(self._read_buffer[start:end]).replace(b"\r\n", b"\n").split(b"\n")
+        return "\n".join(repr(line) for line in raw_lines)
 
     def read_json(self, decoder=None):
         """Read a single JSON value from reader.
@@ -208,48 +251,64 @@ class JsonIOStream(object):
         """
 
         decoder = decoder if decoder is not None else self.json_decoder_factory()
-        reader = self._reader
-        read_line = functools.partial(self._read_line, reader)
+        buffer = self._read_buffer
 
         # If any error occurs while reading and parsing the message, log the original
         # raw message data as is, so that it's possible to diagnose missing or invalid
-        # headers, encoding issues, JSON syntax errors etc.
+        # headers, encoding issues, JSON syntax errors etc. The raw data is still in
+        # the read buffer at that point - it's only discarded once the message has
+        # been successfully parsed.
         def log_message_and_reraise_exception(format_string="", *args, **kwargs):
             if format_string:
                 format_string += "\n\n"
             format_string += "{name} -->\n{raw_lines}"
 
-            raw_lines = b"".join(raw_chunks).split(b"\n")
-            raw_lines = "\n".join(repr(line) for line in raw_lines)
+            # Whatever was read for this message is consumed, even if it's invalid.
+            end = len(buffer) if message_end is None else message_end
+            raw_lines = self._raw_lines(message_start, end)
+            self._read_pos = end
 
             log.reraise_exception(
                 format_string, *args, name=self.name, raw_lines=raw_lines, **kwargs
             )
 
-        raw_chunks = []
-        headers = {}
-
+        # Headers are terminated by an empty line.
+        message_start = self._read_pos
+        message_end = None
+        search_start = message_start
         while True:
+            if buffer[message_start : message_start + 2] == b"\r\n":
+                headers_end = message_start
+                break
+            headers_end = buffer.find(b"\r\n\r\n", search_start)
+            if headers_end >= 0:
+                break
+            search_start = max(message_start, len(buffer) - 3)
             try:
-                line = read_line()
+                self._fill_read_buffer(None)
             except Exception:
                 # Only log it if we have already read some headers, and are looking
                 # for a blank line terminating them. If this is the very first read,
                 # there's no message data to log in any case, and the caller might
                 # be anticipating the error - e.g. NoMoreMessages on disconnect.
-                if headers:
+                message_start = self._read_pos
+                if b"\r\n" in buffer[message_start:]:
                     log_message_and_reraise_exception(
                         "Error while reading message headers:"
                     )
                 else:
                     raise
+            # The buffer may have been compacted.
+            search_start -= message_start - self._read_pos
+            message_start = self._read_pos
 
-            raw_chunks += [line, b"\n"]
-            if line == b"":
-                break
-
-            key, _, value = line.partition(b":")
-            headers[key] = value
+        headers = {}
+        if headers_end > message_start:
+            for line in bytes(buffer[message_start:headers_end]).split(b"\r\n"):
+                key, _, value = line.partition(b":")
+                headers[key] = value
+        body_start = (headers_end + 4) if headers_end > message_start else (headers_end + 2)
+        message_end = body_start
 
         try:
             length = int(headers[b"Content-Length"])
@@ -261,32 +320,33 @@ class JsonIOStream(object):
             except Exception:
                 log_message_and_reraise_exception()
 
-        body_start = len(raw_chunks)
-        body_remaining = length
-        while body_remaining > 0:
-            try:
-                chunk = reader.read(body_remaining)
-                if not chunk:
-                    raise EOFError
-            except Exception as exc:
-                # Not logged due to https://github.com/microsoft/ptvsd/issues/1699
-                raise NoMoreMessages(str(exc), stream=self)
-
-            raw_chunks.append(chunk)
-            body_remaining -= len(chunk)
-        assert body_remaining == 0
-
-        body = b"".join(raw_chunks[body_start:])
+        while len(buffer) - body_start < length:
+            # Not logged if it fails due to https://github.com/microsoft/ptvsd/issues/1699
+            self._fill_read_buffer(length - (len(buffer) - body_start))
+            # The buffer may have been compacted.
+            body_start -= message_start - self._read_pos
+            message_start = self._read_pos
+        body_end = message_end = body_start + length
+
+        view = memoryview(buffer)
         try:
-            body = body.decode("utf-8")
+            # Decode directly from the buffer, without copying the body.
+            body = codecs.utf_8_decode(view[body_start:body_end], "strict", True)[0]
         except Exception:
             log_message_and_reraise_exception()
+        finally:
+            view = None
 
         try:
             body = decoder.decode(body)
         except Exception:
             log_message_and_reraise_exception()
 
+        self._read_pos = body_end
+        if body_end == len(buffer):
+            del buffer[:]
+            self._read_pos = 0
+
         # If parsed successfully, log as JSON for readability.
         self._log_message("-->", body)
         return body
@@ -319,24 +379,37 @@ class JsonIOStream(object):
         header = fmt("Content-Length: {0}\r\n\r\n", len(body))
         header = header.encode("ascii")
 
-        data = header + body
-        data_written = 0
         try:
-            while data_written < len(data):
-                written = writer.write(data[data_written:])
-                # On Python 2, socket.makefile().write() does not properly implement
-                # BytesIO.write(), and always returns None instead of the number of
-                # bytes written - but also guarantees that it is always a full write.
-                if written is None:
-                    break
-                data_written += written
-            writer.flush()
+            if self._sendmsg is not None:
+                self._sendmsg_all([header, body])
+            else:
+                data = header + body
+                data_written = 0
+                while data_written < len(data):
+                    written = writer.write(data[data_written:])
+                    # On Python 2, socket.makefile().write() does not properly implement
+                    # BytesIO.write(), and always returns None instead of the number of
+                    # bytes written - but also guarantees that it is always a full write.
+                    if written is None:
+                        break
+                    data_written += written
+                writer.flush()
         except Exception as exc:
             self._log_message("<--", value, logger=log.swallow_exception)
             raise JsonIOError(stream=self, cause=exc)
 
         self._log_message("<--", value)
 
+    def _sendmsg_all(self, chunks):
+        chunks = [memoryview(chunk) for chunk in chunks]
+        while chunks:
+            sent = self._sendmsg(chunks)
+            while chunks and sent >= len(chunks[0]):
+                sent -= len(chunks[0])
+                del chunks[0]
+            if sent:
+                chunks[0] = chunks[0][sent:]
+
     def __repr__(self):
         return fmt("{0}({1!r})", type(self).__name__, self.name)
 
@@ -602,11 +675,15 @@ class Event(Message):
         return self.body
 
     @staticmethod
-    def _parse(channel, message_dict):
+    def _create(channel, message_dict):
         seq = message_dict("seq", int)
         event = message_dict("event", unicode)
         body = message_dict("body", _payload)
-        message = Event(channel, seq, event, body, json=message_dict)
+        return Event(channel, seq, event, body, json=message_dict)
+
+    @staticmethod
+    def _parse(channel, message_dict):
+        message = Event._create(channel, message_dict)
         channel._enqueue_handlers(message, message._handle)
 
     def _handle(self):
@@ -732,11 +809,15 @@ class Request(Message):
         self.response = Response(self.channel, seq, self, body)
 
     @staticmethod
-    def _parse(channel, message_dict):
+    def _create(channel, message_dict):
         seq = message_dict("seq", int)
         command = message_dict("command", unicode)
         arguments = message_dict("arguments", _payload)
-        message = Request(channel, seq, command, arguments, json=message_dict)
+        return Request(channel, seq, command, arguments, json=message_dict)
+
+    @staticmethod
+    def _parse(channel, message_dict):
+        message = Request._create(channel, message_dict)
         channel._enqueue_handlers(message, message._handle)
 
     def _handle(self):
@@ -1010,6 +1091,231 @@ class Disconnect(Message):
         return fmt("disconnect from {0}", self.channel)
 
 
+class RawMessage(object):
+    """Represents an incoming event, request, or response that is relayed to another
+    channel as is, without being parsed.
+
+    Only the top-level properties that are needed to route the message are looked at,
+    and the payload is only validated, not turned into MessageDicts. When the message
+    is relayed, new values for "seq" and "request_seq" are spliced into the original
+    JSON text. This is much cheaper than parsing the message into MessageDicts and
+    serializing it back, which matters for large messages, such as "variables"
+    responses.
+
+    See JsonMessageChannel.propagate() and JsonMessageChannel.relay_response() for
+    sending raw messages, and JsonMessageChannel._parse_incoming_message() for when
+    incoming messages are not parsed.
+    """
+
+    _whitespace = re.compile(r"[ \t\n\r]*")
+
+    # Top-level properties that are needed to route a message of a given type.
+    _routing_keys = {
+        "event": ("seq", "event"),
+        "request": ("seq", "command"),
+        "response": ("seq", "request_seq", "command"),
+    }
+
+    _peeked_keys = frozenset(("type", "seq", "request_seq", "command", "event"))
+
+    def __init__(self, channel, text, type, seq, name, request_seq=None, spans=None):
+        self.channel = channel
+
+        self.text = text
+        """The original JSON text of the message."""
+
+        self.type = type
+        self.seq = seq
+
+        self.name = name
+        """Value of "event" for events, or of "command" for requests and responses."""
+
+        self.request_seq = request_seq
+
+        self._spans = spans
+        """{key: (start, end)} - where values of "seq" and "request_seq" are in text."""
+
+    def __getstate__(self):
+        # Only invoked when the message is logged.
+        return json.JsonDecoder().decode(self.text)
+
+    def describe(self):
+        if self.type == "response":
+            return fmt(
+                "#{0} response to #{1} request {2!j} from {3}",
+                self.seq,
+                self.request_seq,
+                self.name,
+                self.channel,
+            )
+        return fmt(
+            "#{0} {1} {2!j} from {3}", self.seq, self.type, self.name, self.channel
+        )
+
+    def is_event(self, *event):
+        return self.type == "event" and (event == () or self.name in event)
+
+    def is_request(self, *command):
+        return self.type == "request" and (command == () or self.name in command)
+
+    def replace(self, **values):
+        """Returns a copy of this message with the specified top-level properties, which
+        must be among those that were found by peek(), set to new integer values.
+        """
+        text = self.text
+        spans = sorted(self._spans[key] + (key,) for key in values)
+        chunks = []
+        pos = 0
+        for start, end, key in spans:
+            chunks += [text[pos:start], unicode(values[key])]
+            pos = end
+        chunks.append(text[pos:])
+        return RawMessage(
+            self.channel,
+            "".join(chunks),
+            self.type,
+            values.get("seq", self.seq),
+            self.name,
+            values.get("request_seq", self.request_seq),
+        )
+
+    def parse(self):
+        """Fully parses the message into an Event or a Request, for when it turns out
+        that it cannot be relayed as is after all.
+        """
+        assert self.type in ("event", "request")
+        message_dict = self.channel._message_decoder().decode(self.text)
+        message_type = Event if self.type == "event" else Request
+        return message_type._create(self.channel, message_dict)
+
+    @classmethod
+    def peek(cls, channel, text, accept=None):
+        """Scans all the top-level properties of the JSON object in text, keeping the
+        properties needed to route the message. The other values are only scanned to
+        check that text is valid JSON.
+
+        Returns a RawMessage, or None if text isn't a well-formed message, or if any of
+        the routing properties is duplicated (the receiver could then see a different
+        message than the one that was routed). In that case, it should be parsed and
+        handled normally.
+
+        If accept is specified, it's invoked with the RawMessage as soon as the routing
+        properties are found; if it returns False, scanning stops and None is returned,
+        so that messages which won't be relayed are not scanned twice.
+        """
+
+        scan = json.JsonDecoder().scan_once
+        skip = cls._whitespace.match
+        peeked_keys = cls._peeked_keys
+        values = {}
+        spans = {}
+
+        try:
+            i = skip(text, 0).end()
+            if text[i] != "{":
+                return None
+            i = skip(text, i + 1).end()
+            if text[i] != "}":
+                while True:
+                    if text[i] != '"':
+                        return None
+                    key, i = scan(text, i)
+                    i = skip(text, i).end()
+                    if text[i] != ":":
+                        return None
+                    start = skip(text, i + 1).end()
+                    value, i = scan(text, start)
+
+                    if key in peeked_keys:
+                        if key in values:
+                            return None
+                        values[key] = value
+                        spans[key] = (start, i)
+                        if accept is not None:
+                            message = cls._from_values(channel, text, values, spans)
+                            if message is not None:
+                                if not accept(message):
+                                    return None
+                                accept = None
+
+                    i = skip(text, i).end()
+                    if text[i] == "}":
+                        break
+                    if text[i] != ",":
+                        return None
+                    i = skip(text, i + 1).end()
+            if skip(text, i + 1).end() != len(text):
+                return None
+        except (IndexError, StopIteration, TypeError, ValueError):
+            return None
+
+        return cls._from_values(channel, text, values, spans)
+
+    @classmethod
+    def _from_values(cls, channel, text, values, spans):
+        # Returns None if some routing property is missing or invalid.
+        type = values.get("type")
+        routing_keys = cls._routing_keys.get(type) if isinstance(type, unicode) else None
+        if routing_keys is None:
+            return None
+        for key in routing_keys:
+            if key not in values:
+                return None
+            value = values[key]
+            if key in ("seq", "request_seq"):
+                if not isinstance(value, int) or isinstance(value, bool):
+                    return None
+            elif not isinstance(value, unicode):
+                return None
+
+        return RawMessage(
+            channel,
+            text,
+            type,
+            values["seq"],
+            values.get("event" if type == "event" else "command"),
+            values.get("request_seq"),
+            spans,
+        )
+
+
+class RawOutgoingRequest(OutgoingRequest):
+    """Represents an outgoing request that was relayed as a RawMessage from another
+    channel. The response to it is not parsed either.
+    """
+
+    def __init__(self, channel, seq, message):
+        super(RawOutgoingRequest, self).__init__(channel, seq, message.name, "<raw>")
+
+    def wait_for_response(self):
+        """Waits until a response is received for this request, and returns it.
+
+        The response is a RawMessage. If no response was received from the other party
+        before the channel closed, it is a synthesized Response with
+        body=NoMoreMessages() instead.
+        """
+
+        with self.channel:
+            while self.response is None:
+                self.channel._handlers_enqueued.wait()
+        return self.response
+
+    def on_response(self, response_handler):
+        """Same as OutgoingRequest.on_response(), except that the handler is invoked
+        with the response as a RawMessage (or with a synthesized Response with
+        body=NoMoreMessages() if the channel closed before a response was received).
+        """
+
+        super(RawOutgoingRequest, self).on_response(response_handler)
+
+    def _enqueue_response_handlers(self):
+        if self._response_handlers:
+            super(RawOutgoingRequest, self)._enqueue_response_handlers()
+        else:
+            # There are no response handlers, but wait_for_response() might be waiting.
+            self.channel._handlers_enqueued.notify_all()
+
+
 class MessageHandlingError(Exception):
     """Indicates that a message couldn't be handled for some reason.
 
@@ -1323,13 +1629,43 @@ class JsonMessageChannel(object):
         """Sends a new message with the same type and payload.
 
         If it was a request, returns the new OutgoingRequest object for it.
+
+        If message is a RawMessage, it is sent as is, and the returned request is a
+        RawOutgoingRequest.
         """
         assert message.is_request() or message.is_event()
+        if isinstance(message, RawMessage):
+            return self._propagate_raw(message)
         if message.is_request():
             return self.send_request(message.command, message.arguments)
         else:
             self.send_event(message.event, message.body)
 
+    def _propagate_raw(self, message):
+        with self:
+            seq = next(self._seq_iter)
+            request = None
+            if message.is_request():
+                request = RawOutgoingRequest(self, seq, message)
+                self._sent_requests[seq] = request
+            try:
+                self.stream.write_json(message.replace(seq=seq), _RawMessageEncoder)
+            except Exception:
+                if request is not None:
+                    self._sent_requests.pop(seq, None)
+                raise
+        return request
+
+    def relay_response(self, request, response):
+        """Sends response, which is a RawMessage that was received for the request
+        relayed via propagate(request), as the response to request.
+        """
+        assert request.channel is self and request.is_request()
+        with self:
+            seq = next(self._seq_iter)
+            response = response.replace(seq=seq, request_seq=request.seq)
+            self.stream.write_json(response, _RawMessageEncoder)
+
     def delegate(self, message):
         """Like propagate(message).wait_for_response(), but will also propagate
         any resulting MessageHandlingError back.
@@ -1381,10 +1717,8 @@ class JsonMessageChannel(object):
         "response": Response._parse,
     }
 
-    def _parse_incoming_message(self):
-        """Reads incoming messages, parses them, and puts handlers into the queue
-        for _run_handlers() to invoke, until the channel is closed.
-        """
+    def _message_decoder(self):
+        """Returns a new decoder for a single message."""
 
         # Set up a dedicated decoder for this message, to create MessageDict instances
         # for all JSON objects, and track them so that they can be later wired up to
@@ -1413,8 +1747,38 @@ class JsonMessageChannel(object):
                 del d.associate_with
 
         message_dicts = []
-        decoder = self.stream.json_decoder_factory(object_hook=object_hook)
+        return self.stream.json_decoder_factory(object_hook=object_hook)
+
+    def _relay_handler_for(self, type, name):
+        """Returns the handler that can relay a RawMessage of the given type, or None
+        if the message must be parsed and handled normally.
+
+        Given type="request" and command="X", if handlers.relay_request exists, and
+        there's no specific handler handlers.X_request, then it is used to relay the
+        message - and likewise for events. The relay handler can still return False
+        to have the message parsed and handled normally.
+        """
+
+        with self:
+            handlers = self.handlers
+        relay = getattr(handlers, "relay_" + type, None)
+        if relay is None or hasattr(handlers, name + "_" + type):
+            return None
+        return relay
+
+    def _parse_incoming_message(self):
+        """Reads incoming messages, parses them, and puts handlers into the queue
+        for _run_handlers() to invoke, until the channel is closed.
+
+        Messages that can be relayed without looking at their payload are not parsed,
+        but only peeked at - see RawMessage.
+        """
+
+        decoder = _RawMessageDecoder(self, self._message_decoder())
         message_dict = self.stream.read_json(decoder)
+        if isinstance(message_dict, RawMessage):
+            self._handle_raw(message_dict)
+            return
         assert isinstance(message_dict, MessageDict)  # make sure stream used decoder
 
         msg_type = message_dict("type", json.enum("event", "request", "response"))
@@ -1436,6 +1800,59 @@ class JsonMessageChannel(object):
             )
             os._exit(1)
 
+    def _may_relay(self):
+        # Checked for every message, since requests can be sent and handlers can be
+        # changed while the channel is blocked reading the next message.
+        with self:
+            handlers = self.handlers
+            return (
+                len(self._sent_requests)
+                or hasattr(handlers, "relay_request")
+                or hasattr(handlers, "relay_event")
+            )
+
+    def _can_relay(self, message):
+        if message.type == "response":
+            with self:
+                request = self._sent_requests.get(message.request_seq)
+            return isinstance(request, RawOutgoingRequest)
+        return self._relay_handler_for(message.type, message.name) is not None
+
+    def _handle_raw(self, message):
+        if message.type == "response":
+            with self:
+                request = self._sent_requests.pop(message.request_seq)
+                request.response = message
+                request._enqueue_response_handlers()
+            return
+
+        def relay():
+            # Handlers could have changed since the message was received.
+            handler = self._relay_handler_for(message.type, message.name)
+            try:
+                if handler is not None and handler(message):
+                    return
+            except Exception:
+                log.reraise_exception(
+                    "Handler {0}\ncouldn't relay {1}:",
+                    compat.srcnameof(handler),
+                    message.describe(),
+                )
+
+            try:
+                parsed = message.parse()
+            except InvalidMessageError as exc:
+                log.error(
+                    "Failed to parse message in channel {0}: {1} in:\n{2}",
+                    self,
+                    str(exc),
+                    message.text,
+                )
+                return
+            parsed._handle()
+
+        self._enqueue_handlers(message, relay)
+
     def _enqueue_handlers(self, what, *handlers):
         """Enqueues handlers for _run_handlers() to run.
 
@@ -1548,6 +1965,33 @@ class JsonMessageChannel(object):
             )
 
 
+class _RawMessageDecoder(object):
+    """Decodes messages that can be relayed by the channel into RawMessage, and all
+    others as usual.
+    """
+
+    def __init__(self, channel, decoder):
+        self.channel = channel
+        self.decoder = decoder
+
+    def decode(self, text):
+        channel = self.channel
+        if channel._may_relay():
+            message = RawMessage.peek(channel, text, accept=channel._can_relay)
+            if message is not None:
+                return message
+        return self.decoder.decode(text)
+
+
+class _RawMessageEncoder(object):
+    """Encodes RawMessage for JsonIOStream.write_json() by using its text as is.
+    """
+
+    @staticmethod
+    def encode(message):
+        return message.text
+
+
 class MessageHandlers(object):
     """A simple delegating message handlers object for use with JsonMessageChannel.
     For every argument provided, the object gets an attribute with the corresponding
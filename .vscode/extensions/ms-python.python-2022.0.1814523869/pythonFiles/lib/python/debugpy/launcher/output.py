@@ -9,9 +9,12 @@ import os
 import sys
 import threading
 
-from debugpy import launcher
+from debugpy import _vendored, launcher
 from debugpy.common import log
 
+with _vendored.vendored("pydevd"):
+    from _pydevd_bundle.pydevd_output_coalescer import OutputCoalescer
+
 
 class CaptureOutput(object):
     """Captures output from the specified file descriptor, and tees it into another
@@ -30,6 +33,7 @@ class CaptureOutput(object):
         self._whose = whose
         self._fd = fd
         self._decoder = codecs.getincrementaldecoder("utf-8")(errors="surrogateescape")
+        self._coalescer = _get_output_coalescer()
 
         if stream is None:
             # Can happen if running under pythonw.exe.
@@ -79,12 +83,7 @@ class CaptureOutput(object):
         if len(s) == 0:
             return
 
-        try:
-            launcher.channel.send_event(
-                "output", {"category": self.category, "output": s.replace("\r\n", "\n")}
-            )
-        except Exception:
-            pass  # channel to adapter is already closed
+        self._coalescer.write(self.category, s.replace("\r\n", "\n"))
 
         if self._stream is None:
             return
@@ -108,9 +107,30 @@ class CaptureOutput(object):
             i += written
 
 
+def _send_output_event(category, output):
+    try:
+        launcher.channel.send_event("output", {"category": category, "output": output})
+    except Exception:
+        pass  # channel to adapter is already closed
+
+
+_output_coalescer = None
+
+
+def _get_output_coalescer():
+    # Output events for all categories go through the same coalescer, so that they
+    # are not reordered relative to each other any more than they already are.
+    global _output_coalescer
+    if _output_coalescer is None:
+        _output_coalescer = OutputCoalescer(_send_output_event)
+    return _output_coalescer
+
+
 def wait_for_remaining_output():
     """Waits for all remaining output to be captured and propagated.
     """
     for category, instance in CaptureOutput.instances.items():
         log.info("Waiting for remaining {0} of {1}.", category, instance._whose)
         instance._worker_thread.join()
+    if _output_coalescer is not None:
+        _output_coalescer.flush()
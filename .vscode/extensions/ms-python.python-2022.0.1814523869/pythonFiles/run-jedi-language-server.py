@@ -8,4 +8,7 @@ sys.path.insert(0, os.path.join(EXTENSION_ROOT, "pythonFiles", "lib", "jedilsp")
 
 from jedi_language_server.cli import cli
 
-sys.exit(cli())
+# Note: the guard is needed because the worker processes of the workspace
+# symbol index (which are spawned) run this script as `__mp_main__`.
+if __name__ == "__main__":
+    sys.exit(cli())
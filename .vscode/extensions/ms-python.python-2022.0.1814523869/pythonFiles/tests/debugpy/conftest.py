@@ -0,0 +1,14 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import os
+import sys
+
+LIB_PYTHON = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "lib",
+    "python",
+)
+
+if LIB_PYTHON not in sys.path:
+    sys.path.insert(0, LIB_PYTHON)
@@ -0,0 +1,131 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import json
+import socket
+import threading
+
+import pytest
+
+from debugpy.common import messaging
+
+
+def test_peek_routes_well_formed_message():
+    text = '{"seq": 7, "type": "response", "request_seq": 3, "success": true, "command": "variables", "body": {"variables": []}}'
+    message = messaging.RawMessage.peek(None, text)
+    assert message is not None
+    assert (message.type, message.seq, message.request_seq, message.name) == ("response", 7, 3, "variables")
+
+    replaced = message.replace(seq=10, request_seq=20)
+    assert json.loads(replaced.text) == dict(json.loads(text), seq=10, request_seq=20)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        # The receiver would see a "runInTerminal" request instead of the routed event.
+        '{"type": "event", "seq": 1, "event": "output", "type": "request", "command": "runInTerminal", "arguments": {}}',
+        '{"type": "response", "seq": 1, "request_seq": 2, "command": "variables", "success": true, "type": "request"}',
+        '{"type": "event", "seq": 1, "event": "output", "seq": 2}',
+        '{"type": "event", "event": "output", "seq": 1, "event": "stopped"}',
+    ],
+)
+def test_peek_rejects_duplicate_routing_keys(text):
+    assert messaging.RawMessage.peek(None, text) is None
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"type": "event", "seq": 1, "event": "output", "body": {"output": nope}}',
+        '{"type": "event", "seq": 1, "event": "output", "body": {}',
+        '{"type": "event", "seq": 1, "event": "output"} trailing',
+        '{"type": "event", "seq": 1, "event": "output", 1: 2}',
+        '{"type": "event", "seq": 1, "event": "output",}',
+        '{"type": "event", "seq": "1", "event": "output"}',
+        '{"type": "reverse", "seq": 1, "event": "output"}',
+        '{"seq": 1, "event": "output"}',
+    ],
+)
+def test_peek_rejects_malformed_messages(text):
+    assert messaging.RawMessage.peek(None, text) is None
+
+
+def _write_raw(sock, text):
+    body = text.encode("utf-8")
+    sock.sendall(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+
+
+class _Recorder(object):
+    def __init__(self):
+        self.received = []
+        self.done = threading.Event()
+
+    def add(self, what):
+        self.received.append(what)
+        self.done.set()
+
+
+def test_duplicate_routing_keys_are_not_relayed():
+    adapter_sock, server_sock = socket.socketpair()
+    recorder = _Recorder()
+
+    def relay_event(event):
+        recorder.add(("relayed", event.name))
+        return True
+
+    def request(request):
+        recorder.add(("parsed", request.command))
+        return {}
+
+    handlers = messaging.MessageHandlers(relay_event=relay_event, request=request)
+    channel = messaging.JsonMessageChannel(
+        messaging.JsonIOStream.from_socket(adapter_sock), handlers
+    )
+    channel.start()
+    try:
+        _write_raw(
+            server_sock,
+            '{"type": "event", "seq": 1, "event": "output", "body": {}, '
+            '"type": "request", "command": "runInTerminal", "arguments": {}}',
+        )
+        assert recorder.done.wait(10)
+        assert recorder.received == [("parsed", "runInTerminal")]
+    finally:
+        channel.close()
+        server_sock.close()
+
+
+def test_raw_request_response_handlers():
+    adapter_sock, server_sock = socket.socketpair()
+
+    def variables_request(request):
+        return {"variables": [{"name": "a", "value": "1", "variablesReference": 0}]}
+
+    server = messaging.JsonMessageChannel(
+        messaging.JsonIOStream.from_socket(server_sock),
+        messaging.MessageHandlers(variables_request=variables_request),
+    )
+    adapter = messaging.JsonMessageChannel(messaging.JsonIOStream.from_socket(adapter_sock))
+    server.start()
+    adapter.start()
+    try:
+        raw_request = messaging.RawMessage.peek(
+            None,
+            '{"seq": 10, "type": "request", "command": "variables", "arguments": {"variablesReference": 1}}',
+        )
+        request = adapter.propagate(raw_request)
+        assert isinstance(request, messaging.RawOutgoingRequest)
+
+        recorder = _Recorder()
+        request.on_response(recorder.add)
+        assert recorder.done.wait(10)
+
+        [response] = recorder.received
+        assert isinstance(response, messaging.RawMessage)
+        assert (response.type, response.name, response.request_seq) == ("response", "variables", request.seq)
+        assert json.loads(response.text)["body"]["variables"][0]["name"] == "a"
+        assert request.wait_for_response() is response
+    finally:
+        adapter.close()
+        server.close()
@@ -0,0 +1,14 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import os
+import sys
+
+JEDILSP_ROOT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "lib",
+    "jedilsp",
+)
+
+if JEDILSP_ROOT not in sys.path:
+    sys.path.insert(0, JEDILSP_ROOT)
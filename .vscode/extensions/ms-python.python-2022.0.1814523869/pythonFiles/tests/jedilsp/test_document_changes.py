@@ -0,0 +1,94 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import random
+
+import pytest
+
+from pygls.lsp.types import Position, Range, TextDocumentContentChangeEvent
+from pygls.workspace import Document, range_from_utf16, utf16_num_units
+
+_CHUNKS = ["a", "é", "😀", " ", "\r", "\n", "\r\n"]
+
+
+def _change(start_line, start_char, end_line, end_char, text):
+    return TextDocumentContentChangeEvent(
+        range=Range(
+            start=Position(line=start_line, character=start_char),
+            end=Position(line=end_line, character=end_char),
+        ),
+        text=text,
+    )
+
+
+def _apply_to_source(source, change):
+    """Apply the change to the full text (as done before the lines were kept)."""
+    lines = source.splitlines(True)
+    (start_line, start_col), (end_line, end_col) = range_from_utf16(lines, change.range)
+    if start_line == len(lines):
+        return source + change.text
+
+    new = []
+    for i, line in enumerate(lines):
+        if i < start_line or i > end_line:
+            new.append(line)
+            continue
+        if i == start_line:
+            new.append(line[:start_col])
+            new.append(change.text)
+        if i == end_line:
+            new.append(line[end_col:])
+    return "".join(new)
+
+
+def _random_text(rnd, max_chunks):
+    return "".join(rnd.choice(_CHUNKS) for _ in range(rnd.randint(0, max_chunks)))
+
+
+def _random_change(rnd, source):
+    lines = source.splitlines(True)
+
+    def position():
+        line = rnd.randint(0, len(lines) + 1)
+        num_units = utf16_num_units(lines[line]) if line < len(lines) else 0
+        return (line, rnd.randint(0, num_units + 1))
+
+    start, end = sorted([position(), position()])
+    return _change(start[0], start[1], end[0], end[1], _random_text(rnd, 4))
+
+
+def _check(doc, source):
+    assert doc.source == source
+    assert doc.lines == source.splitlines(True)
+    offset = 0
+    for i, line in enumerate(doc.lines):
+        assert doc.offset_at_position(Position(line=i, character=0)) == offset
+        offset += len(line)
+
+
+def test_crlf_merged_after_end_extension():
+    source = "éa\r😀"
+    doc = Document("file:///doc.py", source)
+    doc.lines  # Keep the lines in memory.
+    for change in [
+        _change(1, 5, 4, 1, ""),
+        _change(0, 4, 1, 6, " \r\n\n"),
+        _change(4, 2, 5, 3, "\raé"),
+        _change(1, 0, 1, 4, ""),
+    ]:
+        doc.apply_change(change)
+        source = _apply_to_source(source, change)
+        _check(doc, source)
+    assert doc.lines == ["éa\r\n", "\r", "aé"]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_changes_match_full_text(seed):
+    rnd = random.Random(seed)
+    source = _random_text(rnd, 10)
+    doc = Document("file:///doc.py", source)
+    for _ in range(300):
+        change = _random_change(rnd, source)
+        doc.apply_change(change)
+        source = _apply_to_source(source, change)
+        _check(doc, source)
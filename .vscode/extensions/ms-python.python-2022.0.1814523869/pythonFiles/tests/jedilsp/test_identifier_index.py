@@ -0,0 +1,147 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import os
+
+import jedi
+import pytest
+from jedi import settings
+from jedi.file_io import FileIO
+from jedi.inference import identifier_index
+from jedi.inference.identifier_index import IdentifierIndex
+
+VERSION_INFO = (3, 8)
+
+
+@pytest.fixture
+def files(tmp_path):
+    contents = {
+        "uses_name.py": "from lib import target\ntarget()\n",
+        "defines_name.py": "def target():\n    pass\n",
+        "in_comment.py": "# target\nx = 'target'\n",
+        "unrelated.py": "y = 1\n",
+    }
+    paths = {}
+    for name, code in contents.items():
+        path = tmp_path / name
+        path.write_text(code)
+        paths[name] = str(path)
+    return paths
+
+
+@pytest.fixture
+def index(tmp_path):
+    return IdentifierIndex(str(tmp_path / "cache" / "index.db"))
+
+
+def _filter(index, paths, name):
+    file_ios = [FileIO(path) for path in sorted(paths)]
+    return sorted(
+        os.path.basename(str(file_io.path))
+        for file_io in index.filter_file_ios(iter(file_ios), name, VERSION_INFO)
+    )
+
+
+def _bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+
+def test_filter_by_identifier(index, files):
+    # Names in comments and strings are not identifiers.
+    expected = ["defines_name.py", "uses_name.py"]
+    assert _filter(index, files.values(), "target") == expected
+    # The second search uses the index (the files are not read again).
+    assert _filter(index, files.values(), "target") == expected
+    assert _filter(index, files.values(), "missing") == []
+
+
+def test_indexed_files_not_read_again(index, files, monkeypatch):
+    _filter(index, files.values(), "target")
+
+    indexed = []
+    index_file = index._index_file
+
+    def track_index_file(path, stat, version_info):
+        indexed.append(os.path.basename(path))
+        return index_file(path, stat, version_info)
+
+    monkeypatch.setattr(index, "_index_file", track_index_file)
+    _filter(index, files.values(), "target")
+    assert indexed == []
+
+    with open(files["unrelated.py"], "w") as stream:
+        stream.write("from lib import target\n")
+    _bump_mtime(files["unrelated.py"])
+    assert _filter(index, files.values(), "target") == [
+        "defines_name.py",
+        "unrelated.py",
+        "uses_name.py",
+    ]
+    assert indexed == ["unrelated.py"]
+
+
+def test_index_persisted(tmp_path, files):
+    db_path = str(tmp_path / "cache" / "index.db")
+    _filter(IdentifierIndex(db_path), files.values(), "target")
+    assert _filter(IdentifierIndex(db_path), files.values(), "target") == [
+        "defines_name.py",
+        "uses_name.py",
+    ]
+
+
+def test_removed_files_forgotten(index, files):
+    _filter(index, files.values(), "target")
+    os.remove(files["uses_name.py"])
+    remaining = [path for path in files.values() if path != files["uses_name.py"]]
+    assert _filter(index, remaining, "target") == ["defines_name.py"]
+    assert files["uses_name.py"] not in index._files
+
+
+def test_files_not_indexed_in_time_are_yielded(index, files, monkeypatch):
+    monkeypatch.setattr(identifier_index, "_INDEX_TIME_LIMIT", -1)
+    assert _filter(index, files.values(), "target") == sorted(
+        os.path.basename(path) for path in files.values()
+    )
+    assert index._files == {}
+
+
+def test_unavailable_index_yields_all_files(tmp_path, files):
+    # The directory of the database can't be created.
+    (tmp_path / "not_a_dir").write_text("")
+    index = IdentifierIndex(str(tmp_path / "not_a_dir" / "index.db"))
+    assert len(_filter(index, files.values(), "target")) == len(files)
+
+
+def test_references_same_with_index(tmp_path, monkeypatch):
+    project_path = tmp_path / "project"
+    package_path = project_path / "package"
+    package_path.mkdir(parents=True)
+    (package_path / "__init__.py").write_text("")
+    (package_path / "lib.py").write_text("def target():\n    pass\n")
+    for i in range(30):
+        if i % 3:
+            code = "x = 1  # target\n"
+        else:
+            code = "from package.lib import target\n\ntarget()\n"
+        (package_path / f"module{i}.py").write_text(code)
+    monkeypatch.setattr(settings, "cache_directory", str(tmp_path / "cache"))
+    monkeypatch.setattr(identifier_index, "_indexes", {})
+
+    def get_references():
+        project = jedi.Project(str(project_path))
+        path = package_path / "lib.py"
+        script = jedi.Script(path.read_text(), path=str(path), project=project)
+        return sorted(
+            (str(ref.module_path), ref.line, ref.column)
+            for ref in script.get_references(1, 4)
+        )
+
+    monkeypatch.setattr(settings, "identifier_index", False)
+    expected = get_references()
+    assert len(expected) == 1 + 2 * 10
+
+    monkeypatch.setattr(settings, "identifier_index", True)
+    assert get_references() == expected  # Builds the index.
+    assert get_references() == expected  # Uses it.
+    assert any(index._files for index in identifier_index._indexes.values())
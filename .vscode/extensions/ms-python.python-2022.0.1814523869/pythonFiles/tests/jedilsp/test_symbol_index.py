@@ -0,0 +1,148 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from jedi_language_server import symbol_index
+
+SERVER_SCRIPT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "run-jedi-language-server.py",
+)
+
+TIMEOUT = 30
+
+
+class _StdioClient:
+    """Minimal LSP client for the server started with the stdio transport."""
+
+    def __init__(self, root_path, cache_path):
+        env = dict(os.environ, XDG_CACHE_HOME=str(cache_path))
+        self.process = subprocess.Popen(
+            [sys.executable, SERVER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=str(root_path),
+            env=env,
+        )
+        self._next_id = 0
+        self._responses = {}
+        self._condition = threading.Condition()
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        stream = self.process.stdout
+        while True:
+            length = None
+            while True:
+                line = stream.readline()
+                if not line:
+                    return
+                if line == b"\r\n":
+                    break
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value)
+            message = json.loads(stream.read(length))
+            if "id" in message and "method" not in message:
+                with self._condition:
+                    self._responses[message["id"]] = message
+                    self._condition.notify_all()
+
+    def _send(self, message):
+        message["jsonrpc"] = "2.0"
+        body = json.dumps(message).encode("utf-8")
+        self.process.stdin.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+        self.process.stdin.flush()
+
+    def notify(self, method, params=None):
+        self._send({"method": method, "params": params})
+
+    def request(self, method, params=None):
+        self._next_id += 1
+        request_id = self._next_id
+        self._send({"id": request_id, "method": method, "params": params})
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: request_id in self._responses, TIMEOUT
+            ):
+                raise AssertionError(f"No response to {method}")
+            return self._responses.pop(request_id)
+
+    def initialize(self, root_path):
+        self.request(
+            "initialize",
+            {
+                "processId": os.getpid(),
+                "rootUri": Path(root_path).as_uri(),
+                "capabilities": {},
+            },
+        )
+        self.notify("initialized", {})
+
+    def shutdown_and_exit(self):
+        self.request("shutdown")
+        self.notify("exit")
+        return self.process.wait(TIMEOUT)
+
+    def kill(self):
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root_path = tmp_path / "workspace"
+    package_path = root_path / "package"
+    package_path.mkdir(parents=True)
+    (package_path / "__init__.py").write_text("")
+    # Enough files to be indexed in the worker processes.
+    num_files = 2 * symbol_index._MIN_FILES_FOR_WORKERS
+    for i in range(num_files):
+        (package_path / f"module{i}.py").write_text(
+            f"class Foo{i}:\n    def method{i}(self):\n        pass\n"
+        )
+    return root_path, tmp_path / "cache", num_files
+
+
+def test_stdio_server_indexes_in_workers(workspace):
+    root_path, cache_path, num_files = workspace
+    client = _StdioClient(root_path, cache_path)
+    try:
+        client.initialize(root_path)
+        name = f"Foo{num_files - 1}"
+        deadline = time.time() + TIMEOUT
+        while True:
+            # Note: the server's stdin reader is idle (blocked reading) while
+            # waiting here, which is when the worker processes are started.
+            time.sleep(0.5)
+            result = client.request("workspace/symbol", {"query": name})["result"]
+            if any(symbol["name"] == name for symbol in result or ()):
+                break
+            assert time.time() < deadline, "The symbols were not indexed."
+
+        assert client.shutdown_and_exit() == 0
+    finally:
+        client.kill()
+
+
+def test_stdio_server_exits_while_indexing(workspace):
+    root_path, cache_path, _num_files = workspace
+    client = _StdioClient(root_path, cache_path)
+    try:
+        client.initialize(root_path)
+        time.sleep(1)
+        assert client.shutdown_and_exit() == 0
+    finally:
+        client.kill()
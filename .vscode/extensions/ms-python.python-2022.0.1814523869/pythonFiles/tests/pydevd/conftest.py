@@ -0,0 +1,17 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import os
+import sys
+
+PYDEVD_ROOT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "lib",
+    "python",
+    "debugpy",
+    "_vendored",
+    "pydevd",
+)
+
+if PYDEVD_ROOT not in sys.path:
+    sys.path.insert(0, PYDEVD_ROOT)
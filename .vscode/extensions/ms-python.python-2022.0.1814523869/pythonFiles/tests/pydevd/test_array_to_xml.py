@@ -0,0 +1,29 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import pytest
+
+from _pydevd_bundle.pydevd_vars import array_to_xml
+
+numpy = pytest.importorskip('numpy')
+
+
+def test_array_to_xml_column_offset_past_end():
+    array = numpy.arange(6).reshape(2, 3)
+    assert array_to_xml(array, 0, 3, 2, 2, '%d') == (
+        '<arraydata rows="2" cols="0"/><row index="0"/><row index="1"/>')
+
+
+def test_array_to_xml_1d_offset_past_end():
+    array = numpy.arange(3)
+    assert array_to_xml(array, 0, 3, 1, 2, '%d') == (
+        '<arraydata rows="1" cols="0"/><row index="0"/>')
+
+
+def test_array_to_xml_window():
+    array = numpy.arange(12).reshape(3, 4)
+    xml = array_to_xml(array, 1, 2, 2, 5, '%d')
+    assert xml.startswith('<arraydata rows="2" cols="2"/><row index="0"/>')
+    assert xml.count('<var ') == 4
+    for value in (6, 7, 10, 11):
+        assert 'value="str%%3A %d"' % (value,) in xml
@@ -0,0 +1,47 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import gc
+
+from _pydevd_bundle.pydevd_bytecode_analysis_cache import BytecodeAnalysisCache, RETURN_INFO
+from _pydevd_bundle.pydevd_collect_bytecode_info import collect_return_info
+
+
+def _get_function_code(source, filename):
+    namespace = {}
+    exec(compile(source, filename, 'exec'), namespace)
+    return namespace['f'].__code__
+
+
+def test_equal_code_objects_not_shared():
+    # Same name, first line and bytecode: in some Python versions the code objects compare
+    # equal even though the lines are different.
+    code_a = _get_function_code('\n\ndef f(a):\n    if a:\n        return 1\n    return 2\n', '/a.py')
+    code_b = _get_function_code('\n\ndef f(a):\n    if a:\n\n        return 1\n\n    return 2\n', '/b.py')
+
+    cache = BytecodeAnalysisCache()
+    lines_a = [info.return_line for info in cache.get(RETURN_INFO, code_a, collect_return_info)]
+    lines_b = [info.return_line for info in cache.get(RETURN_INFO, code_b, collect_return_info)]
+    assert lines_a == [info.return_line for info in collect_return_info(code_a)]
+    assert lines_b == [info.return_line for info in collect_return_info(code_b)]
+    assert lines_a != lines_b
+
+
+def test_entry_removed_with_code():
+    cache = BytecodeAnalysisCache()
+    code = _get_function_code('def f():\n    return 1\n', '/c.py')
+    calls = []
+
+    def compute(code):
+        calls.append(code)
+        return []
+
+    cache.get(RETURN_INFO, code, compute)
+    cache.get(RETURN_INFO, code, compute)
+    assert len(calls) == 1
+    assert len(cache._code_id_to_results) == 1
+
+    del code
+    del calls[:]
+    gc.collect()
+    assert cache._code_id_to_results == {}
@@ -0,0 +1,91 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+from pydevd_concurrency_analyser import pydevd_concurrency_logger
+from pydevd_concurrency_analyser.pydevd_concurrency_logger import (
+    ConcurrencyEventsRecorder,
+)
+
+
+def _record(recorder, i, name="MainThread"):
+    recorder.record(
+        "ThreadingEvent", float(i), name, name, "lock", "acquire_begin", "file%s" % (i % 7,), i, 1, None
+    )
+
+
+def _load_events(trace_file, name=None):
+    with open(trace_file) as stream:
+        trace = json.load(stream)
+    return [
+        event
+        for event in trace["traceEvents"]
+        if event["ph"] != "M" and (name is None or event["args"]["event_class"] == name)
+    ]
+
+
+def test_flush_while_the_ring_buffer_wraps_around(tmp_path):
+    trace_file = str(tmp_path / "trace.json")
+    recorder = ConcurrencyEventsRecorder(trace_file, capacity=16, flush_interval=0.0001)
+    recorder.start()
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for i in range(20000):
+            _record(recorder, i)
+    finally:
+        sys.setswitchinterval(switch_interval)
+        recorder.stop()
+
+    events = _load_events(trace_file)
+    lines = [event["args"]["line"] for event in events]
+    # Events may be dropped (and counted), but what's saved must be complete and in order.
+    assert lines == sorted(set(lines))
+    assert len(lines) + recorder.dropped == 20000
+    for event in events:
+        assert event["args"]["file"] == "file%s" % (event["args"]["line"] % 7,)
+        assert event["ts"] == event["args"]["line"]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="Requires os.fork.")
+def test_forked_process_records_to_its_own_trace(tmp_path):
+    trace_file = str(tmp_path / "trace.json")
+    pydevd_concurrency_logger.start_recording_events(trace_file)
+    try:
+        recorder = pydevd_concurrency_logger._events_recorder
+        for i in range(10):
+            _record(recorder, i, name="parent")
+        recorder.flush()
+
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                child_recorder = pydevd_concurrency_logger._events_recorder
+                if child_recorder is not recorder and child_recorder.pid == os.getpid():
+                    _record(child_recorder, 100, name="child")
+                    pydevd_concurrency_logger.stop_recording_events()
+                    exit_code = 0
+            finally:
+                os._exit(exit_code)
+
+        _, status = os.waitpid(pid, 0)
+        assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+
+        for i in range(10, 20):
+            _record(recorder, i, name="parent")
+    finally:
+        pydevd_concurrency_logger.stop_recording_events()
+
+    parent_events = _load_events(str(tmp_path / ("trace.%s.json" % os.getpid())))
+    assert [event["args"]["line"] for event in parent_events] == list(range(20))
+
+    child_events = _load_events(str(tmp_path / ("trace.%s.json" % pid)))
+    assert [event["args"]["line"] for event in child_events] == [100]
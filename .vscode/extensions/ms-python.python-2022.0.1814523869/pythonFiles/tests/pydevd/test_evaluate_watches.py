@@ -0,0 +1,84 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from _pydevd_bundle._debug_adapter import pydevd_schema
+from _pydevd_bundle.pydevd_process_net_command_json import PyDevJsonCommandProcessor
+
+
+class _SuspendedFramesManager(object):
+    def __init__(self):
+        self.frame_id_to_thread_id = {}
+
+    def get_thread_id_for_variable_reference(self, variable_reference):
+        return self.frame_id_to_thread_id.get(variable_reference)
+
+
+class _ThreadsSuspendedSingleNotification(object):
+    def add_on_resumed_callback(self, callback):
+        pass
+
+
+class _PyDB(object):
+    def __init__(self):
+        self.suspended_frames_manager = _SuspendedFramesManager()
+        self.threads_suspended_single_notification = _ThreadsSuspendedSingleNotification()
+        self.posted = []
+
+    def post_internal_command(self, internal_cmd, thread_id):
+        self.posted.append(internal_cmd)
+
+
+def _evaluate(processor, py_db, frame_id, expression):
+    request = pydevd_schema.EvaluateRequest(
+        pydevd_schema.EvaluateArguments(expression, frameId=frame_id, context='watch'))
+    processor.on_evaluate_request(py_db, request)
+
+
+def _continue(processor, py_db, thread_id):
+    request = pydevd_schema.ContinueRequest(pydevd_schema.ContinueArguments(thread_id))
+    processor.on_continue_request(py_db, request)
+
+
+def test_watches_batched_per_suspended_thread():
+    processor = PyDevJsonCommandProcessor(None)
+    py_db = _PyDB()
+    py_db.suspended_frames_manager.frame_id_to_thread_id[1] = 'thread1'
+
+    _evaluate(processor, py_db, 1, 'a')
+    _evaluate(processor, py_db, 1, 'b')
+    assert len(py_db.posted) == 1
+
+    # Once the command starts executing a new one is needed.
+    assert not py_db.posted[0].has_started()
+    py_db.posted[0]._requests = None
+    _evaluate(processor, py_db, 1, 'c')
+    assert len(py_db.posted) == 2
+
+
+def test_watches_cmd_forgotten_on_resume():
+    processor = PyDevJsonCommandProcessor(None)
+    py_db = _PyDB()
+    for i in range(100):
+        thread_id = 'thread%s' % (i,)
+        py_db.suspended_frames_manager.frame_id_to_thread_id[i] = thread_id
+        _evaluate(processor, py_db, i, 'a')
+        _continue(processor, py_db, thread_id)
+    assert processor._thread_id_to_watches_cmd == {}
+
+    _evaluate(processor, py_db, 1, 'a')
+    _evaluate(processor, py_db, 2, 'a')
+    assert len(processor._thread_id_to_watches_cmd) == 2
+    _continue(processor, py_db, '*')
+    assert processor._thread_id_to_watches_cmd == {}
+
+
+def test_executed_watches_cmds_pruned():
+    # Threads which are resumed through other paths (or which exit) are removed once their
+    # command was executed.
+    processor = PyDevJsonCommandProcessor(None)
+    py_db = _PyDB()
+    for i in range(100):
+        py_db.suspended_frames_manager.frame_id_to_thread_id[i] = 'thread%s' % (i,)
+        _evaluate(processor, py_db, i, 'a')
+        py_db.posted[-1]._requests = None  # i.e.: do_it() was called.
+    assert len(processor._thread_id_to_watches_cmd) == 1
@@ -0,0 +1,34 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import fnmatch
+
+import pytest
+
+from _pydevd_bundle.pydevd_filtering import glob_matches_path
+
+
+def _matches(path, pattern):
+    return glob_matches_path(path, pattern, sep='/', altsep=None)
+
+
+def test_glob_bracket_with_leading_close_bracket():
+    assert _matches('/a', '/[!]]')
+    assert not _matches('/]', '/[!]]')
+    assert _matches('/]', '/[]]')
+    assert _matches('/]', '/[]a]')
+    assert not _matches('/b', '/[]a]')
+
+
+@pytest.mark.parametrize('pattern', [
+    '[]]', '[!]]', '[]a]', '[!]a]', '[a-c]', '[!a-c]', '[^a]', '[a^]', '[[]', '[a[]',
+    '[&a]', '[~a]', '[|a]', '[!&]', '[', '[!', '[]', '[!]', 'x[ab]y', '*[!]]',
+])
+def test_glob_segment_matches_fnmatch(pattern):
+    for name in ['a', 'b', 'd', ']', '[', '^', '&', '~', '|', '!', 'xay', 'xcy', 'a]', '[]', '[!]']:
+        assert _matches('/' + name, '/' + pattern) == fnmatch.fnmatchcase(name, pattern), (name, pattern)
+
+
+def test_glob_bracket_never_matches_separator():
+    assert not _matches('/a/b', '/a[!]]b')
+    assert not _matches('/a/b', '/a[]/]b')
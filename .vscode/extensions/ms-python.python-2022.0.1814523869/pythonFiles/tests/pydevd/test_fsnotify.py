@@ -0,0 +1,116 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from _pydev_bundle import fsnotify
+from _pydev_bundle.fsnotify import inotify_ctypes
+
+pytestmark = pytest.mark.skipif(
+    not inotify_ctypes.is_inotify_available(), reason="Requires inotify (Linux)."
+)
+
+
+class _ChangesCollector(object):
+    def __init__(self, watcher):
+        self._watcher = watcher
+        self._changes = []
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._collect)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _collect(self):
+        for change in self._watcher.iter_changes():
+            with self._condition:
+                self._changes.append(change)
+                self._condition.notify_all()
+
+    def wait_for(self, expected, timeout=5):
+        deadline = time.time() + timeout
+        with self._condition:
+            while not expected.issubset(self._changes):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return set(self._changes)
+
+    def dispose(self):
+        self._watcher.dispose()
+        self._thread.join(5)
+
+
+@pytest.fixture
+def make_watcher():
+    collectors = []
+
+    def make(paths):
+        watcher = fsnotify.Watcher()
+        watcher.accepted_file_extensions = (".py",)
+        watcher.set_tracked_paths(paths)
+        collector = _ChangesCollector(watcher)
+        collectors.append(collector)
+        return watcher, collector
+
+    yield make
+
+    for collector in collectors:
+        collector.dispose()
+
+
+def _write(path, contents):
+    with open(path, "w") as stream:
+        stream.write(contents)
+
+
+def test_symlinked_dir_uses_inotify(tmp_path, make_watcher):
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    _write(str(outside / "mod.py"), "a = 1")
+
+    root = tmp_path / "root"
+    root.mkdir()
+    real = root / "real"
+    real.mkdir()
+    _write(str(real / "mod.py"), "a = 1")
+    os.symlink(str(outside), str(root / "link"))
+    # A second path to a directory which is already tracked.
+    os.symlink(str(real), str(root / "link_to_real"))
+
+    watcher, collector = make_watcher([str(root)])
+    assert watcher._inotify_tracker is not None
+
+    time.sleep(0.1)
+    _write(str(outside / "mod.py"), "a = 22")
+    _write(str(real / "mod.py"), "a = 22")
+
+    expected = {
+        (fsnotify.Change.modified, str(root / "link" / "mod.py")),
+        (fsnotify.Change.modified, str(real / "mod.py")),
+        (fsnotify.Change.modified, str(root / "link_to_real" / "mod.py")),
+    }
+    assert expected.issubset(collector.wait_for(expected))
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="Requires a filesystem accepting any bytes.")
+def test_undecodable_dir_name_is_tracked(tmp_path, make_watcher):
+    root = tmp_path / "root"
+    root.mkdir()
+    undecodable = os.path.join(str(root), os.fsdecode(b"dir\xff"))
+    os.mkdir(undecodable)
+
+    watcher, collector = make_watcher([str(root)])
+    assert watcher._inotify_tracker is not None
+
+    time.sleep(0.1)
+    new_file = os.path.join(undecodable, "new.py")
+    _write(new_file, "a = 1")
+
+    expected = {(fsnotify.Change.added, new_file)}
+    assert expected.issubset(collector.wait_for(expected))
@@ -0,0 +1,53 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import sys
+import threading
+
+from _pydevd_bundle import pydevd_referrers
+from _pydevd_bundle.pydevd_additional_thread_info import set_additional_thread_info
+from _pydevd_bundle.pydevd_constants import STATE_RUN
+
+
+class _Writer(object):
+    def __init__(self):
+        self.commands = []
+
+    def add_command(self, cmd):
+        self.commands.append(cmd)
+
+
+def test_heap_snapshot_not_kept_without_debugger(monkeypatch):
+    monkeypatch.setattr(pydevd_referrers, 'get_global_debugger', lambda: None)
+    try:
+        snapshot = pydevd_referrers.get_heap_snapshot()
+        assert isinstance(snapshot, pydevd_referrers.HeapSnapshot)
+        assert pydevd_referrers.get_heap_snapshot(create=False) is None
+    finally:
+        pydevd_referrers.clear_heap_snapshot()
+
+
+def test_heap_snapshot_freed_on_resume(monkeypatch):
+    import pydevd
+
+    py_db = pydevd.PyDB(set_as_global=False)
+    py_db.writer = _Writer()
+    # The XML protocol default (the on-resumed callbacks are not called in this mode).
+    assert not py_db.multi_threads_single_notification
+    monkeypatch.setattr(pydevd_referrers, 'get_global_debugger', lambda: py_db)
+
+    thread = threading.current_thread()
+    info = set_additional_thread_info(thread)
+    try:
+        snapshot = pydevd_referrers.get_heap_snapshot()
+        assert pydevd_referrers.get_heap_snapshot(create=False) is snapshot
+        snapshot = None
+
+        # The thread was already resumed, so, this just does what's done when leaving the
+        # suspended state.
+        info.pydev_state = STATE_RUN
+        py_db._do_wait_suspend(thread, sys._getframe(), 'line', None, 'trace', [], None)
+
+        assert pydevd_referrers.get_heap_snapshot(create=False) is None
+    finally:
+        pydevd_referrers.clear_heap_snapshot()
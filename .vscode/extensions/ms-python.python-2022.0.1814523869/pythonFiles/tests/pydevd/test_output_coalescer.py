@@ -0,0 +1,72 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import sys
+
+from _pydevd_bundle import pydevd_output_coalescer
+from _pydevd_bundle.pydevd_output_coalescer import OutputCoalescer
+
+
+def test_invalid_env_values_use_defaults(monkeypatch, capsys):
+    monkeypatch.setenv(pydevd_output_coalescer.OUTPUT_COALESCE_WINDOW_ENV, "soon")
+    monkeypatch.setenv(pydevd_output_coalescer.OUTPUT_COALESCE_MAX_SIZE_ENV, "1.5")
+    monkeypatch.setenv(pydevd_output_coalescer.OUTPUT_COALESCE_MAX_LINES_ENV, "20")
+    monkeypatch.setattr(sys, "__stderr__", sys.stderr)
+
+    coalescer = OutputCoalescer(lambda category, s: None)
+
+    assert coalescer.window == pydevd_output_coalescer.DEFAULT_OUTPUT_COALESCE_WINDOW
+    assert coalescer.max_size == pydevd_output_coalescer.DEFAULT_OUTPUT_COALESCE_MAX_SIZE
+    assert coalescer.max_lines == 20
+
+    err = capsys.readouterr().err
+    assert pydevd_output_coalescer.OUTPUT_COALESCE_WINDOW_ENV in err
+    assert pydevd_output_coalescer.OUTPUT_COALESCE_MAX_SIZE_ENV in err
+    assert pydevd_output_coalescer.OUTPUT_COALESCE_MAX_LINES_ENV not in err
+
+
+class _Writer(object):
+    def __init__(self):
+        self.commands = []
+
+    def add_command(self, cmd):
+        self.commands.append(cmd)
+
+
+class _SuspendedFramesManager(object):
+    def clear_repr_memo(self):
+        pass
+
+
+class _PyDB(object):
+    def __init__(self):
+        from _pydevd_bundle.pydevd_net_command_factory_json import NetCommandFactoryJson
+        from _pydevd_bundle.pydevd_constants import NULL
+        self.cmd_factory = NetCommandFactoryJson()
+        self.writer = _Writer()
+        self.suspended_frames_manager = _SuspendedFramesManager()
+        self.timeout_tracker = NULL
+        self.multi_threads_single_notification = False
+
+    def get_file_type(self, frame):
+        return None
+
+
+def test_repl_output_sent_before_evaluate_response(monkeypatch):
+    from _pydevd_bundle import pydevd_comm, pydevd_io
+    from _pydevd_bundle._debug_adapter import pydevd_schema
+
+    py_db = _PyDB()
+    monkeypatch.setattr(pydevd_io, 'get_global_debugger', lambda: py_db)
+    # A long window (so, the output would only be sent by an explicit flush).
+    monkeypatch.setattr(pydevd_io, '_output_coalescer', OutputCoalescer(
+        pydevd_io._send_io_message, window=60))
+
+    request = pydevd_schema.EvaluateRequest(
+        pydevd_schema.EvaluateArguments('print("REPLOUT")', context='repl'))
+    pydevd_comm.internal_evaluate_expression_json(py_db, request, thread_id='*')
+
+    messages = [cmd.as_dict for cmd in py_db.writer.commands]
+    assert [msg['type'] for msg in messages] == ['event', 'response']
+    assert messages[0]['body']['output'] == 'REPLOUT\n'
+    assert messages[1]['command'] == 'evaluate'
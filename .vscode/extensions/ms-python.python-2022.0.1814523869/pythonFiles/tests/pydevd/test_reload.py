@@ -0,0 +1,96 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import importlib
+import linecache
+import os
+import py_compile
+import sys
+import textwrap
+
+import pytest
+
+from _pydevd_bundle import pydevd_reload
+
+
+_INITIAL = '''
+executions = globals().get('executions', 0) + 1
+
+def f():
+    return 1
+'''
+
+_BODY_CHANGED = '''
+executions = globals().get('executions', 0) + 1
+
+def f():
+    return 2
+'''
+
+_FUNCTION_ADDED = '''
+executions = globals().get('executions', 0) + 1
+
+def f():
+    return 1
+
+def g():
+    return 3
+'''
+
+
+@pytest.fixture
+def write_module(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(sys, 'dont_write_bytecode', False)
+    filename = str(tmp_path / 'reload_target.py')
+    mtimes = iter(range(1000000000, 2000000000, 100))
+
+    def write(contents):
+        with open(filename, 'w') as stream:
+            stream.write(textwrap.dedent(contents))
+        # Make sure that each version has a different mtime.
+        mtime = next(mtimes)
+        os.utime(filename, (mtime, mtime))
+        return filename
+
+    yield write
+    sys.modules.pop('reload_target', None)
+    pydevd_reload._filename_to_reloaded_code.pop(filename, None)
+    linecache.checkcache(filename)
+
+
+def _import(write_module):
+    filename = write_module(_INITIAL)
+    importlib.invalidate_caches()
+    mod = importlib.import_module('reload_target')
+    assert mod.f() == 1
+    assert mod.executions == 1
+    return mod, filename
+
+
+def test_reload_function_body(write_module):
+    mod, _filename = _import(write_module)
+    write_module(_BODY_CHANGED)
+
+    assert pydevd_reload.xreload(mod)
+    assert mod.f() == 2
+    assert mod.executions == 1  # Only the function was patched.
+
+
+@pytest.mark.parametrize('updated', ['linecache', 'pyc'])
+def test_reload_added_function_with_new_previous_candidate(write_module, updated):
+    mod, filename = _import(write_module)
+    write_module(_FUNCTION_ADDED)
+
+    if updated == 'linecache':
+        # i.e.: Something (such as a traceback) loaded the new contents in the linecache.
+        linecache.checkcache(filename)
+        linecache.updatecache(filename)
+        assert 'def g' in ''.join(linecache.getlines(filename))
+    else:
+        # i.e.: Another process imported the new version.
+        py_compile.compile(filename, cfile=mod.__cached__ if sys.version_info[0] >= 3 else None)
+
+    assert pydevd_reload.xreload(mod)
+    assert mod.g() == 3
+    assert mod.f() == 1
@@ -0,0 +1,118 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import sys
+import threading
+import time
+
+import pytest
+
+try:
+    from urllib.parse import unquote
+except ImportError:
+    from urllib import unquote
+
+from _pydevd_bundle import pydevd_signature
+from _pydevd_bundle.pydevd_signature import SignatureFactory
+
+
+class _Writer(object):
+    def __init__(self):
+        self.commands = []
+
+    def add_command(self, cmd):
+        self.commands.append(cmd)
+
+    def get_texts(self):
+        return [unquote(b"".join(cmd.get_bytes_to_send()).decode("utf-8")) for cmd in self.commands]
+
+
+class _PyDB(object):
+    pydb_disposed = False
+
+    def __init__(self, signature_factory):
+        self.signature_factory = signature_factory
+        self.writer = _Writer()
+
+    def in_project_scope(self, frame, absolute_filename=None):
+        return frame.f_code.co_filename == __file__
+
+
+@pytest.fixture
+def start_collecting():
+    started = []
+
+    def start(profile_file=None):
+        py_db = _PyDB(SignatureFactory(profile_file))
+        py_db.signature_factory.start(py_db)
+        started.append(py_db)
+        return py_db
+
+    yield start
+
+    sys.setprofile(None)
+    threading.setprofile(None)
+    for py_db in started:
+        py_db.pydb_disposed = True
+
+
+def _add(a, b):
+    return a + b
+
+
+def test_signatures_collected_in_calls_and_returns(start_collecting):
+    py_db = start_collecting()
+    _add(1, 2)
+    _add("a", "b")
+    sys.setprofile(None)
+
+    texts = py_db.writer.get_texts()
+    assert any('name="_add"' in text and 'type="int"' in text and "<return" not in text for text in texts)
+    assert any('name="_add"' in text and 'type="str"' in text and "<return" not in text for text in texts)
+    assert any('name="_add"' in text and '<return type="int">' in text for text in texts)
+
+
+def test_signatures_collected_in_new_threads(start_collecting):
+    py_db = start_collecting()
+    t = threading.Thread(target=_add, args=(1.0, 2.0))
+    t.start()
+    t.join()
+    sys.setprofile(None)
+
+    texts = py_db.writer.get_texts()
+    assert any('name="_add"' in text and 'type="float"' in text for text in texts)
+
+
+def test_pending_signatures_flushed_by_timer(start_collecting, tmp_path, monkeypatch):
+    monkeypatch.setattr(pydevd_signature, "SIGNATURE_BATCH_INTERVAL", 0.05)
+    py_db = start_collecting(str(tmp_path / "profile.json"))
+    _add(1, 2)
+    sys.setprofile(None)
+
+    deadline = time.time() + 5
+    while not py_db.writer.commands and time.time() < deadline:
+        time.sleep(0.01)
+
+    texts = py_db.writer.get_texts()
+    assert len(texts) == 1
+    assert 'name="_add"' in texts[0] and "<return" in texts[0]
+
+
+def test_batched_signatures_from_many_threads(tmp_path):
+    signature_factory = SignatureFactory(str(tmp_path / "profile.json"))
+    py_db = _PyDB(signature_factory)
+
+    def send_signatures(thread_index):
+        for i in range(500):
+            signature = pydevd_signature.Signature("file.py", "func%s_%s" % (thread_index, i))
+            signature_factory.send_signature(py_db, signature)
+
+    threads = [threading.Thread(target=send_signatures, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    signature_factory.flush(py_db)
+
+    sent = sum(text.count("<call_signature ") for text in py_db.writer.get_texts())
+    assert sent == 8 * 500
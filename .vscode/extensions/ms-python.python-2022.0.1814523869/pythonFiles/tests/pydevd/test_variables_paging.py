@@ -0,0 +1,59 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import pytest
+
+from _pydevd_bundle import pydevd_resolver
+from _pydevd_bundle.pydevd_resolver import DictResolver, MAX_ITEMS_TO_HANDLE
+
+
+class _SortedKeysDictResolver(DictResolver):
+    sort_keys = True
+
+
+def _names(contents):
+    return [name for name, _value, _evaluate_name in contents]
+
+
+@pytest.mark.parametrize("sort_keys", [True, False])
+def test_dict_pages_match_unpaged_order(sort_keys):
+    resolver = _SortedKeysDictResolver() if sort_keys else DictResolver()
+    dct = {"key%s" % i: i for i in reversed(range(50))}
+
+    # Note: the unpaged contents also have the attributes of the dict itself.
+    keys = set(repr(key) for key in dct)
+    unpaged = [
+        name
+        for name in _names(resolver.get_contents_debug_adapter_protocol(dct))
+        if name in keys
+    ]
+
+    paged = []
+    for start in range(0, len(dct), 7):
+        paged.extend(
+            _names(resolver.get_indexed_contents_debug_adapter_protocol(dct, start, 7))
+        )
+
+    assert paged == unpaged
+    if sort_keys:
+        assert paged == sorted(paged)
+    else:
+        assert paged == [repr(key) for key in dct]
+
+
+def test_sorted_dict_first_page_of_large_dict():
+    resolver = _SortedKeysDictResolver()
+    dct = {i: i for i in reversed(range(MAX_ITEMS_TO_HANDLE * 2))}
+
+    page = resolver.get_indexed_contents_debug_adapter_protocol(dct, 0, 10)
+    expected = sorted(repr(key) for key in dct)[:10]
+    assert _names(page) == expected
+
+
+def test_tuple_pages():
+    resolver = pydevd_resolver.tupleResolver
+    lst = list(range(1000))
+
+    page = resolver.get_indexed_contents_debug_adapter_protocol(lst, 990, 20)
+    assert [value for _name, value, _evaluate_name in page] == list(range(990, 1000))
+    assert [evaluate_name for _name, _value, evaluate_name in page][0] == "[990]"